@@ -1,39 +1,206 @@
-import json
+import concurrent.futures
+import importlib
 import os
-from datetime import datetime
-from typing import List, Dict
-import PyPDF2
-import requests
-from dataclasses import dataclass
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import List, Dict, FrozenSet, Optional, Tuple
 from pathlib import Path
-from groq import Groq
 import asyncio
 import re
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize Groq client
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-if not GROQ_API_KEY:
-    raise ValueError("GROQ_API_KEY environment variable is not set. Please set it with your Groq API key.")
-groq_client = Groq(api_key=GROQ_API_KEY)
-
-@dataclass
-class JobPosting:
-    title: str
-    company: str
-    location: str
-    description: str
-    required_skills: List[str]
-    salary_range: str
-    posting_date: str
+
+from json_stream import JSONArrayStreamParser
+from schemas import JobFeatures, JobPosting, SchemaError, decode_job, decode_resume_analysis
+from skills import SkillTaxonomy, default_taxonomy
+
+
+class _LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# Heavy dependencies are only imported when first used so that headless
+# callers (batch ranking, worker processes) do not pay for the GUI and SDKs
+tk = _LazyModule("tkinter")
+ttk = _LazyModule("tkinter.ttk")
+filedialog = _LazyModule("tkinter.filedialog")
+messagebox = _LazyModule("tkinter.messagebox")
+PyPDF2 = _LazyModule("PyPDF2")
+
+# The scraping bot's modules (single-flight, metrics) live flat in this directory
+SCRAPER_DIR = Path(__file__).resolve().parent.parent / "web_scraping_bot"
+
+
+@lru_cache(maxsize=None)
+def get_config() -> Dict[str, str]:
+    """Resolve configuration from the .env file and the environment (environment wins)"""
+    try:
+        from dotenv import dotenv_values
+        config = {k: v for k, v in dotenv_values().items() if v is not None}
+    except ImportError:
+        config = {}
+    config.update(os.environ)
+    return config
+
+
+@lru_cache(maxsize=None)
+def get_groq_client():
+    """Construct the shared Groq client on first request"""
+    api_key = get_config().get("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY environment variable is not set. Please set it with your Groq API key.")
+    from groq import Groq
+    # GROQ_BASE_URL points the client at a stand-in server for offline load tests
+    return Groq(api_key=api_key, base_url=get_config().get("GROQ_BASE_URL") or None)
+
+def parse_salary_range(salary_range: str) -> Tuple[Optional[int], Optional[int]]:
+    """Lowest and highest amounts in a salary string such as "$90,000 - $130k" """
+    amounts = [
+        int(float(number) * (1000 if thousands else 1))
+        for number, thousands in re.findall(r'(\d+(?:\.\d+)?)\s*(k\b)?', salary_range.replace(',', '').lower())
+    ]
+    # Small bare numbers are hourly rates or years, not annual salaries
+    amounts = [amount for amount in amounts if amount >= 1000]
+    if not amounts:
+        return None, None
+    return min(amounts), max(amounts)
+
+
+@lru_cache(maxsize=1024)
+def location_tokens(location: str) -> FrozenSet[str]:
+    """Lower-cased words of a location, so "Austin" matches "Austin, TX" """
+    return frozenset(re.findall(r'[a-z0-9]+', location.lower()))
+
+# Number of recommendations rendered per page; more are appended on scroll
+RESULTS_PAGE_SIZE = 50
+
+# Years of experience at which the local resume analysis picks each level
+EXPERIENCE_LEVELS = [(7, "Senior Level"), (3, "Mid Level"), (0, "Entry Level")]
+
+# Profile keys set from the search form; changing only these re-ranks cached postings
+PREFERENCE_KEYS = ("preferred_locations", "minimum_salary", "remote_only")
+
+
+class TextBuffer:
+    """Accumulates text segments with tag names for a single Text.insert call"""
+
+    def __init__(self):
+        self.segments: List = []
+
+    def add(self, text: str, *tags: str):
+        self.segments.append(text)
+        self.segments.append(tags)
+
+    def render(self, widget, index="end"):
+        """Insert everything in one call so Tk lays out the widget only once"""
+        if self.segments:
+            widget.insert(index, *self.segments)
+
+
+def format_recommendation(buffer: TextBuffer, i: int, rec: Dict):
+    """Append the formatted view of one job recommendation to ``buffer``"""
+    job = rec["job"]
+    match_score = rec["match_score"]
+
+    # Add separator between jobs
+    if i > 1:
+        buffer.add(f"\n{'-'*50}\n", "separator")
+
+    # Add job header with match score
+    buffer.add(f"\n{'='*50}\nJob #{i} - Match Score: {match_score:.1f}%\n{'='*50}\n\n", "job_header")
+
+    # Add job details
+    buffer.add(
+        f"🏢 Company: {job.company}\n"
+        f"📋 Title: {job.title}\n"
+        f"📍 Location: {job.location}\n"
+        f"💰 Salary Range: {job.salary_range}\n"
+        f"📅 Posted: {job.posting_date}\n\n"
+    )
+
+    # Add skills section
+    buffer.add("Required Skills:\n", "section")
+    buffer.add("".join(f"  • {skill}\n" for skill in job.required_skills) + "\n", "skill")
+
+    # Add description
+    buffer.add("Description:\n", "section")
+    buffer.add(f"{job.description}\n")
+
+
+class BackgroundRunner:
+    """Runs coroutines on a persistent asyncio loop in a worker thread.
+
+    Tk is not thread-safe, so results are queued by the worker and applied on
+    the main thread from a ``root.after`` poll that runs once per frame.
+    """
+
+    def __init__(self, root, poll_interval_ms: int = 16, frame_budget_ms: float = 8.0):
+        self.root = root
+        self.poll_interval_ms = poll_interval_ms
+        self.frame_budget = frame_budget_ms / 1000
+        self.loop = asyncio.new_event_loop()
+        self._ui_calls = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run_loop, name="job-search-worker", daemon=True)
+        self._thread.start()
+        self._poll_id = self.root.after(self.poll_interval_ms, self._drain_ui_calls)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, on_success=None, on_error=None) -> concurrent.futures.Future:
+        """Schedule a coroutine on the worker loop; callbacks run on the Tk thread"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+        def _on_done(f):
+            if f.cancelled():
+                return
+            error = f.exception()
+            if error is not None:
+                if on_error:
+                    self.call_in_ui(on_error, error)
+            elif on_success:
+                self.call_in_ui(on_success, f.result())
+
+        future.add_done_callback(_on_done)
+        return future
+
+    def call_in_ui(self, func, *args):
+        """Queue ``func(*args)`` to run on the Tk main thread (safe from any thread)"""
+        self._ui_calls.put((func, args))
+
+    def _drain_ui_calls(self):
+        # Apply queued updates but stop once the frame budget is spent so the
+        # window keeps repainting while large result sets stream in
+        deadline = time.perf_counter() + self.frame_budget
+        while time.perf_counter() < deadline:
+            try:
+                func, args = self._ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error applying UI update: {str(e)}")
+        self._poll_id = self.root.after(self.poll_interval_ms, self._drain_ui_calls)
+
+    def shutdown(self):
+        """Stop polling and the worker loop"""
+        self.root.after_cancel(self._poll_id)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1)
+
 
 class JobSearchUI:
     def __init__(self, root):
@@ -41,6 +208,16 @@ class JobSearchUI:
         self.root.title("Job Search Assistant (Powered by Groq)")
         self.root.geometry("1000x800")
         self.assistant = JobSearchAssistant()
+        self.runner = BackgroundRunner(root)
+        self.search_queue = deque()
+        self.active_search = None
+        self.active_label = ""
+        self.search_counter = 0
+        self.streamed_count = 0
+        self.shown_recommendations = []
+        self.rendered_count = 0
+        self.page_pending = False
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Configure style
         self.setup_styles()
@@ -187,9 +364,15 @@ class JobSearchUI:
         self.remote_var = tk.BooleanVar()
         ttk.Checkbutton(pref_frame, text="🏠 Remote Only", variable=self.remote_var).grid(row=4, column=0, columnspan=2, sticky="w", pady=5)
         
-        # Search button
+        # Search and cancel buttons
         search_button = ttk.Button(left_panel, text="🔍 Search Jobs", command=self.search_jobs, style="Primary.TButton")
-        search_button.grid(row=3, column=0, sticky="ew", pady=10)
+        search_button.grid(row=3, column=0, sticky="ew", pady=(10, 5))
+        
+        cancel_button = ttk.Button(left_panel, text="✖ Cancel Search", command=self.cancel_search, style="Secondary.TButton")
+        cancel_button.grid(row=4, column=0, sticky="ew", pady=(0, 5))
+        
+        self.status_var = tk.StringVar(value="Ready")
+        ttk.Label(left_panel, textvariable=self.status_var, style="Subtitle.TLabel").grid(row=5, column=0, sticky="w")
         
         # Right panel (Results)
         right_panel = ttk.Frame(main_frame, style="Card.TFrame")
@@ -212,27 +395,33 @@ class JobSearchUI:
         
         scrollbar = ttk.Scrollbar(results_frame, orient="vertical", command=self.results_text.yview)
         scrollbar.grid(row=0, column=1, sticky="ns")
-        self.results_text.configure(yscrollcommand=scrollbar.set)
+        self.results_scrollbar = scrollbar
+        self.results_text.configure(yscrollcommand=self.on_results_scroll)
+        
+        # Tags used by the batched renderer
+        for widget in (self.results_text, self.profile_text):
+            widget.tag_configure("job_header", font=("Helvetica", 10, "bold"), foreground=self.accent_color)
+            widget.tag_configure("section", font=("Helvetica", 10, "bold"))
+            widget.tag_configure("separator", foreground=self.secondary_color)
+            widget.tag_configure("skill", lmargin1=10, lmargin2=20)
         
     def update_profile_display(self):
         """Update the profile display with current user profile information"""
-        self.profile_text.configure(state="normal")
-        self.profile_text.delete(1.0, tk.END)
-        
+        buffer = TextBuffer()
         if not self.assistant.user_profile:
-            self.profile_text.insert(tk.END, "No profile information available.\nPlease upload a resume to see your profile details.")
+            buffer.add("No profile information available.\nPlease upload a resume to see your profile details.")
         else:
-            self.profile_text.insert(tk.END, "📊 Experience Level: " + self.assistant.user_profile["experience_level"] + "\n\n")
-            
-            self.profile_text.insert(tk.END, "🎯 Skills:\n")
-            for skill in self.assistant.user_profile["skills"]:
-                self.profile_text.insert(tk.END, f"  • {skill}\n")
+            buffer.add("📊 Experience Level: " + self.assistant.user_profile["experience_level"] + "\n\n")
+            buffer.add("🎯 Skills:\n", "section")
+            buffer.add("".join(f"  • {skill}\n" for skill in self.assistant.user_profile["skills"]), "skill")
             
             if self.assistant.user_profile["achievements"]:
-                self.profile_text.insert(tk.END, "\n🏆 Key Achievements:\n")
-                for achievement in self.assistant.user_profile["achievements"]:
-                    self.profile_text.insert(tk.END, f"  • {achievement}\n")
+                buffer.add("\n🏆 Key Achievements:\n", "section")
+                buffer.add("".join(f"  • {achievement}\n" for achievement in self.assistant.user_profile["achievements"]))
         
+        self.profile_text.configure(state="normal")
+        self.profile_text.delete(1.0, tk.END)
+        buffer.render(self.profile_text)
         self.profile_text.configure(state="disabled")
         
     def browse_resume(self):
@@ -242,58 +431,46 @@ class JobSearchUI:
             filetypes=[("PDF files", "*.pdf")]
         )
         if file_path:
-            try:
-                self.resume_path_var.set(file_path)
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, "Analyzing resume... Please wait.\n")
-                self.root.update()
-                
-                # Initialize preferences
-                preferences = {
-                    "preferred_locations": [],
-                    "minimum_salary": 0,
-                    "remote_only": False
-                }
-                
-                # Update assistant with resume and preferences
-                resume_path = self.resume_path_var.get()
-                if resume_path:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(self.assistant.update_user_profile(resume_path, preferences))
-                    loop.close()
-                    
-                    # Show the extracted information
-                    self.results_text.delete(1.0, tk.END)
-                    self.results_text.insert(tk.END, "Resume Analysis Results:\n\n")
-                    self.results_text.insert(tk.END, f"Experience Level: {self.assistant.user_profile['experience_level']}\n\n")
-                    
-                    self.results_text.insert(tk.END, "Skills:\n")
-                    for skill in self.assistant.user_profile['skills']:
-                        self.results_text.insert(tk.END, f"- {skill}\n")
-                    self.results_text.insert(tk.END, "\n")
-                    
-                    self.results_text.insert(tk.END, "Key Achievements:\n")
-                    for achievement in self.assistant.user_profile['achievements']:
-                        self.results_text.insert(tk.END, f"- {achievement}\n")
-                    
-                else:
-                    self.assistant.user_profile = {
-                        "skills": [],
-                        "experience_level": "Entry Level",
-                        "achievements": [],
-                        "preferred_locations": [],
-                        "minimum_salary": 0,
-                        "remote_only": False
-                    }
-                    self.results_text.delete(1.0, tk.END)
-                    self.results_text.insert(tk.END, "No resume selected. Using default profile.\n")
-                
-                self.update_profile_display()
-                
-            except Exception as e:
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, f"Error processing resume: {str(e)}\n")
+            self.resume_path_var.set(file_path)
+            self.results_text.delete(1.0, tk.END)
+            self.results_text.insert(tk.END, "Analyzing resume... Please wait.\n")
+            self.status_var.set("Analyzing resume...")
+            
+            # Initialize preferences
+            preferences = {
+                "preferred_locations": [],
+                "minimum_salary": 0,
+                "remote_only": False
+            }
+            
+            # Analyze on the worker loop; the window stays responsive meanwhile
+            self.runner.submit(
+                self.assistant.update_user_profile(file_path, preferences),
+                on_success=lambda _: self.show_resume_analysis(),
+                on_error=self.show_resume_error
+            )
+    
+    def show_resume_analysis(self):
+        """Show the extracted resume information"""
+        profile = self.assistant.user_profile
+        buffer = TextBuffer()
+        buffer.add("Resume Analysis Results:\n\n", "section")
+        buffer.add(f"Experience Level: {profile['experience_level']}\n\n")
+        buffer.add("Skills:\n", "section")
+        buffer.add("".join(f"- {skill}\n" for skill in profile['skills']) + "\n")
+        buffer.add("Key Achievements:\n", "section")
+        buffer.add("".join(f"- {achievement}\n" for achievement in profile['achievements']))
+        
+        self.results_text.delete(1.0, tk.END)
+        buffer.render(self.results_text)
+        
+        self.update_profile_display()
+        self.status_var.set("Ready")
+    
+    def show_resume_error(self, error):
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, f"Error processing resume: {str(error)}\n")
+        self.status_var.set("Ready")
                 
     def search_jobs(self):
         try:
@@ -304,189 +481,325 @@ class JobSearchUI:
                 "minimum_salary": int(self.min_salary_var.get()) if self.min_salary_var.get().strip() else 0,
                 "remote_only": self.remote_var.get()
             }
-            
-            if not preferences["job_search"]:
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, "Please enter a job title to search for.\n")
-                return
-                
+        except ValueError as e:
             self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, "Searching for jobs... Please wait.\n")
-            self.root.update()
-            
-            # Update the user profile with current preferences
-            if not self.assistant.user_profile:
-                self.assistant.user_profile = {
-                    "skills": [],
-                    "experience_level": "Entry Level",
-                    "achievements": [],
-                    "preferred_locations": preferences["preferred_locations"],
-                    "minimum_salary": preferences["minimum_salary"],
-                    "remote_only": preferences["remote_only"]
-                }
-                self.update_profile_display()
-            
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            recommendations = loop.run_until_complete(self.assistant.get_job_recommendations_groq(preferences["job_search"]))
-            loop.close()
+            self.results_text.insert(tk.END, f"Invalid input: {str(e)}\n")
+            return
             
-            if not recommendations:
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, "No job postings found. Please try a different search term.\n")
-                return
-                
+        if not preferences["job_search"]:
+            self.results_text.delete(1.0, tk.END)
+            self.results_text.insert(tk.END, "Please enter a job title to search for.\n")
+            return
+        
+        # Searches submitted while one is running wait their turn
+        self.search_queue.append(preferences)
+        if self.active_search is None:
+            self.start_next_search()
+        else:
+            self.update_status()
+    
+    def start_next_search(self):
+        """Start the next queued search, if any"""
+        if not self.search_queue:
+            self.active_search = None
+            self.update_status()
+            return
+        
+        preferences = self.search_queue.popleft()
+        self.search_counter += 1
+        search_id = self.search_counter
+        self.streamed_count = 0
+        
+        # Update the user profile with current preferences
+        had_profile = bool(self.assistant.user_profile)
+        self.assistant.set_preferences(preferences)
+        if not had_profile:
+            self.update_profile_display()
+        
+        # Same job search as a recent one: only the preferences changed, so re-rank without refetching
+        cached = self.assistant.cached_jobs(preferences["job_search"])
+        if cached is not None:
+            recommendations = self.assistant.rank_jobs(cached)
             self.display_recommendations(recommendations)
-            
-        except ValueError as e:
+            self.active_search = None
+            self.start_next_search()
+            return
+        
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, f"Searching for '{preferences['job_search']}'... Please wait.\n")
+        
+        self.active_search = (search_id, self.runner.submit(
+            self.stream_search(search_id, preferences["job_search"]),
+            on_success=lambda recommendations: self.finish_search(search_id, recommendations),
+            on_error=lambda error: self.fail_search(search_id, error)
+        ))
+        self.active_label = preferences["job_search"]
+        self.update_status()
+    
+    async def stream_search(self, search_id: int, job_search: str) -> List[Dict]:
+        """Runs on the worker loop, forwarding each posting to the UI as it is scored"""
+        recommendations = []
+        async for rec in self.assistant.iter_job_recommendations(job_search):
+            recommendations.append(rec)
+            self.runner.call_in_ui(self.show_streamed_recommendation, search_id, rec)
+        recommendations.sort(key=lambda x: x["match_score"], reverse=True)
+        return recommendations
+    
+    def show_streamed_recommendation(self, search_id: int, rec: Dict):
+        if self.active_search is None or self.active_search[0] != search_id:
+            return  # Late update from a cancelled search
+        if self.streamed_count == 0:
             self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, f"Invalid input: {str(e)}\n")
-        except Exception as e:
+        self.streamed_count += 1
+        self.insert_recommendation(self.streamed_count, rec)
+    
+    def finish_search(self, search_id: int, recommendations: List[Dict]):
+        if self.active_search is None or self.active_search[0] != search_id:
+            return
+        if not recommendations:
             self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, f"Error searching for jobs: {str(e)}\n")
+            self.results_text.insert(tk.END, "No job postings found. Please try a different search term.\n")
+        else:
+            # Re-render in ranked order now that every posting has arrived
+            self.display_recommendations(recommendations)
+        self.start_next_search()
+    
+    def fail_search(self, search_id: int, error: Exception):
+        if self.active_search is None or self.active_search[0] != search_id:
+            return
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, f"Error searching for jobs: {str(error)}\n")
+        self.start_next_search()
+    
+    def cancel_search(self):
+        """Cancel the in-flight search; queued searches continue afterwards"""
+        if self.active_search is None:
+            return
+        _, future = self.active_search
+        future.cancel()
+        self.active_search = None
+        self.results_text.insert(tk.END, "\nSearch cancelled.\n")
+        self.start_next_search()
+    
+    def update_status(self):
+        if self.active_search is None:
+            status = "Ready"
+        else:
+            status = f"Searching: {self.active_label}"
+            if self.search_queue:
+                status += f" ({len(self.search_queue)} queued)"
+        self.status_var.set(status)
+    
+    def on_close(self):
+        if self.active_search is not None:
+            self.active_search[1].cancel()
+        self.runner.shutdown()
+        self.root.destroy()
             
     def display_recommendations(self, recommendations):
-        """Display job recommendations with improved formatting"""
+        """Display job recommendations, rendering the first page immediately"""
         self.results_text.delete(1.0, tk.END)
+        self.shown_recommendations = recommendations
+        self.rendered_count = 0
         
         if not recommendations:
             self.results_text.insert(tk.END, "No matching jobs found. Try adjusting your search criteria.\n")
             return
-            
-        for i, rec in enumerate(recommendations, 1):
-            job = rec["job"]
-            match_score = rec["match_score"]
-            
-            # Add job header with match score
-            self.results_text.insert(tk.END, f"\n{'='*50}\n")
-            self.results_text.insert(tk.END, f"Job #{i} - Match Score: {match_score:.1f}%\n")
-            self.results_text.insert(tk.END, f"{'='*50}\n\n")
-            
-            # Add job details
-            self.results_text.insert(tk.END, f"🏢 Company: {job.company}\n")
-            self.results_text.insert(tk.END, f"📋 Title: {job.title}\n")
-            self.results_text.insert(tk.END, f"📍 Location: {job.location}\n")
-            self.results_text.insert(tk.END, f"💰 Salary Range: {job.salary_range}\n")
-            self.results_text.insert(tk.END, f"📅 Posted: {job.posting_date}\n\n")
-            
-            # Add skills section
-            self.results_text.insert(tk.END, "Required Skills:\n")
-            for skill in job.required_skills:
-                self.results_text.insert(tk.END, f"  • {skill}\n")
-            self.results_text.insert(tk.END, "\n")
-            
-            # Add description
-            self.results_text.insert(tk.END, "Description:\n")
-            self.results_text.insert(tk.END, f"{job.description}\n")
-            
-            # Add separator between jobs
-            if i < len(recommendations):
-                self.results_text.insert(tk.END, f"\n{'-'*50}\n")
+        
+        self.render_next_page()
+    
+    def render_next_page(self):
+        """Append the next page of recommendations in a single insert"""
+        self.page_pending = False
+        recommendations = self.shown_recommendations
+        start = self.rendered_count
+        end = min(start + RESULTS_PAGE_SIZE, len(recommendations))
+        if start >= end:
+            return
+        
+        buffer = TextBuffer()
+        for i in range(start, end):
+            format_recommendation(buffer, i + 1, recommendations[i])
+        buffer.render(self.results_text)
+        self.rendered_count = end
+    
+    def on_results_scroll(self, first, last):
+        """Scrollbar hook: load more results when the view nears the end"""
+        self.results_scrollbar.set(first, last)
+        if (float(last) > 0.9 and not self.page_pending
+                and self.rendered_count < len(self.shown_recommendations)):
+            self.page_pending = True
+            self.root.after_idle(self.render_next_page)
+    
+    def insert_recommendation(self, i: int, rec: Dict):
+        """Append one job recommendation to the results view"""
+        buffer = TextBuffer()
+        format_recommendation(buffer, i, rec)
+        buffer.render(self.results_text)
 
 class JobSearchAssistant:
-    def __init__(self):
+    def __init__(self, llm_client=None, resume_analysis: Optional[str] = None):
         self.job_database: List[JobPosting] = []
         self.user_profile = {}
-        self.vectorizer = TfidfVectorizer(stop_words='english')
+        self._vectorizer = None
+        self._llm_client = llm_client
+        # "local" (taxonomy scan, no API call) or "llm" (Groq analysis)
+        self.resume_analysis = (resume_analysis or get_config().get("RESUME_ANALYSIS") or "local").lower()
+        # Normalized job search -> (fetch time, postings); reused until RESULTS_TTL seconds pass
+        self.results_ttl = float(get_config().get("RESULTS_TTL", 900))
+        self._result_sets: Dict[str, Tuple[float, List[JobPosting]]] = {}
+        # Read on the Tk thread, written on the BackgroundRunner worker
+        self._result_sets_lock = threading.Lock()
+        self._job_flight = None
 
-    async def fetch_jobs_from_groq(self, job_search: str) -> List[JobPosting]:
-        """Fetch job postings using Groq API"""
-        try:
-            prompt = f"""
-            Generate 5 detailed job postings for the position: {job_search}
-            
-            Please format your response EXACTLY as a JSON array of job objects with the following structure:
-            [
-                {{
-                    "title": "Job Title",
-                    "company": "Company Name",
-                    "location": "City, State or Remote",
-                    "description": "Detailed job description...",
-                    "required_skills": ["skill1", "skill2", "skill3"],
-                    "salary_range": "$X0,000 - $Y0,000",
-                    "posting_date": "YYYY-MM-DD"
-                }},
-                // ... more job objects
-            ]
-
-            Requirements:
-            1. Each job must have ALL the fields mentioned above
-            2. required_skills must be a list of strings
-            3. salary_range should be in the format "$X0,000 - $Y0,000"
-            4. posting_date should be within the last week
-            5. Include some remote positions
-            6. Make descriptions detailed but concise
-            
-            Return ONLY the JSON array, no additional text.
-            """
-            
-            loop = asyncio.get_event_loop()
-            completion = await loop.run_in_executor(None, lambda: groq_client.chat.completions.create(
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }],
-                model="mixtral-8x7b-32768",
-                temperature=0.7,
-                max_tokens=4000
-            ))
-            
-            response_text = completion.choices[0].message.content
-            # Clean the response text to ensure it's valid JSON
-            response_text = response_text.strip()
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-            
+    @property
+    def vectorizer(self):
+        """TF-IDF vectorizer, built on first use to keep sklearn off the startup path"""
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._vectorizer = TfidfVectorizer(stop_words='english')
+        return self._vectorizer
+
+    @property
+    def job_flight(self):
+        """Shares one completion between identical job searches in flight at once.
+
+        The scraping bot's ``SingleFlight`` is imported on first use, as it
+        pulls in aiohttp; its calls are counted in the scraper's metrics.
+        """
+        if self._job_flight is None:
+            if str(SCRAPER_DIR) not in sys.path:
+                # Appended, so this app's own modules (schemas) take precedence
+                sys.path.append(str(SCRAPER_DIR))
+            from single_flight import SingleFlight
+            self._job_flight = SingleFlight("jobs")
+        return self._job_flight
+
+    @property
+    def skills(self) -> SkillTaxonomy:
+        """Skill taxonomy, extended with the JSON file named by SKILLS_FILE if set"""
+        return default_taxonomy(get_config().get("SKILLS_FILE") or None)
+
+    @property
+    def llm_client(self):
+        """Client used for completions; defaults to the shared Groq client"""
+        return self._llm_client or get_groq_client()
+
+    def _job_search_prompt(self, job_search: str) -> str:
+        """Prompt asking Groq for job postings as a JSON array"""
+        return f"""
+        Generate 5 detailed job postings for the position: {job_search}
+        
+        Please format your response EXACTLY as a JSON array of job objects with the following structure:
+        [
+            {{
+                "title": "Job Title",
+                "company": "Company Name",
+                "location": "City, State or Remote",
+                "description": "Detailed job description...",
+                "required_skills": ["skill1", "skill2", "skill3"],
+                "salary_range": "$X0,000 - $Y0,000",
+                "posting_date": "YYYY-MM-DD"
+            }},
+            // ... more job objects
+        ]
+
+        Requirements:
+        1. Each job must have ALL the fields mentioned above
+        2. required_skills must be a list of strings
+        3. salary_range should be in the format "$X0,000 - $Y0,000"
+        4. posting_date should be within the last week
+        5. Include some remote positions
+        6. Make descriptions detailed but concise
+        
+        Return ONLY the JSON array, no additional text.
+        """
+
+    async def stream_jobs_from_groq(self, job_search: str):
+        """Yield job postings from a streamed Groq completion as each object closes"""
+        prompt = self._job_search_prompt(job_search)
+        client = self.llm_client
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        end_of_stream = object()
+
+        def forward(item):
             try:
-                jobs_data = json.loads(response_text)
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON: {str(e)}")
-                print(f"Raw response: {response_text}")
-                raise Exception("Failed to parse Groq API response")
-            
-            if not isinstance(jobs_data, list):
-                raise Exception("API response is not a list of jobs")
-            
-            job_postings = []
-            for job in jobs_data:
-                # Ensure all required fields are present with default values if missing
-                processed_job = {
-                    "title": job.get("title", "Untitled Position"),
-                    "company": job.get("company", "Unknown Company"),
-                    "location": job.get("location", "Location Not Specified"),
-                    "description": job.get("description", "No description available"),
-                    "required_skills": job.get("required_skills", []),
-                    "salary_range": job.get("salary_range", "Salary Not Specified"),
-                    "posting_date": job.get("posting_date", datetime.now().strftime("%Y-%m-%d"))
-                }
-                
-                # Ensure required_skills is a list
-                if not isinstance(processed_job["required_skills"], list):
-                    if isinstance(processed_job["required_skills"], str):
-                        processed_job["required_skills"] = [skill.strip() for skill in processed_job["required_skills"].split(",")]
-                    else:
-                        processed_job["required_skills"] = []
-                
-                posting = JobPosting(
-                    title=processed_job["title"],
-                    company=processed_job["company"],
-                    location=processed_job["location"],
-                    description=processed_job["description"],
-                    required_skills=processed_job["required_skills"],
-                    salary_range=processed_job["salary_range"],
-                    posting_date=processed_job["posting_date"]
+                loop.call_soon_threadsafe(chunks.put_nowait, item)
+            except RuntimeError:
+                stop.set()  # Consumer's loop is gone
+
+        def produce():
+            # Runs in a worker thread: the Groq SDK stream is a blocking iterator
+            try:
+                stream = client.chat.completions.create(
+                    messages=[{
+                        "role": "user",
+                        "content": prompt
+                    }],
+                    model="mixtral-8x7b-32768",
+                    temperature=0.7,
+                    max_tokens=4000,
+                    stream=True
                 )
+                try:
+                    for chunk in stream:
+                        if stop.is_set():
+                            break
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            forward(delta)
+                finally:
+                    close = getattr(stream, "close", None)
+                    if close:
+                        close()
+            except Exception as e:
+                forward(e)
+            finally:
+                forward(end_of_stream)
+
+        loop.run_in_executor(None, produce)
+        # Each job object is decoded and validated into a JobPosting as it closes
+        parser = JSONArrayStreamParser(decode=decode_job)
+        try:
+            while True:
+                item = await chunks.get()
+                if item is end_of_stream:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                for job in parser.feed(item):
+                    yield job
+        finally:
+            stop.set()
+
+        if not parser.finished:
+            print("Groq response ended before the job array was closed; kept the complete postings")
+        if parser.errors:
+            print(f"Skipped {parser.errors} malformed or invalid job objects in Groq response")
+
+    async def fetch_jobs_from_groq(self, job_search: str) -> List[JobPosting]:
+        """Fetch job postings using Groq API; concurrent identical searches share one call"""
+        key = " ".join(job_search.lower().split())
+        job_postings = await self.job_flight.do_async(key, lambda: self._fetch_jobs(job_search))
+        return list(job_postings)
+
+    async def _fetch_jobs(self, job_search: str, on_posting=None) -> List[JobPosting]:
+        """Stream a search into a list, passing each posting to ``on_posting`` as it arrives"""
+        job_postings = []
+        try:
+            async for posting in self.stream_jobs_from_groq(job_search):
                 job_postings.append(posting)
-            
-            return job_postings
-            
+                if on_posting is not None:
+                    on_posting(posting)
         except Exception as e:
             print(f"Full error in fetch_jobs_from_groq: {str(e)}")
-            # Return an empty list instead of raising an exception
-            return []
+            # Postings completed before an error are still returned, but not cached
+            return job_postings
+        if job_postings:
+            self._cache_jobs(job_search, job_postings)
+        return job_postings
 
     def extract_text_from_resume(self, resume_path: str) -> str:
         """Extract text content from a PDF resume"""
@@ -527,7 +840,7 @@ class JobSearchAssistant:
             """
             
             loop = asyncio.get_event_loop()
-            completion = await loop.run_in_executor(None, lambda: groq_client.chat.completions.create(
+            completion = await loop.run_in_executor(None, lambda: self.llm_client.chat.completions.create(
                 messages=[{
                     "role": "user",
                     "content": prompt
@@ -546,33 +859,19 @@ class JobSearchAssistant:
                 response_text = response_text[:-3]
             response_text = response_text.strip()
             
+            # Validated against ResumeAnalysis; missing fields get their defaults
             try:
-                analysis = json.loads(response_text)
-            except json.JSONDecodeError as e:
+                analysis = decode_resume_analysis(response_text)
+            except SchemaError as e:
                 print(f"Error decoding JSON: {str(e)}")
                 print(f"Raw response: {response_text}")
                 raise Exception("Failed to parse Groq API response")
             
-            # Ensure all required fields are present
-            if "skills" not in analysis:
-                analysis["skills"] = {"technical": [], "soft": []}
-            if "experience_level" not in analysis:
-                analysis["experience_level"] = "Entry Level"
-            if "achievements" not in analysis:
-                analysis["achievements"] = []
-                
             # Combine technical and soft skills
-            all_skills = []
-            if isinstance(analysis["skills"], dict):
-                all_skills.extend(analysis["skills"].get("technical", []))
-                all_skills.extend(analysis["skills"].get("soft", []))
-            elif isinstance(analysis["skills"], list):
-                all_skills = analysis["skills"]
-            
             return {
-                "skills": all_skills,
-                "experience_level": analysis["experience_level"],
-                "achievements": analysis["achievements"]
+                "skills": analysis.all_skills,
+                "experience_level": analysis.experience_level,
+                "achievements": analysis.achievements
             }
             
         except Exception as e:
@@ -583,13 +882,36 @@ class JobSearchAssistant:
                 "achievements": []
             }
 
+    def analyze_resume_locally(self, resume_text: str) -> Dict:
+        """Analyze a resume without an API call: taxonomy skills, years of experience, bullets with numbers"""
+        skill_ids = self.skills.extract(resume_text)
+        years = [int(y) for y in re.findall(r'(\d+)\+?\s+years', resume_text.lower())]
+        most_years = max(years, default=0)
+        experience_level = next(level for min_years, level in EXPERIENCE_LEVELS if most_years >= min_years)
+        achievements = [
+            line.strip(" \t•*-–") for line in resume_text.splitlines()
+            if re.match(r'\s*[•*\-–]', line) and re.search(r'\d', line)
+        ][:5]
+        return {
+            "skills": self.skills.names_of(skill_ids),
+            "skill_ids": skill_ids,
+            "experience_level": experience_level,
+            "achievements": achievements
+        }
+
     async def update_user_profile(self, resume_path: str, preferences: Dict):
         """Update user profile with resume analysis and preferences"""
         resume_text = self.extract_text_from_resume(resume_path)
-        resume_analysis = await self.analyze_resume_with_groq(resume_text)
-        
+        resume_analysis = self.analyze_resume_locally(resume_text)
+        if self.resume_analysis == "llm":
+            # Keep the local skills too: the LLM often omits or renames some
+            llm_analysis = await self.analyze_resume_with_groq(resume_text)
+            skill_ids = resume_analysis["skill_ids"] | self.skills.ids_of(llm_analysis["skills"])
+            resume_analysis = dict(llm_analysis, skill_ids=skill_ids, skills=self.skills.names_of(skill_ids))
+
         self.user_profile = {
             "skills": resume_analysis["skills"],
+            "skill_ids": resume_analysis["skill_ids"],
             "experience_level": resume_analysis["experience_level"],
             "achievements": resume_analysis.get("achievements", []),
             "preferred_locations": preferences.get("preferred_locations", []),
@@ -597,6 +919,41 @@ class JobSearchAssistant:
             "remote_only": preferences.get("remote_only", False)
         }
 
+    def job_features(self, job: JobPosting) -> JobFeatures:
+        """Parsed salary, location and skills of a posting, computed on first use"""
+        if job.features is None:
+            if job.required_skills:
+                skill_ids = self.skills.ids_of(job.required_skills)
+            else:
+                skill_ids = self.skills.extract(f"{job.title}\n{job.description}")
+            tokens = location_tokens(job.location)
+            salary_min, salary_max = parse_salary_range(job.salary_range)
+            job.features = JobFeatures(
+                salary_min=salary_min,
+                salary_max=salary_max,
+                location_tokens=tokens,
+                remote="remote" in tokens,
+                skill_ids=skill_ids
+            )
+        return job.features
+
+    def set_preferences(self, preferences: Dict):
+        """Apply search-form preferences to the profile, creating an empty one if needed"""
+        if not self.user_profile:
+            self.user_profile = {"skills": [], "experience_level": "Entry Level", "achievements": []}
+        for key in PREFERENCE_KEYS:
+            if key in preferences:
+                self.user_profile[key] = preferences[key]
+
+    def matches_filters(self, job: JobPosting) -> bool:
+        """Hard constraints: remote only, and a salary range that reaches the minimum"""
+        features = self.job_features(job)
+        if self.user_profile.get("remote_only") and not features.remote:
+            return False
+        minimum = self.user_profile.get("minimum_salary", 0)
+        # Postings without a salary are kept; they just score lower
+        return not (minimum and features.salary_max is not None and features.salary_max < minimum)
+
     def calculate_job_match_score(self, job: JobPosting) -> float:
         """Calculate match score between user profile and job posting"""
         if not self.user_profile:
@@ -605,54 +962,107 @@ class JobSearchAssistant:
         score = 0.0
         max_score = 100.0
 
-        # Skills match (40% of total score)
-        user_skills = set(skill.lower() for skill in self.user_profile["skills"])
-        job_skills = set(skill.lower() for skill in job.required_skills)
-        if user_skills and job_skills:
-            skills_match = len(user_skills.intersection(job_skills)) / len(job_skills)
+        features = self.job_features(job)
+
+        # Skills match (40% of total score), on canonical IDs so "JS" matches "JavaScript"
+        user_skills = self.user_profile.get("skill_ids")
+        if user_skills is None:
+            user_skills = self.user_profile["skill_ids"] = self.skills.ids_of(self.user_profile["skills"])
+        if user_skills and features.skill_ids:
+            skills_match = len(user_skills & features.skill_ids) / len(features.skill_ids)
             score += skills_match * 40
 
         # Location match (30% of total score)
-        if self.user_profile["remote_only"] and "remote" in job.location.lower():
+        if self.user_profile["remote_only"] and features.remote:
             score += 30
-        elif any(loc.lower() in job.location.lower() for loc in self.user_profile["preferred_locations"]):
+        elif any(location_tokens(loc) <= features.location_tokens
+                 for loc in self.user_profile["preferred_locations"] if loc.strip()):
             score += 30
 
         # Salary match (30% of total score)
-        try:
-            salary_text = re.findall(r'\d+', job.salary_range.replace(',', ''))
-            if salary_text:
-                min_salary = int(salary_text[0])
-                if min_salary >= self.user_profile["minimum_salary"]:
-                    score += 30
-        except:
-            pass
+        if features.salary_min is not None and features.salary_min >= self.user_profile["minimum_salary"]:
+            score += 30
 
         return min(score, max_score)
 
+    def cached_jobs(self, job_search: str) -> Optional[List[JobPosting]]:
+        """Postings fetched for this job search within RESULTS_TTL, or None"""
+        key = " ".join(job_search.lower().split())
+        with self._result_sets_lock:
+            entry = self._result_sets.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.results_ttl:
+                del self._result_sets[key]
+                return None
+            return entry[1]
+
+    def _cache_jobs(self, job_search: str, jobs: List[JobPosting]):
+        now = time.monotonic()
+        with self._result_sets_lock:
+            for key in [key for key, (fetched, _) in self._result_sets.items() if now - fetched > self.results_ttl]:
+                del self._result_sets[key]
+            self._result_sets[" ".join(job_search.lower().split())] = (now, jobs)
+
+    def rank_jobs(self, jobs: List[JobPosting]) -> List[Dict]:
+        """Filter and score postings against the current profile, best first"""
+        recommendations = [
+            {"job": job, "match_score": self.calculate_job_match_score(job)}
+            for job in jobs if self.matches_filters(job)
+        ]
+        recommendations.sort(key=lambda x: x["match_score"], reverse=True)
+        return recommendations
+
+    async def iter_job_recommendations(self, job_search: str):
+        """Yield recommendation dicts one posting at a time as they are scored.
+
+        Goes through ``job_flight`` like ``fetch_jobs_from_groq``: the search
+        that starts the completion streams its postings as they arrive, and
+        identical searches started meanwhile replay the finished list.
+        """
+        key = " ".join(job_search.lower().split())
+        streamed: asyncio.Queue = asyncio.Queue()
+        # Only the leader's factory runs, so only the leader's queue is fed
+        flight = asyncio.ensure_future(self.job_flight.do_async(
+            key, lambda: self._fetch_jobs(job_search, streamed.put_nowait)))
+        yielded = 0
+        try:
+            while not flight.done():
+                next_posting = asyncio.ensure_future(streamed.get())
+                await asyncio.wait((next_posting, flight), return_when=asyncio.FIRST_COMPLETED)
+                if not next_posting.done():
+                    next_posting.cancel()
+                    break
+                yielded += 1
+                job = next_posting.result()
+                if self.matches_filters(job):
+                    yield {"job": job, "match_score": self.calculate_job_match_score(job)}
+            jobs = flight.result()
+        except Exception as e:
+            print(f"Full error in iter_job_recommendations: {str(e)}")
+            return
+        finally:
+            # Only this caller's wait is cancelled; the shared completion keeps running
+            flight.cancel()
+        # Postings not streamed to this caller: all of them for a follower
+        for job in jobs[yielded:]:
+            if self.matches_filters(job):
+                yield {"job": job, "match_score": self.calculate_job_match_score(job)}
+
     async def get_job_recommendations_groq(self, job_search: str) -> List[Dict]:
         """Get personalized job recommendations using Groq"""
         try:
-            # Fetch jobs using Groq
-            job_postings = await self.fetch_jobs_from_groq(job_search)
-            
-            # Calculate match scores
-            recommendations = []
-            for job in job_postings:
-                match_score = self.calculate_job_match_score(job)
-                recommendations.append({
-                    "job": job,
-                    "match_score": match_score
-                })
-
-            # Sort by match score
-            recommendations.sort(key=lambda x: x["match_score"], reverse=True)
-            return recommendations
+            jobs = self.cached_jobs(job_search)
+            if jobs is None:
+                # Fetch jobs using Groq; match scores are calculated by rank_jobs
+                jobs = await self.fetch_jobs_from_groq(job_search)
+            return self.rank_jobs(jobs)
             
         except Exception as e:
             raise Exception(f"Error getting job recommendations: {str(e)}")
 
 def main():
+    get_groq_client()
     root = tk.Tk()
     app = JobSearchUI(root)
     root.mainloop()
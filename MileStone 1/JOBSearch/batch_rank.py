@@ -0,0 +1,242 @@
+"""Headless batch ranking of resumes against a job corpus.
+
+Scores every resume PDF in a directory against every posting in a JSONL or
+CSV corpus using ``JobSearchAssistant`` in a pool of worker processes, and
+writes the ranked matches to a JSONL or CSV results file.
+
+Example:
+    python batch_rank.py resumes/ jobs.jsonl -o ranked.jsonl --workers 4
+    python batch_rank.py resumes/ jobs.csv -o ranked.csv --resume-analysis llm --mock-llm
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from JobSearchAI import JobPosting, JobSearchAssistant, get_config
+from schemas import decode_job, encode, job_from_dict
+
+# Populated once per worker process by _init_worker
+_worker_assistant: Optional[JobSearchAssistant] = None
+_worker_jobs: List[JobPosting] = []
+_worker_top_k: int = 0
+
+
+class MockLLMClient:
+    """Offline stand-in for the Groq client used by ``JobSearchAssistant``.
+
+    Resume analysis prompts are answered by scanning the resume text for the
+    skills that appear in the job corpus, so rankings stay meaningful without
+    network access.
+    """
+
+    def __init__(self, skill_vocabulary: List[str]):
+        self.skill_vocabulary = sorted(set(skill_vocabulary), key=len, reverse=True)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, model=None, **kwargs):
+        prompt = messages[-1]["content"]
+        resume_text = prompt.split("Resume text:", 1)[-1].lower()
+        skills = [
+            skill for skill in self.skill_vocabulary
+            if re.search(r'(?<!\w)' + re.escape(skill.lower()) + r'(?!\w)', resume_text)
+        ]
+        years = [int(y) for y in re.findall(r'(\d+)\+?\s+years', resume_text)]
+        if years and max(years) >= 7:
+            level = "Senior Level"
+        elif years and max(years) >= 3:
+            level = "Mid Level"
+        else:
+            level = "Entry Level"
+        content = json.dumps({
+            "skills": {"technical": skills, "soft": []},
+            "experience_level": level,
+            "achievements": []
+        })
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def load_job_corpus(path: Path) -> List[JobPosting]:
+    """Load job postings from a JSONL or CSV file, skipping rows that don't match the schema"""
+    jobs, rejected = [], 0
+    if path.suffix.lower() == ".csv":
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                # Empty cells fall back to the schema defaults; skills may be separated by , ; or |
+                row = {key: value for key, value in row.items() if key and value}
+                if "required_skills" in row:
+                    row["required_skills"] = [s.strip() for s in re.split(r'[,;|]', row["required_skills"]) if s.strip()]
+                try:
+                    jobs.append(job_from_dict(row))
+                except ValueError:
+                    rejected += 1
+    else:
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        jobs.append(decode_job(line))
+                    except ValueError:
+                        rejected += 1
+    if rejected:
+        print(f"Skipped {rejected} invalid job postings in {path}", file=sys.stderr)
+    return jobs
+
+
+def _init_worker(corpus_path: str, preferences: Dict, mock_llm: bool, top_k: int, resume_analysis: str):
+    """Load the corpus and build one assistant per worker process"""
+    global _worker_assistant, _worker_jobs, _worker_top_k
+    _worker_jobs = load_job_corpus(Path(corpus_path))
+    _worker_top_k = top_k
+    client = None
+    if mock_llm:
+        client = MockLLMClient([skill for job in _worker_jobs for skill in job.required_skills])
+    _worker_assistant = JobSearchAssistant(llm_client=client, resume_analysis=resume_analysis)
+    _worker_assistant.user_profile = dict(preferences)
+
+
+def _rank_resume(resume_path: str) -> Dict:
+    """Build a profile for one resume and score it against the whole corpus"""
+    assistant = _worker_assistant
+    preferences = {
+        "preferred_locations": assistant.user_profile.get("preferred_locations", []),
+        "minimum_salary": assistant.user_profile.get("minimum_salary", 0),
+        "remote_only": assistant.user_profile.get("remote_only", False)
+    }
+    asyncio.run(assistant.update_user_profile(resume_path, preferences))
+
+    scored = [(assistant.calculate_job_match_score(job), index) for index, job in enumerate(_worker_jobs)]
+    scored.sort(key=lambda item: item[0], reverse=True)
+    if _worker_top_k:
+        scored = scored[:_worker_top_k]
+
+    return {
+        "resume": os.path.basename(resume_path),
+        "experience_level": assistant.user_profile["experience_level"],
+        "skills": assistant.user_profile["skills"],
+        "matches": [
+            {
+                "rank": rank,
+                "job_index": index,
+                "title": _worker_jobs[index].title,
+                "company": _worker_jobs[index].company,
+                "location": _worker_jobs[index].location,
+                "match_score": round(score, 2)
+            }
+            for rank, (score, index) in enumerate(scored, 1)
+        ]
+    }
+
+
+def write_results(results: List[Dict], output_path: Path):
+    """Write ranked results as JSONL (one resume per line) or flat CSV"""
+    if output_path.suffix.lower() == ".csv":
+        fieldnames = ["resume", "experience_level", "rank", "job_index", "title",
+                      "company", "location", "match_score"]
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for result in results:
+                for match in result["matches"]:
+                    writer.writerow({
+                        "resume": result["resume"],
+                        "experience_level": result["experience_level"],
+                        **match
+                    })
+    else:
+        with open(output_path, 'wb') as f:
+            for result in results:
+                f.write(encode(result) + b"\n")
+
+
+def run_batch(resume_dir: Path, corpus_path: Path, output_path: Path, workers: int,
+              preferences: Dict, mock_llm: bool = False, top_k: int = 0,
+              resume_analysis: str = "local") -> Dict:
+    """Rank all resumes in parallel and return run statistics"""
+    resume_paths = sorted(str(p) for p in resume_dir.glob("*.pdf"))
+    if not resume_paths:
+        raise ValueError(f"No PDF resumes found in {resume_dir}")
+
+    results, failures = [], []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(str(corpus_path), preferences, mock_llm, top_k, resume_analysis)
+    ) as executor:
+        futures = {executor.submit(_rank_resume, path): path for path in resume_paths}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                failures.append({"resume": os.path.basename(futures[future]), "error": str(e)})
+    elapsed = time.perf_counter() - start
+
+    results.sort(key=lambda result: result["resume"])
+    write_results(results, output_path)
+
+    return {
+        "resumes": len(resume_paths),
+        "ranked": len(results),
+        "failed": failures,
+        "seconds": elapsed,
+        "resumes_per_second": len(results) / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rank a directory of resumes against a job corpus.")
+    parser.add_argument("resume_dir", type=Path, help="Directory containing resume PDFs")
+    parser.add_argument("corpus", type=Path, help="Job corpus file (.jsonl or .csv)")
+    parser.add_argument("-o", "--output", type=Path, default=Path("ranked_results.jsonl"),
+                        help="Results file (.jsonl or .csv)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes")
+    parser.add_argument("-k", "--top-k", type=int, default=0,
+                        help="Keep only the top K matches per resume (0 keeps all)")
+    parser.add_argument("--locations", default="", help="Comma separated preferred locations")
+    parser.add_argument("--min-salary", type=int, default=0, help="Minimum acceptable salary")
+    parser.add_argument("--remote-only", action="store_true", help="Prefer remote positions")
+    parser.add_argument("--resume-analysis", choices=["local", "llm"],
+                        default=(get_config().get("RESUME_ANALYSIS") or "local").lower(),
+                        help="Extract skills locally (default) or also ask the LLM")
+    parser.add_argument("--mock-llm", action="store_true",
+                        help="Answer LLM resume analysis offline instead of calling the Groq API")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    preferences = {
+        "preferred_locations": [loc.strip() for loc in args.locations.split(",") if loc.strip()],
+        "minimum_salary": args.min_salary,
+        "remote_only": args.remote_only
+    }
+    if args.resume_analysis == "llm" and not args.mock_llm and not get_config().get("GROQ_API_KEY"):
+        print("GROQ_API_KEY is not set; pass --mock-llm or use --resume-analysis local.", file=sys.stderr)
+        return 2
+
+    stats = run_batch(args.resume_dir, args.corpus, args.output, args.workers,
+                      preferences, mock_llm=args.mock_llm, top_k=args.top_k,
+                      resume_analysis=args.resume_analysis)
+
+    print(f"Throughput: {stats['resumes_per_second']:.2f} resumes/sec "
+          f"({stats['ranked']}/{stats['resumes']} resumes in {stats['seconds']:.2f}s, "
+          f"{args.workers} workers)")
+    for failure in stats["failed"]:
+        print(f"Failed: {failure['resume']}: {failure['error']}", file=sys.stderr)
+    print(f"Results written to {args.output}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Benchmark for decoding and encoding LLM payloads.
+
+Compares the typed decoders in ``schemas`` (msgspec when installed, else the
+stdlib fallback) with the previous path: ``json.loads`` into dicts, then a
+field-by-field copy with ``.get()`` defaults into ``JobPosting``. Measures a
+job-search array, a JSONL job corpus, a resume analysis, and encoding of
+batch-ranking results.
+
+Example:
+    python benchmarks/bench_decode.py --jobs 5000
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import schemas  # noqa: E402
+from schemas import JobPosting, decode_job, decode_jobs, decode_resume_analysis, encode  # noqa: E402
+
+SKILLS = ["Python", "SQL", "JavaScript", "React", "Docker", "AWS", "Kubernetes", "Communication"]
+
+
+def make_jobs(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(count):
+        job = {
+            "title": f"Software Engineer {i}",
+            "company": f"Company {i % 97}",
+            "location": rng.choice(["Remote", "Austin, TX", "New York, NY"]),
+            "description": "Build and maintain services that power the product. " * 4,
+            "required_skills": rng.sample(SKILLS, 4),
+            "salary_range": "$90,000 - $130,000",
+            "posting_date": "2024-12-20"
+        }
+        if i % 10 == 0:
+            del job["posting_date"]  # defaults are applied
+        jobs.append(job)
+    return jobs
+
+
+def legacy_job(job):
+    """The pre-schema path: a dict of .get() defaults copied into JobPosting"""
+    processed_job = {
+        "title": job.get("title", "Untitled Position"),
+        "company": job.get("company", "Unknown Company"),
+        "location": job.get("location", "Location Not Specified"),
+        "description": job.get("description", "No description available"),
+        "required_skills": job.get("required_skills", []),
+        "salary_range": job.get("salary_range", "Salary Not Specified"),
+        "posting_date": job.get("posting_date", datetime.now().strftime("%Y-%m-%d"))
+    }
+    if not isinstance(processed_job["required_skills"], list):
+        if isinstance(processed_job["required_skills"], str):
+            processed_job["required_skills"] = [skill.strip() for skill in processed_job["required_skills"].split(",")]
+        else:
+            processed_job["required_skills"] = []
+    return JobPosting(
+        title=processed_job["title"],
+        company=processed_job["company"],
+        location=processed_job["location"],
+        description=processed_job["description"],
+        required_skills=processed_job["required_skills"],
+        salary_range=processed_job["salary_range"],
+        posting_date=processed_job["posting_date"]
+    )
+
+
+def time_ms(func, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark typed decoding of LLM payloads.")
+    parser.add_argument("--jobs", type=int, default=5000, help="Job postings per payload")
+    parser.add_argument("--runs", type=int, default=7, help="Samples per measurement")
+    args = parser.parse_args(argv)
+
+    jobs = make_jobs(args.jobs)
+    array_text = json.dumps(jobs)
+    lines = [json.dumps(job).encode("utf-8") for job in jobs]
+    resume_text = json.dumps({"skills": {"technical": SKILLS, "soft": ["Leadership"]},
+                              "experience_level": "Mid Level", "achievements": ["Cut costs by 30%"] * 5})
+    results = [{"resume": f"resume{i}.pdf", "experience_level": "Mid Level", "skills": SKILLS,
+                "matches": [{"rank": r, "job_index": r, "title": f"Job {r}", "company": "Company",
+                             "location": "Remote", "match_score": 71.5} for r in range(1, 21)]}
+               for i in range(args.jobs // 20 or 1)]
+
+    # Sanity check: both paths build equal postings
+    assert decode_jobs(array_text)[0][:50] == [legacy_job(job) for job in jobs[:50]]
+
+    backend = "msgspec" if schemas.backend() == "msgspec" else "stdlib fallback"
+    rows = [
+        ("Job array", lambda: [legacy_job(job) for job in json.loads(array_text)],
+         lambda: decode_jobs(array_text)),
+        ("Job JSONL", lambda: [legacy_job(json.loads(line)) for line in lines],
+         lambda: [decode_job(line) for line in lines]),
+        ("Resume analysis x1000", lambda: [json.loads(resume_text) for _ in range(1000)],
+         lambda: [decode_resume_analysis(resume_text) for _ in range(1000)]),
+        ("Encode results", lambda: [json.dumps(result) for result in results],
+         lambda: [encode(result) for result in results]),
+    ]
+    print(f"Typed decoding with {backend}, {args.jobs} jobs")
+    for name, old, new in rows:
+        old_ms, new_ms = time_ms(old, args.runs), time_ms(new, args.runs)
+        print(f"{name:22} previous {old_ms:8.2f} ms  typed {new_ms:8.2f} ms  ({old_ms / new_ms:4.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
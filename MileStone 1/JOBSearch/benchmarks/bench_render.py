@@ -0,0 +1,180 @@
+"""Render-time benchmark for the job recommendations view.
+
+Times, for a synthetic result set (1,000 postings by default):
+  * formatting into ``TextBuffer`` alone, which needs no display
+  * one ``TextBuffer`` flush of every posting into a bare Tk ``Text`` widget,
+    then one flush per page of ``RESULTS_PAGE_SIZE`` postings, against one
+    ``insert`` per segment
+  * ``JobSearchUI.display_recommendations``, which renders the first page,
+    failing when it exceeds the time budget
+Widget timings include Tk's idle layout pass. Without a display the run
+fails, unless ``--xvfb`` can start a virtual one or ``--format-only`` asks
+for the formatting timing alone.
+
+Example:
+    python benchmarks/bench_render.py --count 1000 --budget-ms 100
+    python benchmarks/bench_render.py --xvfb   # on a headless machine with Xvfb installed
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from JobSearchAI import RESULTS_PAGE_SIZE, JobPosting, TextBuffer, format_recommendation, tk  # noqa: E402
+
+
+def make_recommendations(count: int):
+    recommendations = []
+    for i in range(count):
+        job = JobPosting(
+            title=f"Software Engineer {i}",
+            company=f"Company {i % 97}",
+            location="Remote" if i % 3 == 0 else "Austin, TX",
+            description="Build and maintain services that power the product. " * 4,
+            required_skills=["Python", "SQL", "Docker", "AWS", "Communication"],
+            salary_range="$90,000 - $130,000",
+            posting_date="2024-12-20"
+        )
+        recommendations.append({"job": job, "match_score": 100.0 * (count - i) / count})
+    return recommendations
+
+
+def time_ms(func, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def start_xvfb(display: str = ":99"):
+    """Start a virtual X server and point DISPLAY at it; None if Xvfb is not installed"""
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        return None
+    process = subprocess.Popen([xvfb, display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = display
+    # Give the server a moment to accept connections
+    time.sleep(0.5)
+    return process
+
+
+def time_text_flushes(root, recommendations, runs: int):
+    """Median ms to render every posting into a Text widget.
+
+    Returns the times for one flush of a single buffer, one flush per page,
+    and one insert per segment.
+    """
+    text = tk.Text(root, wrap=tk.WORD, width=50, height=30)
+    text.pack()
+    text.tag_configure("job_header", font=("Helvetica", 10, "bold"))
+    text.tag_configure("section", font=("Helvetica", 10, "bold"))
+    text.tag_configure("skill", lmargin1=10, lmargin2=20)
+    pages = []
+    for start in range(0, len(recommendations), RESULTS_PAGE_SIZE):
+        buffer = TextBuffer()
+        for i, rec in enumerate(recommendations[start:start + RESULTS_PAGE_SIZE], start + 1):
+            format_recommendation(buffer, i, rec)
+        pages.append(buffer)
+    everything = TextBuffer()
+    for i, rec in enumerate(recommendations, 1):
+        format_recommendation(everything, i, rec)
+
+    def flush_all():
+        text.delete("1.0", tk.END)
+        everything.render(text)
+        root.update_idletasks()
+
+    def flush():
+        text.delete("1.0", tk.END)
+        for buffer in pages:
+            buffer.render(text)
+        root.update_idletasks()
+
+    def per_segment():
+        text.delete("1.0", tk.END)
+        for buffer in pages:
+            segments = buffer.segments
+            for j in range(0, len(segments), 2):
+                text.insert(tk.END, segments[j], segments[j + 1])
+        root.update_idletasks()
+
+    results = time_ms(flush_all, runs), time_ms(flush, runs), time_ms(per_segment, runs)
+    text.destroy()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark rendering of job recommendations.")
+    parser.add_argument("--count", type=int, default=1000, help="Number of recommendations")
+    parser.add_argument("--runs", type=int, default=5, help="Samples per measurement")
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="Maximum allowed render time")
+    parser.add_argument("--xvfb", action="store_true", help="Start Xvfb when there is no display")
+    parser.add_argument("--format-only", action="store_true",
+                        help="Only time formatting, which needs no display")
+    args = parser.parse_args(argv)
+
+    xvfb = None
+    if args.xvfb and not os.environ.get("DISPLAY"):
+        xvfb = start_xvfb()
+        if xvfb is None:
+            print("Xvfb is not installed; widget timings need a display")
+    try:
+        return run(args)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+
+def run(args):
+    recommendations = make_recommendations(args.count)
+
+    def build_buffer():
+        buffer = TextBuffer()
+        for i, rec in enumerate(recommendations, 1):
+            format_recommendation(buffer, i, rec)
+
+    print(f"Format {args.count} recommendations: {time_ms(build_buffer, args.runs):.2f} ms")
+    if args.format_only:
+        return 0
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"FAIL: widget timings need a display ({e}). Set DISPLAY, pass --xvfb with Xvfb "
+              "installed, or pass --format-only", file=sys.stderr)
+        return 2
+    root.withdraw()
+
+    full_ms, flush_ms, per_segment_ms = time_text_flushes(root, recommendations, args.runs)
+    print(f"Text widget, {args.count} recommendations: {full_ms:.2f} ms in one TextBuffer flush, "
+          f"{flush_ms:.2f} ms in flushes of {RESULTS_PAGE_SIZE}, {per_segment_ms:.2f} ms in per-segment inserts")
+
+    from JobSearchAI import JobSearchUI
+    ui = JobSearchUI(root)
+
+    def render():
+        ui.display_recommendations(recommendations)
+        root.update_idletasks()
+
+    render_ms = time_ms(render, args.runs)
+    ui.on_close()
+    print(f"Render first {min(args.count, RESULTS_PAGE_SIZE)} of {args.count} recommendations: "
+          f"{render_ms:.2f} ms (budget {args.budget_ms:.0f} ms)")
+    if render_ms > args.budget_ms:
+        print("FAIL: render time over budget", file=sys.stderr)
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
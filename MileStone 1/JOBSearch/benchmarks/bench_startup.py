@@ -0,0 +1,90 @@
+"""Cold-start benchmark for importing JobSearchAI.
+
+Runs ``python -X importtime -c "import JobSearchAI"`` in fresh interpreters,
+alternating with imports of a calibration module (``asyncio``, a stdlib
+package of similar weight), and divides the median import times. The
+baseline stores that ratio rather than milliseconds, so it holds on faster
+and slower machines alike. Exits with status 1 when the ratio regresses by
+more than the allowed threshold.
+
+Example:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --update-baseline
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "startup_baseline.json"
+MODULE = "JobSearchAI"
+CALIBRATION_MODULE = "asyncio"
+
+
+def measure_import_us(module: str) -> int:
+    """Return the cumulative import time of ``module`` in microseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    # Lines look like: "import time:       self [us] |  cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f"No importtime entry for {module}:\n{result.stderr[-2000:]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track JobSearchAI cold-start import time.")
+    parser.add_argument("-n", "--runs", type=int, default=7, help="Number of fresh interpreters to sample")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed fractional regression over the baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    samples, calibration = [], []
+    for _ in range(args.runs):
+        samples.append(measure_import_us(MODULE))
+        calibration.append(measure_import_us(CALIBRATION_MODULE))
+    median_us = statistics.median(samples)
+    calibration_us = statistics.median(calibration)
+    ratio = median_us / calibration_us
+    print(f"{MODULE} import: median {median_us / 1000:.1f} ms "
+          f"(min {min(samples) / 1000:.1f} ms, max {max(samples) / 1000:.1f} ms, {args.runs} runs)")
+    print(f"{CALIBRATION_MODULE} import: median {calibration_us / 1000:.1f} ms; ratio {ratio:.2f}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(
+            {"module": MODULE, "calibration": CALIBRATION_MODULE, "ratio": round(ratio, 3)}, indent=2) + "\n")
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("No baseline recorded yet; run with --update-baseline to create one.")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if "ratio" not in baseline:
+        print("Baseline is in the old absolute format; run with --update-baseline to replace it.")
+        return 0
+    limit = baseline["ratio"] * (1 + args.threshold)
+    print(f"Baseline ratio {baseline['ratio']:.2f}, limit {limit:.2f}")
+    if ratio > limit:
+        print("FAIL: cold-start import time regressed", file=sys.stderr)
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
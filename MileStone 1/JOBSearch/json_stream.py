@@ -0,0 +1,101 @@
+"""Incremental parsing of JSON arrays streamed from an LLM completion."""
+import json
+from typing import Any, Callable, List
+
+
+class JSONArrayStreamParser:
+    """Extracts complete top-level objects from a JSON array as text arrives.
+
+    Anything before the opening ``[`` (prose, a ```json fence) is skipped; a
+    ``[`` only opens the array when the next non-space character is ``{`` or
+    ``]``, so bracketed prose like "Here are [5] jobs" is skipped too. Each
+    ``{...}`` element is decoded as soon as its closing brace is seen, so
+    a response truncated at ``max_tokens`` still yields every finished object.
+    ``decode`` turns each object's text into a value; objects it rejects with
+    a ``ValueError`` are counted in ``errors`` and skipped.
+    """
+
+    def __init__(self, decode: Callable[[str], Any] = json.loads):
+        self._decode = decode
+        self._buffer = ""
+        self._pos = 0            # next character of _buffer to scan
+        self._object_start = -1  # index in _buffer where the current object began
+        self._depth = 0
+        self._stray_depth = 0    # nesting of arrays found between objects
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self.finished = False
+        self.errors = 0
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume the next chunk of text and return any objects it completed"""
+        if self.finished or not chunk:
+            return []
+
+        self._buffer += chunk
+        completed = []
+        buffer = self._buffer
+        i = self._pos
+        length = len(buffer)
+
+        while i < length:
+            c = buffer[i]
+            if not self._started:
+                if c == '[':
+                    j = i + 1
+                    while j < length and buffer[j].isspace():
+                        j += 1
+                    if j == length:
+                        break  # Wait for the character that decides it
+                    self._started = buffer[j] in '{]'
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c == '{' or c == '[':
+                if self._depth == 0:
+                    if c == '[':
+                        # Arrays are only expected inside objects; skip stray ones
+                        self._stray_depth += 1
+                        i += 1
+                        continue
+                    self._object_start = i
+                self._depth += 1
+            elif c == '}' or c == ']':
+                if self._depth == 0:
+                    if c == ']':
+                        if self._stray_depth:
+                            self._stray_depth -= 1
+                        else:
+                            self.finished = True
+                            break
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        text = buffer[self._object_start:i + 1]
+                        try:
+                            completed.append(self._decode(text))
+                        except ValueError:
+                            self.errors += 1
+                        self._object_start = -1
+            i += 1
+
+        # Drop text that can no longer be part of an unfinished object
+        if not self._started and i < length:
+            # Stopped at a '[' that may open the array
+            self._buffer = buffer[i:]
+            self._pos = 0
+        elif self._object_start >= 0:
+            self._buffer = buffer[self._object_start:]
+            self._pos = i - self._object_start
+            self._object_start = 0
+        else:
+            self._buffer = ""
+            self._pos = 0
+        return completed
@@ -0,0 +1,245 @@
+"""Typed schemas and decoders for LLM payloads.
+
+``JobPosting`` and ``ResumeAnalysis`` declare their fields, types and
+defaults once. With ``msgspec`` installed, JSON is decoded straight into
+them by compiled decoders that validate types and fill in defaults in one
+pass; without it, the stdlib ``json`` module and a converter built once per
+type apply the same schema. msgspec is imported on first use, not at
+startup. A posting field sent as null takes its default. Either way a job
+object with a wrong-typed field raises ``SchemaError`` on its own, so one
+malformed posting is dropped instead of failing the whole batch.
+"""
+import json
+from dataclasses import MISSING, dataclass, field, fields, is_dataclass
+from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import (Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Union,
+                    get_args, get_origin, get_type_hints)
+
+
+class SchemaError(ValueError):
+    """A payload that is not valid JSON or does not match its schema."""
+
+
+@dataclass(frozen=True)
+class JobFeatures:
+    """Per-posting values the ranking needs, parsed once per posting"""
+    salary_min: Optional[int]
+    salary_max: Optional[int]
+    location_tokens: FrozenSet[str]
+    remote: bool
+    skill_ids: FrozenSet[int]
+
+
+@dataclass
+class JobPosting:
+    # LLMs send null for fields they could not fill; __post_init__ puts the default back
+    title: Optional[str] = "Untitled Position"
+    company: Optional[str] = "Unknown Company"
+    location: Optional[str] = "Location Not Specified"
+    description: Optional[str] = "No description available"
+    # LLMs sometimes send one comma separated string; __post_init__ splits it
+    required_skills: Union[List[str], str, None] = field(default_factory=list)
+    # A bare number (120000) is kept as its string
+    salary_range: Union[str, int, float, None] = "Salary Not Specified"
+    posting_date: Optional[str] = field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d"))
+
+    def __post_init__(self):
+        for name, default in _JOB_DEFAULTS:
+            if getattr(self, name) is None:
+                setattr(self, name, default())
+        if isinstance(self.required_skills, str):
+            self.required_skills = [skill.strip() for skill in self.required_skills.split(",") if skill.strip()]
+        if not isinstance(self.salary_range, str):
+            salary = self.salary_range
+            self.salary_range = str(int(salary)) if float(salary).is_integer() else str(salary)
+        # Not a field, so no payload can set it: filled in by JobSearchAssistant.job_features on first scoring
+        self.features: Optional[JobFeatures] = None
+
+
+_JOB_DEFAULTS = tuple(
+    (f.name, f.default_factory if f.default is MISSING else (lambda default=f.default: default))
+    for f in fields(JobPosting)
+)
+
+
+@dataclass
+class SkillGroups:
+    technical: List[str] = field(default_factory=list)
+    soft: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ResumeAnalysis:
+    """Resume analysis as returned by the LLM; skills may be grouped or a flat list"""
+    skills: Union[SkillGroups, List[str]] = field(default_factory=SkillGroups)
+    experience_level: str = "Entry Level"
+    achievements: List[str] = field(default_factory=list)
+
+    @property
+    def all_skills(self) -> List[str]:
+        if isinstance(self.skills, SkillGroups):
+            return self.skills.technical + self.skills.soft
+        return list(self.skills)
+
+
+@lru_cache(maxsize=None)
+def _codec() -> Optional[SimpleNamespace]:
+    """msgspec decoders and encoder, compiled on first use to keep msgspec off the startup path"""
+    try:
+        import msgspec
+    except ImportError:  # msgspec is optional
+        return None
+    return SimpleNamespace(
+        msgspec=msgspec,
+        job=msgspec.json.Decoder(JobPosting),
+        raw_items=msgspec.json.Decoder(List[msgspec.Raw]),
+        resume=msgspec.json.Decoder(ResumeAnalysis),
+        encoder=msgspec.json.Encoder()
+    )
+
+
+def backend() -> str:
+    return "msgspec" if _codec() is not None else "json"
+
+
+def _type_error(expected: str, value: Any, path: str) -> SchemaError:
+    return SchemaError(f"Expected `{expected}`, got `{type(value).__name__}` - at `{path}`")
+
+
+@lru_cache(maxsize=None)
+def _converter(tp: Any) -> Callable[[Any, str], Any]:
+    """Function checking a json.loads value against ``tp`` and building dataclasses, like msgspec.convert.
+
+    Built once per type, so the typing introspection is not repeated per value.
+    """
+    origin = get_origin(tp)
+    if tp is Any:
+        return lambda value, path: value
+    if is_dataclass(tp):
+        hints = get_type_hints(tp)
+        plan = [(f.name, _converter(hints[f.name]), f.default is MISSING and f.default_factory is MISSING)
+                for f in fields(tp)]
+
+        def convert_dataclass(value, path):
+            if not isinstance(value, dict):
+                raise _type_error("object", value, path)
+            kwargs = {}
+            for name, convert, required in plan:
+                if name in value:
+                    kwargs[name] = convert(value[name], f"{path}.{name}")
+                elif required:
+                    raise SchemaError(f"Object missing required field `{name}` - at `{path}`")
+            return tp(**kwargs)
+        return convert_dataclass
+    if origin is Union:
+        nullable = type(None) in get_args(tp)
+        options = [_converter(arg) for arg in get_args(tp) if arg is not type(None)]
+
+        def convert_union(value, path):
+            if value is None and nullable:
+                return None
+            for convert in options:
+                try:
+                    return convert(value, path)
+                except SchemaError:
+                    pass
+            raise _type_error(str(tp), value, path)
+        return convert_union
+    if origin in (list, frozenset):
+        (item_type,) = get_args(tp)
+        convert_item = _converter(item_type)
+        build = list if origin is list else frozenset
+
+        def convert_array(value, path):
+            if not isinstance(value, list):
+                raise _type_error("array", value, path)
+            return build([convert_item(item, f"{path}[{i}]") for i, item in enumerate(value)])
+        return convert_array
+    if origin is dict:
+        convert_value = _converter(get_args(tp)[1])
+
+        def convert_object(value, path):
+            if not isinstance(value, dict):
+                raise _type_error("object", value, path)
+            return {key: convert_value(item, f"{path}.{key}") for key, item in value.items()}
+        return convert_object
+
+    def convert_scalar(value, path):
+        # bool is an int subclass, but JSON true is not a number
+        if type(value) is not tp and not (isinstance(value, tp) and not isinstance(value, bool)):
+            raise _type_error(tp.__name__, value, path)
+        return value
+    return convert_scalar
+
+
+def _loads(data: Union[str, bytes]) -> Any:
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError as e:
+        raise SchemaError(str(e)) from e
+
+
+def decode_job(data: Union[str, bytes]) -> JobPosting:
+    """Decode one JSON job object; raises SchemaError if it does not match JobPosting"""
+    codec = _codec()
+    if codec is not None:
+        try:
+            return codec.job.decode(data)
+        except codec.msgspec.DecodeError as e:
+            raise SchemaError(str(e)) from e
+    return _converter(JobPosting)(_loads(data), "$")
+
+
+def job_from_dict(job: Dict) -> JobPosting:
+    """Validate an already-parsed job object (a CSV row, say) into a JobPosting"""
+    codec = _codec()
+    if codec is not None:
+        try:
+            return codec.msgspec.convert(job, JobPosting)
+        except codec.msgspec.ValidationError as e:
+            raise SchemaError(str(e)) from e
+    return _converter(JobPosting)(job, "$")
+
+
+def decode_jobs(data: Union[str, bytes]) -> Tuple[List[JobPosting], int]:
+    """Decode a JSON array of jobs, returning the valid postings and how many were rejected"""
+    codec = _codec()
+    if codec is not None:
+        try:
+            items = codec.raw_items.decode(data)
+        except codec.msgspec.DecodeError as e:
+            raise SchemaError(str(e)) from e
+        decode = codec.job.decode
+    else:
+        items = _loads(data)
+        if not isinstance(items, list):
+            raise _type_error("array", items, "$")
+        decode = job_from_dict
+    jobs, rejected = [], 0
+    for item in items:
+        try:
+            jobs.append(decode(item))
+        except ValueError:
+            rejected += 1
+    return jobs, rejected
+
+
+def decode_resume_analysis(data: Union[str, bytes]) -> ResumeAnalysis:
+    """Decode the LLM's resume analysis, filling in missing fields with defaults"""
+    codec = _codec()
+    if codec is not None:
+        try:
+            return codec.resume.decode(data)
+        except codec.msgspec.DecodeError as e:
+            raise SchemaError(str(e)) from e
+    return _converter(ResumeAnalysis)(_loads(data), "$")
+
+
+def encode(obj: Any) -> bytes:
+    """Compact JSON bytes for results built from dicts, lists and strings"""
+    codec = _codec()
+    if codec is not None:
+        return codec.encoder.encode(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
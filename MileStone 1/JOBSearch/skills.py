@@ -0,0 +1,317 @@
+"""Local skill extraction with an Aho-Corasick skill dictionary.
+
+Skills come from a taxonomy of canonical names and their aliases ("JS",
+"ECMAScript" -> JavaScript), each canonical skill having an integer ID. All
+aliases are compiled into one Aho-Corasick automaton over word tokens, so a
+text is tokenized with a single regex pass and scanned once, however many
+aliases there are. Overlapping matches resolve leftmost-longest
+("react native" wins over "react"), and matching on whole tokens means "java"
+never matches inside "javascript". A joined token that no alias uses
+("python/django", "java-based") is scanned as its parts, while alias tokens
+such as "ci/cd" and "node.js" stay whole.
+
+Skills outside the taxonomy (from an LLM, or a job's ``required_skills``) are
+interned as extra IDs by their lowercased name, so they still match exactly.
+"""
+import json
+import re
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+# Words may contain + and # (c++, c#) and inner . - / (node.js, ci/cd, objective-c);
+# ".net"-style names start with a dot
+_TOKEN = re.compile(r"[a-z0-9+#]+(?:[./\-][a-z0-9+#]+)*|\.[a-z]+")
+_JOINER = re.compile(r"[./\-]")
+
+# Canonical skill -> aliases, matched case-insensitively; the name itself is an alias too
+SKILL_TAXONOMY: Dict[str, List[str]] = {
+    # Languages
+    "Python": ["python3", "python 3", "py"],
+    "Java": ["java 8", "java 11", "java 17", "core java"],
+    "JavaScript": ["js", "ecmascript", "es6", "es2015", "vanilla js"],
+    "TypeScript": ["ts"],
+    "C": ["c language", "ansi c"],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["c sharp", "csharp"],
+    "Go": ["golang"],
+    "Rust": ["rust lang"],
+    "Ruby": [],
+    "PHP": [],
+    "Kotlin": [],
+    "Swift": [],
+    "Objective-C": ["objc", "objective c"],
+    "Scala": [],
+    "R": ["r language", "rstats"],
+    "MATLAB": [],
+    "Perl": [],
+    "Bash": ["shell scripting", "shell", "bash scripting", "sh"],
+    "PowerShell": [],
+    "SQL": ["structured query language", "t-sql", "tsql", "pl/sql", "plsql"],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+    "Sass": ["scss"],
+    "Dart": [],
+    "Elixir": [],
+    "Haskell": [],
+    "Lua": [],
+    "Solidity": [],
+    # Frontend
+    "React": ["react.js", "reactjs"],
+    "React Native": ["react-native"],
+    "Angular": ["angular.js", "angularjs"],
+    "Vue.js": ["vue", "vuejs", "vue 3"],
+    "Svelte": [],
+    "Next.js": ["nextjs", "next"],
+    "Redux": [],
+    "jQuery": [],
+    "Tailwind CSS": ["tailwind", "tailwindcss"],
+    "Bootstrap": [],
+    "Webpack": [],
+    "Flutter": [],
+    # Backend and frameworks
+    "Node.js": ["node", "nodejs", "node js"],
+    "Express": ["express.js", "expressjs"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": ["fast api"],
+    "Spring": ["spring framework"],
+    "Spring Boot": ["springboot"],
+    "Ruby on Rails": ["rails", "ror"],
+    "Laravel": [],
+    ".NET": ["dotnet", "dot net", ".net core", "asp.net", "asp.net core"],
+    "GraphQL": [],
+    "REST APIs": ["rest", "restful", "rest api", "restful apis", "restful api"],
+    "gRPC": [],
+    "Microservices": ["microservice", "micro-services", "microservices architecture"],
+    # Data stores
+    "PostgreSQL": ["postgres", "postgresql", "psql"],
+    "MySQL": [],
+    "SQLite": [],
+    "Oracle Database": ["oracle", "oracle db"],
+    "SQL Server": ["mssql", "ms sql", "microsoft sql server"],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "Cassandra": ["apache cassandra"],
+    "Elasticsearch": ["elastic search", "elk", "opensearch"],
+    "DynamoDB": ["dynamo db"],
+    "Snowflake": [],
+    "BigQuery": ["big query"],
+    # Data and ML
+    "Machine Learning": ["ml"],
+    "Deep Learning": ["dl", "neural networks", "neural network"],
+    "Natural Language Processing": ["nlp"],
+    "Computer Vision": ["cv", "image processing"],
+    "Data Analysis": ["data analytics", "analytics"],
+    "Data Science": [],
+    "Data Engineering": ["etl", "elt", "data pipelines", "data pipeline"],
+    "Statistics": ["statistical analysis", "statistical modeling"],
+    "TensorFlow": ["tf", "tensorflow 2"],
+    "PyTorch": ["torch"],
+    "Keras": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "Pandas": [],
+    "NumPy": [],
+    "Apache Spark": ["spark", "pyspark"],
+    "Hadoop": ["apache hadoop", "hdfs"],
+    "Apache Kafka": ["kafka"],
+    "Airflow": ["apache airflow"],
+    "dbt": [],
+    "Tableau": [],
+    "Power BI": ["powerbi"],
+    "Excel": ["microsoft excel", "ms excel", "spreadsheets"],
+    "Large Language Models": ["llm", "llms", "generative ai", "genai"],
+    # Cloud and DevOps
+    "AWS": ["amazon web services", "ec2", "s3", "lambda", "aws lambda"],
+    "Azure": ["microsoft azure"],
+    "Google Cloud": ["gcp", "google cloud platform"],
+    "Docker": ["containers", "containerization"],
+    "Kubernetes": ["k8s", "eks", "aks", "gke"],
+    "Terraform": ["infrastructure as code", "iac"],
+    "Ansible": [],
+    "CI/CD": ["ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Jenkins": [],
+    "GitHub Actions": [],
+    "GitLab CI": [],
+    "Git": ["github", "gitlab", "version control"],
+    "Linux": ["unix", "ubuntu", "centos", "red hat"],
+    "Nginx": [],
+    "Prometheus": [],
+    "Grafana": [],
+    "Serverless": [],
+    "Networking": ["tcp/ip", "dns", "computer networking"],
+    "Cybersecurity": ["information security", "infosec", "security"],
+    # Practices
+    "Agile": ["agile methodologies", "agile methodology"],
+    "Scrum": [],
+    "Kanban": [],
+    "Test-Driven Development": ["tdd"],
+    "Unit Testing": ["unit tests", "automated testing", "test automation"],
+    "Selenium": [],
+    "Jest": [],
+    "pytest": [],
+    "System Design": ["distributed systems", "software architecture"],
+    "Object-Oriented Programming": ["oop", "object oriented programming", "object-oriented design"],
+    "Data Structures": ["algorithms", "data structures and algorithms", "dsa"],
+    "UI/UX Design": ["ui design", "ux design", "user experience", "ux", "ui/ux"],
+    "Figma": [],
+    "Jira": [],
+    "SEO": ["search engine optimization"],
+    "Product Management": ["product manager", "product strategy"],
+    "Project Management": ["pmp", "project planning"],
+    # Soft skills
+    "Communication": ["communication skills", "written communication", "verbal communication"],
+    "Leadership": ["team leadership", "leading teams", "people management"],
+    "Teamwork": ["collaboration", "team player", "cross-functional collaboration"],
+    "Problem Solving": ["problem-solving", "troubleshooting", "analytical skills", "critical thinking"],
+    "Time Management": ["prioritization", "organization"],
+    "Mentoring": ["coaching", "mentorship"],
+    "Stakeholder Management": ["stakeholder communication", "client management"],
+    "Presentation Skills": ["public speaking", "presentations"],
+    "Adaptability": ["flexibility"],
+    "Customer Service": ["customer support", "client service"],
+}
+
+# Names that are also everyday words ("go", "next", "rest", "excel"): these only
+# match a whole skill name, such as a job's required_skills entry, never free text
+EXACT_ONLY = frozenset({
+    "go", "r", "c", "next", "express", "rest", "spark", "shell", "sh", "security", "organization",
+    "node", "torch", "lambda", "cv", "dl", "ts", "tf", "py", "excel", "spring", "flexibility", "oracle",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased skill tokens of ``text``."""
+    return _TOKEN.findall(text.lower())
+
+
+class SkillTaxonomy:
+    """Canonical skills with integer IDs, and an Aho-Corasick matcher over their aliases."""
+
+    def __init__(self, taxonomy: Dict[str, Sequence[str]]):
+        self.names: List[str] = sorted(taxonomy, key=str.lower)
+        self.known_count = len(self.names)
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Automaton: per state, token -> next state; failure links; outputs as (length, id)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[int, int], ...]] = [()]
+        # Every token of every alias, so joined tokens that are aliases stay whole
+        self._vocabulary = set()
+        for skill_id, name in enumerate(self.names):
+            for alias in (name, *taxonomy[name]):
+                tokens = tuple(tokenize(alias))
+                if not tokens:
+                    continue
+                self._vocabulary.update(tokens)
+                key = ' '.join(tokens)
+                self._ids.setdefault(key, skill_id)
+                if key not in EXACT_ONLY:
+                    self._add_pattern(tokens, skill_id)
+        self._build_failure_links()
+
+    @classmethod
+    def from_file(cls, path: str) -> 'SkillTaxonomy':
+        """Built-in taxonomy extended with a JSON ``{"Skill": ["alias", ...]}`` file."""
+        with open(path, encoding='utf-8') as f:
+            extra = json.load(f)
+        taxonomy = {name: list(aliases) for name, aliases in SKILL_TAXONOMY.items()}
+        for name, aliases in extra.items():
+            taxonomy.setdefault(name, []).extend(aliases)
+        return cls(taxonomy)
+
+    def _add_pattern(self, tokens: Tuple[str, ...], skill_id: int):
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        if not any(length == len(tokens) for length, _ in self._out[state]):
+            self._out[state] += ((len(tokens), skill_id),)
+
+    def _build_failure_links(self):
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for token, next_state in self._goto[state].items():
+                pending.append(next_state)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(token, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Inherit matches that end here through the failure link (BFS order makes them final)
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def scan(self, tokens: Sequence[str]) -> List[Tuple[int, int, int]]:
+        """Every alias match in ``tokens`` as ``(start, end, skill_id)``, end exclusive."""
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if out[state]:
+                end = position + 1
+                matches.extend((end - length, end, skill_id) for length, skill_id in out[state])
+        return matches
+
+    def text_tokens(self, text: str) -> List[str]:
+        """Tokens of ``text`` to scan: joined tokens that are not alias tokens are split into their parts."""
+        tokens = []
+        vocabulary = self._vocabulary
+        for token in tokenize(text):
+            if token in vocabulary or not _JOINER.search(token, 1):
+                tokens.append(token)
+            else:
+                tokens.extend(part for part in _JOINER.split(token) if part)
+        return tokens
+
+    def extract(self, text: str) -> FrozenSet[int]:
+        """IDs of the taxonomy skills mentioned in ``text``, leftmost-longest."""
+        matches = self.scan(self.text_tokens(text))
+        if len(matches) < 2:
+            return frozenset(skill_id for _, _, skill_id in matches)
+        matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+        found, covered_until = set(), 0
+        for start, end, skill_id in matches:
+            if start >= covered_until:
+                found.add(skill_id)
+                covered_until = end
+        return frozenset(found)
+
+    def id_of(self, skill: str) -> int:
+        """ID of one skill name: its canonical skill if it is an alias, else an interned ID."""
+        key = ' '.join(tokenize(skill)) or skill.strip().lower()
+        skill_id = self._ids.get(key)
+        if skill_id is None:
+            found = self.extract(skill)
+            if len(found) == 1:
+                return next(iter(found))
+            with self._lock:
+                skill_id = self._ids.get(key)
+                if skill_id is None:
+                    skill_id = self._ids[key] = len(self.names)
+                    self.names.append(skill.strip())
+        return skill_id
+
+    def ids_of(self, skills: Iterable[str]) -> FrozenSet[int]:
+        """IDs of a list of skill names, such as a job's ``required_skills``."""
+        return frozenset(self.id_of(skill) for skill in skills if skill and skill.strip())
+
+    def names_of(self, skill_ids: Iterable[int]) -> List[str]:
+        return sorted((self.names[skill_id] for skill_id in skill_ids), key=str.lower)
+
+
+@lru_cache(maxsize=None)
+def default_taxonomy(path: Optional[str] = None) -> SkillTaxonomy:
+    """Shared taxonomy, built once per process; ``path`` adds a JSON file of extra skills."""
+    return SkillTaxonomy.from_file(path) if path else SkillTaxonomy(SKILL_TAXONOMY)
@@ -0,0 +1,57 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from JobSearchAI import JobSearchAssistant
+
+JOBS = [{"title": f"Engineer {i}", "company": "Acme", "location": "Remote", "salary_range": "$100k - $120k",
+         "required_skills": ["Python"], "description": "Build things.", "posting_date": "2024-01-01"}
+        for i in range(3)]
+
+
+class FakeClient:
+    """Streams JOBS as a chat completion, a few characters per chunk"""
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        with self.lock:
+            self.calls += 1
+        text = json.dumps(JOBS)
+        for i in range(0, len(text), 40):
+            time.sleep(0.002)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + 40]))])
+
+
+async def collect(assistant, job_search):
+    return [rec["job"].title async for rec in assistant.iter_job_recommendations(job_search)]
+
+
+def test_identical_streaming_searches_share_one_completion():
+    client = FakeClient()
+    assistant = JobSearchAssistant(llm_client=client)
+
+    async def run():
+        return await asyncio.gather(collect(assistant, "Python developer"),
+                                    collect(assistant, "  python   Developer"),
+                                    assistant.fetch_jobs_from_groq("python developer"))
+
+    leader, follower, fetched = asyncio.run(run())
+    titles = [job["title"] for job in JOBS]
+    assert leader == follower == titles
+    assert [job.title for job in fetched] == titles
+    assert client.calls == 1
+    assert [job.title for job in assistant.cached_jobs("Python Developer")] == titles
+
+
+def test_later_search_starts_a_new_completion():
+    client = FakeClient()
+    assistant = JobSearchAssistant(llm_client=client)
+    asyncio.run(collect(assistant, "data engineer"))
+    asyncio.run(collect(assistant, "data engineer"))
+    assert client.calls == 2
@@ -0,0 +1,64 @@
+import json
+
+from json_stream import JSONArrayStreamParser
+
+TEXT = 'Here you go:\n```json\n[{"title": "Dev", "tags": ["a", "b"]}, {"title": "Say \\"}\\" [x]"}, {"n": 3}]\n```'
+
+
+def test_objects_split_across_chunks():
+    parser = JSONArrayStreamParser()
+    items = []
+    for i in range(0, len(TEXT), 3):
+        items.extend(parser.feed(TEXT[i:i + 3]))
+    assert items == [{"title": "Dev", "tags": ["a", "b"]}, {"title": 'Say "}" [x]'}, {"n": 3}]
+    assert parser.finished
+    assert parser.feed('[{"late": 1}]') == []
+
+
+def test_truncated_response_keeps_finished_objects():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"a": 1}, {"b": 2}, {"c": "cut off mid str') == [{"a": 1}, {"b": 2}]
+    assert not parser.finished
+    assert parser.errors == 0
+
+
+def test_garbage_is_skipped_or_counted():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('no array here {"ignored": true} ') == []
+    items = parser.feed('[{"ok": 1}, {"bad": tru}, "stray ] {", 7, [1, [2]], {"ok": 2}]')
+    assert items == [{"ok": 1}, {"ok": 2}]
+    assert parser.errors == 1
+
+
+def test_decode_hook_rejections_are_counted():
+    def decode(text):
+        value = json.loads(text)
+        if "title" not in value:
+            raise ValueError("missing title")
+        return value["title"]
+
+    parser = JSONArrayStreamParser(decode=decode)
+    assert parser.feed('[{"title": "A"}, {"name": "B"}, {"title": "C"}]') == ["A", "C"]
+    assert parser.errors == 1
+
+
+def test_empty_chunks_and_empty_array():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('') == []
+    assert parser.feed('[]') == []
+    assert parser.finished
+
+
+def test_bracketed_prose_before_the_array():
+    text = 'Here are [5] jobs [see below]: [ {"title": "a"}, {"title": "b"}]'
+    parser = JSONArrayStreamParser()
+    assert parser.feed(text) == [{"title": "a"}, {"title": "b"}]
+    assert parser.finished
+
+    # The same reply one character at a time, so '[' arrives before what follows it
+    parser = JSONArrayStreamParser()
+    items = []
+    for c in text:
+        items.extend(parser.feed(c))
+    assert items == [{"title": "a"}, {"title": "b"}]
+    assert parser.finished
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from benchmarks.bench_render import make_recommendations, start_xvfb
+from JobSearchAI import TextBuffer, format_recommendation, tk
+
+
+@pytest.fixture(scope="module")
+def root():
+    display = os.environ.get("DISPLAY")
+    xvfb = None if display else start_xvfb()
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        reason = f"Tk tests need a display ({e}). Set DISPLAY or install Xvfb"
+        if os.environ.get("TK_TESTS") == "skip":
+            pytest.skip(f"{reason}; skipped because TK_TESTS=skip")
+        pytest.fail(f"{reason}, or set TK_TESTS=skip to skip them", pytrace=False)
+    root.withdraw()
+    yield root
+    root.destroy()
+    if xvfb is not None:
+        xvfb.terminate()
+        if display is None:
+            os.environ.pop("DISPLAY", None)
+
+
+def test_buffer_flushes_in_one_insert(root):
+    text = tk.Text(root)
+    buffer = TextBuffer()
+    buffer.add("Job #1\n", "job_header")
+    buffer.add("Company: Acme\n")
+    buffer.add("  • Python\n", "skill")
+    buffer.render(text)
+    root.update_idletasks()
+    assert text.get("1.0", "end-1c") == "Job #1\nCompany: Acme\n  • Python\n"
+    assert str(text.tag_ranges("job_header")[0]) == "1.0"
+    assert [str(index) for index in text.tag_ranges("skill")] == ["3.0", "4.0"]
+
+
+def test_thousand_recommendations_in_one_flush(root):
+    text = tk.Text(root)
+    buffer = TextBuffer()
+    for i, rec in enumerate(make_recommendations(1000), 1):
+        format_recommendation(buffer, i, rec)
+    buffer.render(text)
+    root.update_idletasks()
+    content = text.get("1.0", "end-1c")
+    assert content == "".join(buffer.segments[::2])
+    assert "Job #1000 - Match Score" in content
+    # A start and an end index per posting
+    assert len(text.tag_ranges("job_header")) == 2000
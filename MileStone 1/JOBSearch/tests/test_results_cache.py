@@ -0,0 +1,34 @@
+import threading
+
+from JobSearchAI import JobSearchAssistant
+
+
+def test_cache_expires_after_ttl():
+    assistant = JobSearchAssistant(llm_client=object())
+    assistant._cache_jobs("Data  Engineer", ["job"])
+    assert assistant.cached_jobs("data engineer") == ["job"]
+    assistant.results_ttl = -1
+    assert assistant.cached_jobs("data engineer") is None
+    assert assistant._result_sets == {}
+
+
+def test_reads_and_writes_from_two_threads():
+    # Mirrors the Tk thread expiring entries while the worker thread caches new ones
+    assistant = JobSearchAssistant(llm_client=object())
+    assistant.results_ttl = 0
+    errors = []
+
+    def run(func):
+        try:
+            for i in range(20000):
+                func(f"search {i % 50}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(lambda s: assistant._cache_jobs(s, [s]),)),
+               threading.Thread(target=run, args=(assistant.cached_jobs,))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
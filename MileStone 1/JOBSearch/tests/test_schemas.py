@@ -0,0 +1,41 @@
+import pytest
+
+import schemas
+from schemas import JobPosting, SchemaError, decode_job, decode_jobs, job_from_dict
+
+
+@pytest.fixture(params=["msgspec", "json"])
+def backend(request, monkeypatch):
+    if request.param == "msgspec":
+        if schemas.backend() != "msgspec":
+            pytest.skip("msgspec is not installed")
+    else:
+        monkeypatch.setattr(schemas, "_codec", lambda: None)
+    return request.param
+
+
+def test_null_fields_take_defaults(backend):
+    job = decode_job(b'{"title": "Engineer", "company": null, "required_skills": null, "posting_date": null}')
+    assert job.company == "Unknown Company"
+    assert job.required_skills == []
+    assert job.posting_date == JobPosting().posting_date
+
+
+@pytest.mark.parametrize("salary, expected", [(120000, "120000"), (95000.0, "95000"), (52.5, "52.5")])
+def test_numeric_salary_is_kept_as_text(backend, salary, expected):
+    assert job_from_dict({"salary_range": salary}).salary_range == expected
+
+
+def test_features_are_not_read_from_the_payload(backend):
+    job = decode_job(b'{"title": "Engineer", "features": {"salary_min": 1}}')
+    assert job.features is None
+    jobs, rejected = decode_jobs(b'[{"features": "x"}, {"company": 7}, {"salary_range": null}]')
+    assert [job.features for job in jobs] == [None, None]
+    assert rejected == 1
+
+
+def test_wrong_types_are_still_rejected(backend):
+    with pytest.raises(SchemaError):
+        decode_job(b'{"salary_range": true}')
+    with pytest.raises(SchemaError):
+        decode_job(b'{"required_skills": [1, 2]}')
@@ -0,0 +1,52 @@
+import pytest
+
+from skills import SKILL_TAXONOMY, SkillTaxonomy, default_taxonomy, tokenize
+
+
+@pytest.fixture(scope="module")
+def taxonomy():
+    return default_taxonomy()
+
+
+def names(taxonomy, text):
+    return taxonomy.names_of(taxonomy.extract(text))
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Skills: Python/Django, HTML/CSS, React/Redux", ["CSS", "Django", "HTML", "Python", "React", "Redux"]),
+    ("Java-based microservices", ["Java", "Microservices"]),
+    ("AWS-certified; Docker-based CI/CD", ["AWS", "CI/CD", "Docker"]),
+    ("Node.js, Objective-C, react-native and PL/SQL", ["Node.js", "Objective-C", "React Native", "SQL"]),
+])
+def test_joined_tokens(taxonomy, text, expected):
+    assert names(taxonomy, text) == expected
+
+
+def test_leftmost_longest_and_whole_tokens(taxonomy):
+    assert names(taxonomy, "Built apps in React Native") == ["React Native"]
+    assert names(taxonomy, "JavaScript and TypeScript") == ["JavaScript", "TypeScript"]
+    assert names(taxonomy, "Spring Boot services") == ["Spring Boot"]
+
+
+def test_everyday_words_only_match_whole_names(taxonomy):
+    assert names(taxonomy, "Ready to go next, excel at rest") == []
+    assert taxonomy.id_of("Go") == taxonomy.id_of("golang")
+
+
+def test_ids_of_aliases_and_unknown_skills(taxonomy):
+    assert taxonomy.ids_of(["JS", "ECMAScript"]) == taxonomy.ids_of(["JavaScript"])
+    unknown = taxonomy.id_of("Underwater Basket Weaving")
+    assert unknown >= taxonomy.known_count
+    assert taxonomy.id_of("underwater  basket weaving") == unknown
+
+
+def test_extra_skills_file(tmp_path):
+    path = tmp_path / "skills.json"
+    path.write_text('{"Zig": ["ziglang"], "Python": ["cpython"]}')
+    extended = SkillTaxonomy.from_file(str(path))
+    assert extended.names_of(extended.extract("ziglang and cpython")) == ["Python", "Zig"]
+    assert len(extended.names) == len(SKILL_TAXONOMY) + 1
+
+
+def test_tokenize_keeps_symbols():
+    assert tokenize("C++, C#, .NET and CI/CD") == ["c++", "c#", ".net", "and", "ci/cd"]
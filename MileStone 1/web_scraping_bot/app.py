@@ -1,13 +1,22 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response
 from scraper import ScrapingChatbot
+import metrics
+import profiling
+import responses
+from page_content import PAGINATED_SECTIONS, SECTIONS
 import asyncio
+import atexit
+import json
 import os
 import logging
+import threading
+import time
+import uuid
 from functools import partial
 import nest_asyncio
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging (set LOG_LEVEL=DEBUG for per-request detail)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
 # Enable nested event loops
@@ -18,10 +27,173 @@ app = Flask(__name__)
 # Initialize chatbot
 chatbot = ScrapingChatbot()
 
+# The chatbot's aiohttp session is bound to the event loop that created it,
+# but Flask runs every async view in a fresh loop. All chatbot coroutines
+# therefore run on one persistent loop in a background thread.
+chatbot_loop = asyncio.new_event_loop()
+chatbot_thread = threading.Thread(target=chatbot_loop.run_forever, name="chatbot-loop", daemon=True)
+chatbot_thread.start()
+
+def run_on_chatbot_loop(coro):
+    """Schedule a coroutine on the chatbot loop and await it from any loop."""
+    return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, chatbot_loop))
+
+@atexit.register
+def close_browser_pool():
+    """Stop the headless browser pool, if JS rendering started one."""
+    if chatbot.bot.browser_pool is not None and chatbot_loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(chatbot.bot.close_browser_pool(), chatbot_loop).result(timeout=10)
+        except Exception as e:
+            logger.warning('Error closing browser pool: %s', e)
+
+@atexit.register
+def close_knowledge_base():
+    """Let a running knowledge base merge or IVF training finish, and close the version store, before exiting."""
+    if chatbot.knowledge_base is not None:
+        chatbot.knowledge_base.close()
+    if chatbot.semantic_index is not None:
+        chatbot.semantic_index.close()
+    if chatbot.page_versions is not None:
+        chatbot.page_versions.close()
+
+# Opt-in profiling: per-request via X-Profile header or ?profile=, and an
+# optional always-on low-rate sampler (PROFILE_SAMPLE_HZ). Profiles expose
+# code paths and page data, so nothing is captured or served unless
+# PROFILE_ENABLED=1
+profiling_enabled = os.getenv('PROFILE_ENABLED', '0').lower() in ('1', 'true', 'yes')
+profile_store = profiling.ProfileStore(os.getenv('PROFILE_DIR', 'profiles'))
+global_sampler = None
+if profiling_enabled and float(os.getenv('PROFILE_SAMPLE_HZ', '0')) > 0:
+    global_sampler = profiling.GlobalSampler(float(os.getenv('PROFILE_SAMPLE_HZ'))).start()
+
+# CHAT_TRAFFIC_LOG records /chat requests as JSONL for benchmarks/load_chat.py to replay
+traffic_log = os.getenv('CHAT_TRAFFIC_LOG')
+traffic_lock = threading.Lock()
+
+def record_traffic(data, session_id=None):
+    entry = {'time': time.time(), **data}
+    if session_id:
+        entry['session_id'] = session_id
+    with traffic_lock, open(traffic_log, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+
 @app.route('/')
 def home():
     return render_template('index.html')
 
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def profiling_disabled():
+    return jsonify({'error': 'Profiling is disabled; set PROFILE_ENABLED=1'}), 404
+
+@app.route('/profiles')
+def list_profiles():
+    if not profiling_enabled:
+        return profiling_disabled()
+    return jsonify({'profiles': profile_store.list()})
+
+@app.route('/profiles/hot')
+def hot_stacks():
+    if not profiling_enabled:
+        return profiling_disabled()
+    if global_sampler is None:
+        return jsonify({'error': 'Global sampling is disabled; set PROFILE_SAMPLE_HZ'}), 404
+    return Response(global_sampler.snapshot(), mimetype='text/plain')
+
+@app.route('/profiles/<profile_id>')
+def get_profile(profile_id):
+    if not profiling_enabled:
+        return profiling_disabled()
+    path = profile_store.artifact_path(profile_id)
+    if path is None or not path.exists():
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path, as_attachment=True)
+
+def parse_projection(data):
+    """Fields and per-section item limits requested for a scrape response.
+
+    ``fields`` is a list (or comma-separated string) of content sections,
+    defaulting to all of them. ``limit`` is either one item limit for every
+    paginated section or a ``{section: limit}`` mapping.
+    """
+    fields = data.get('fields') or request.args.get('fields') or list(SECTIONS)
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    limit = data.get('limit', request.args.get('limit'))
+    if isinstance(limit, dict):
+        limits = limit
+    elif limit is not None:
+        limits = {section: limit for section in PAGINATED_SECTIONS}
+    else:
+        limits = {}
+    try:
+        limits = {section: int(value) for section, value in limits.items() if value is not None}
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer or a mapping of section to integer")
+    if any(value < 0 for value in limits.values()):
+        raise ValueError("limit must not be negative")
+    return fields, limits
+
+def project_content(content, fields, limits, url):
+    """Selected sections of a page, with paginated sections cut to their limits."""
+    response, totals, cursors = {}, {}, {}
+    for field in fields:
+        if field in PAGINATED_SECTIONS:
+            total = content.section_length(field)
+            limit = limits.get(field)
+            response[field] = content.section_slice(field, 0, limit)
+            totals[field] = total
+            if limit is not None and limit < total:
+                cursors[field] = responses.encode_cursor(url, field, limit)
+        else:
+            response[field] = content[field]
+    return {'response': response, 'totals': totals, 'cursors': cursors}
+
+@app.route('/content', methods=['GET'])
+def content_page():
+    """Next page of a section of the current content, from a scrape response cursor."""
+    content = chatbot.current_content
+    if not content:
+        return jsonify({'error': 'No content has been scraped'}), 404
+    try:
+        section, offset = responses.decode_cursor(request.args.get('cursor', ''), chatbot.current_url)
+        limit = int(request.args.get('limit', 100))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if section not in PAGINATED_SECTIONS or limit <= 0:
+        return jsonify({'error': 'Invalid cursor or limit'}), 400
+
+    total = content.section_length(section)
+    end = min(offset + limit, total)
+    payload = {
+        'section': section,
+        'items': content.section_slice(section, offset, end),
+        'total': total,
+        'cursor': responses.encode_cursor(chatbot.current_url, section, end) if end < total else None
+    }
+    return responses.json_response(payload, accept_encoding=request.headers.get('Accept-Encoding', ''))
+
+@app.route('/changes', methods=['GET'])
+def changes():
+    """Block-level changes of scraped pages after sequence number ``since``, oldest first."""
+    if chatbot.page_versions is None:
+        return jsonify({'error': 'Page versions are disabled'}), 404
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', 500)), 5000)
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+    items = chatbot.page_versions.changes(since, request.args.get('url'), limit)
+    payload = {'changes': items, 'next_since': items[-1]['seq'] if items else since}
+    return responses.json_response(payload, accept_encoding=request.headers.get('Accept-Encoding', ''))
+
 @app.route('/chat', methods=['POST'])
 async def chat():
     try:
@@ -33,48 +205,70 @@ async def chat():
         if not message:
             return jsonify({'error': 'Message is required'}), 400
 
+        if traffic_log:
+            record_traffic(data, data.get('session_id') or request.cookies.get('chat_session'))
+
         # Handle URL scraping
         if message.startswith(('http://', 'https://')):
             try:
-                content = await chatbot.scrape_url(message)
+                fields, limits = parse_projection(data)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            profile_mode = profiling.requested_mode(request.headers, request.args) if profiling_enabled else None
+            profiler = None
+            if profile_mode:
+                profiler = profiling.RequestProfiler(
+                    profile_mode, profile_store, thread_ids=[chatbot_thread.ident]
+                ).start()
+            stats = {}
+            profile_id = None
+            try:
+                scrape = chatbot.scrape_url(message, stats=stats)
+                if profiler:
+                    scrape = profiler.profile_coroutine(scrape)
+                content = await run_on_chatbot_loop(scrape)
+                if profiler:
+                    profile_id = profiler.finish(stats or {'url': message})
+                    profiler = None
                 
                 if content:
-                    # Format the response for better JSON serialization
-                    response = {
-                        'title': content.get('title', ''),
-                        'meta_description': content.get('meta_description', ''),
-                        'headings': content.get('headings', {}),
-                        'paragraphs': content.get('paragraphs', []),
-                        'images': content.get('images', []),
-                        'links': content.get('links', []),
-                        'lists': content.get('lists', {'ordered': [], 'unordered': []}),
-                        'tables': content.get('tables', []),
-                        'contact_info': content.get('contact_info', {
-                            'emails': [],
-                            'phones': [],
-                            'addresses': []
-                        }),
-                        'social_links': content.get('social_links', [])
-                    }
-                    return jsonify({'response': response, 'message': 'Content scraped successfully!'})
+                    payload = project_content(content, fields, limits, message)
+                    payload['message'] = 'Content scraped successfully!'
+                    if 'version' in stats:
+                        payload['version'] = stats['version']
+                    if 'duplicate_of' in stats:
+                        payload['duplicate_of'] = stats['duplicate_of']
+                    result = responses.json_response(payload, accept_encoding=request.headers.get('Accept-Encoding', ''))
+                    if profile_id:
+                        result.headers['X-Profile-Id'] = profile_id
+                    return result
                 else:
                     logger.error('No content found in scraping response')
                     return jsonify({'error': 'No content found on the webpage'}), 404
             except Exception as e:
-                logger.error(f'Error during scraping: {str(e)}')
+                logger.error('Error during scraping: %s', e)
                 return jsonify({'error': f'Failed to scrape webpage: {str(e)}'}), 500
+            finally:
+                if profiler:
+                    profiler.finish(stats or {'url': message})
         
         # Handle questions about scraped content
         else:
             try:
-                answer = chatbot.chat_with_groq(message)
-                return jsonify({'response': answer})
+                session_id = data.get('session_id') or request.cookies.get('chat_session') or uuid.uuid4().hex
+                scope = data.get('scope') or request.args.get('scope')
+                if scope not in (None, 'page', 'all'):
+                    return jsonify({'error': "scope must be 'page' or 'all'"}), 400
+                answer = chatbot.chat_with_groq(message, session_id=session_id, scope=scope)
+                result = jsonify({'response': answer, 'session_id': session_id})
+                result.set_cookie('chat_session', session_id, httponly=True, samesite='Lax')
+                return result
             except Exception as e:
-                logger.error(f'Error during chat: {str(e)}')
+                logger.error('Error during chat: %s', e)
                 return jsonify({'error': f'Failed to get answer: {str(e)}'}), 500
 
     except Exception as e:
-        logger.error(f'Unexpected error in chat endpoint: {str(e)}')
+        logger.error('Unexpected error in chat endpoint: %s', e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/export', methods=['POST'])
@@ -95,14 +289,14 @@ async def export_data():
             filename = chatbot.export_data([chatbot.current_content], format_type)
             return send_file(filename, as_attachment=True)
         except Exception as e:
-            logger.error(f'Error during export: {str(e)}')
+            logger.error('Error during export: %s', e)
             return jsonify({'error': str(e)}), 500
         finally:
             # Clean up the file after sending
             if 'filename' in locals() and os.path.exists(filename):
                 os.remove(filename)
     except Exception as e:
-        logger.error(f'Unexpected error in export endpoint: {str(e)}')
+        logger.error('Unexpected error in export endpoint: %s', e)
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
@@ -0,0 +1,143 @@
+"""Benchmark for the local embedding service and vector store.
+
+Measures:
+  * with torch and transformers installed, embedding throughput in chunks
+    per second: fp32 against int8 dynamic quantization, and many concurrent
+    single-text callers through the micro-batcher
+  * vector search latency and recall@k for brute force (float32 and
+    float16 storage) and IVF at several ``nprobe`` settings, on synthetic
+    clustered unit vectors
+
+Example:
+    python benchmarks/bench_embeddings.py --vectors 1000000 -o embed_results.json
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_scraping import summarize  # noqa: E402
+from corpus import load_corpus  # noqa: E402
+from embeddings import DEFAULT_MODEL, Embedder, EmbeddingService, VectorStore, available  # noqa: E402
+from knowledge_base import chunk_page  # noqa: E402
+from web_scraping_bot import WebScrapingBot  # noqa: E402
+
+
+def corpus_chunks(limit: int):
+    bot = WebScrapingBot()
+    chunks = []
+    for html in load_corpus().values():
+        chunks.extend(chunk_page(bot._extract_main_content(html)))
+    return (chunks * (limit // max(len(chunks), 1) + 1))[:limit]
+
+
+def bench_model(model: str, chunks, callers: int) -> Dict:
+    results = {}
+    for quantize in (False, True):
+        embedder = Embedder(model, quantize=quantize)
+        embedder.encode(chunks[:8])  # load and warm up
+        started = time.perf_counter()
+        embedder.encode(chunks)
+        results['int8' if quantize else 'fp32'] = {'chunks_per_second': len(chunks) / (time.perf_counter() - started)}
+
+    # Concurrent callers, one text each, coalesced by the micro-batcher
+    service = EmbeddingService(Embedder(model), cache_size=0)
+    service.embed(chunks[:8])
+    started = time.perf_counter()
+    with ThreadPoolExecutor(callers) as pool:
+        list(pool.map(lambda text: service.embed([text]), chunks))
+    results['micro_batched'] = {'chunks_per_second': len(chunks) / (time.perf_counter() - started),
+                                'callers': callers}
+    return results
+
+
+def clustered_vectors(count: int, dimension: int, topics: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors scattered around random topic centres, like text embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dimension)).astype(np.float32)
+    vectors = np.empty((count, dimension), dtype=np.float32)
+    for start in range(0, count, 100000):
+        stop = min(start + 100000, count)
+        block = centres[rng.integers(0, topics, stop - start)]
+        block += 0.6 * rng.standard_normal(block.shape).astype(np.float32)
+        vectors[start:stop] = block
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def bench_store(count: int, dimension: int, queries: int, k: int) -> Dict:
+    vectors = clustered_vectors(count, dimension, topics=max(count // 500, 10))
+    rng = np.random.default_rng(1)
+    query_vectors = vectors[rng.integers(0, count, queries)]
+    query_vectors = query_vectors + 0.3 * rng.standard_normal(query_vectors.shape).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+
+    def run(store, nprobe):
+        latencies, found = [], []
+        for query in query_vectors:
+            started = time.perf_counter()
+            found.append({row for _, row in store.search(query, k, nprobe)})
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies, found
+
+    results = {}
+    directory = Path(tempfile.mkdtemp(prefix='embed_bench_'))
+    try:
+        exact = None
+        for dtype in (np.float32, np.float16):
+            store = VectorStore(str(directory / np.dtype(dtype).name), dimension, dtype)
+            store.add(vectors)
+            latencies, found = run(store, None)
+            exact = exact or found
+            results[f'brute_{np.dtype(dtype).name}'] = {'query_ms': summarize(latencies), 'recall': 1.0}
+        started = time.perf_counter()
+        store.train_ivf()
+        results['ivf_train_seconds'] = time.perf_counter() - started
+        for nprobe in (8, 16, 32, 64):
+            latencies, found = run(store, nprobe)
+            recall = float(np.mean([len(a & b) / k for a, b in zip(exact, found)]))
+            results[f'ivf_nprobe_{nprobe}'] = {'query_ms': summarize(latencies), 'recall': recall}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark local embeddings and vector search.")
+    parser.add_argument("-o", "--output", type=Path, default=Path("embed_results.json"), help="Results JSON file")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Sentence-embedding model")
+    parser.add_argument("--chunks", type=int, default=512, help="Corpus chunks to embed")
+    parser.add_argument("--callers", type=int, default=32, help="Concurrent callers for the micro-batcher")
+    parser.add_argument("--vectors", type=int, default=200000, help="Vectors in the search benchmark")
+    parser.add_argument("--dimension", type=int, default=384, help="Vector dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Queries to time")
+    parser.add_argument("-k", type=int, default=10, help="Results per query")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if available():
+        results['model'] = bench_model(args.model, corpus_chunks(args.chunks), args.callers)
+        for name, run in results['model'].items():
+            print(f"Embed {name:14} {run['chunks_per_second']:8.1f} chunks/s")
+    else:
+        print("torch/transformers not installed; skipping the embedding throughput benchmark")
+    results['search'] = bench_store(args.vectors, args.dimension, args.queries, args.k)
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    for name, run in results['search'].items():
+        if isinstance(run, dict):
+            print(f"Search {name:16} p50 {run['query_ms']['p50']:7.2f} ms  p95 {run['query_ms']['p95']:7.2f} ms"
+                  f"  recall@{args.k} {run['recall']:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
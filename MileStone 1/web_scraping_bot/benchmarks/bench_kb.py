@@ -0,0 +1,114 @@
+"""Benchmark for the knowledge base.
+
+Builds a knowledge base of synthetic pages, with Zipf-distributed words so
+that posting-list lengths look like real text, and measures:
+  * ingest throughput, with segments written in batches and merged
+  * time to open the knowledge base (mmap of existing segments)
+  * query latency (p50/p95/p99) for 1-4 word queries mixing common and
+    rare terms
+
+Example:
+    python benchmarks/bench_kb.py --chunks 1000000 -o kb_results.json
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_scraping import summarize  # noqa: E402
+from knowledge_base import KnowledgeBase  # noqa: E402
+
+CHUNKS_PER_PAGE = 10
+WORDS_PER_CHUNK = 80
+
+
+def vocabulary(size: int) -> List[str]:
+    rng = np.random.default_rng(7)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    return [''.join(rng.choice(letters, rng.integers(4, 10))) + str(i) for i in range(size)]
+
+
+def synthetic_pages(words: List[str], chunks: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(1.2, chunks * WORDS_PER_CHUNK), len(words)) - 1
+    for page in range(chunks // CHUNKS_PER_PAGE):
+        blocks = []
+        for chunk in range(CHUNKS_PER_PAGE):
+            start = (page * CHUNKS_PER_PAGE + chunk) * WORDS_PER_CHUNK
+            blocks.append(' '.join(words[r] for r in ranks[start:start + WORDS_PER_CHUNK]))
+        # Chunks are packed up to 1000 chars, so each block becomes its own chunk
+        yield f'https://bench.example/page/{page}', {'title': f'Page {page}', 'main_text': blocks}
+
+
+def bench_kb(directory: Path, chunks: int, batch_pages: int, queries: int) -> Dict:
+    words = vocabulary(50000)
+    kb = KnowledgeBase(str(directory), background_merge=False)
+    started = time.perf_counter()
+    batch = []
+    for page in synthetic_pages(words, chunks):
+        batch.append(page)
+        if len(batch) == batch_pages:
+            kb.add_pages(batch)
+            batch = []
+    kb.add_pages(batch)
+    ingest_seconds = time.perf_counter() - started
+    stats = kb.stats()
+    kb.close()
+
+    started = time.perf_counter()
+    kb = KnowledgeBase(str(directory), background_merge=False)
+    open_ms = (time.perf_counter() - started) * 1000
+
+    rng = np.random.default_rng(1)
+    latencies = []
+    for _ in range(queries):
+        # One or two common words plus rarer ones, like a natural question
+        terms = [words[int(r)] for r in rng.integers(0, 200, rng.integers(1, 3))]
+        terms += [words[int(r)] for r in rng.integers(200, len(words), rng.integers(0, 3))]
+        started = time.perf_counter()
+        kb.search(' '.join(terms))
+        latencies.append((time.perf_counter() - started) * 1000)
+    kb.close()
+    return {
+        'chunks': stats['chunks'],
+        'segments': stats['segments'],
+        'index_mb': stats['bytes'] / 1e6,
+        'ingest_chunks_per_second': stats['chunks'] / ingest_seconds,
+        'open_ms': open_ms,
+        'query_ms': summarize(latencies),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark knowledge base ingest, open time and queries.")
+    parser.add_argument("-o", "--output", type=Path, default=Path("kb_results.json"), help="Results JSON file")
+    parser.add_argument("--chunks", type=int, default=200000, help="Chunks to index")
+    parser.add_argument("--batch-pages", type=int, default=2000, help="Pages per added segment")
+    parser.add_argument("--queries", type=int, default=500, help="Queries to time")
+    parser.add_argument("--directory", type=Path, help="Keep the knowledge base here instead of a temp dir")
+    args = parser.parse_args(argv)
+
+    directory = args.directory or Path(tempfile.mkdtemp(prefix='kb_bench_'))
+    try:
+        results = bench_kb(directory, args.chunks, args.batch_pages, args.queries)
+    finally:
+        if args.directory is None:
+            shutil.rmtree(directory, ignore_errors=True)
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    query = results['query_ms']
+    print(f"{results['chunks']} chunks in {results['segments']} segments, {results['index_mb']:.0f} MB; "
+          f"ingest {results['ingest_chunks_per_second']:.0f} chunks/s; open {results['open_ms']:.1f} ms")
+    print(f"Query latency: p50 {query['p50']:.2f} ms, p95 {query['p95']:.2f} ms, p99 {query['p99']:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
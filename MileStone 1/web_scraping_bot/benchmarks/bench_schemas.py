@@ -0,0 +1,77 @@
+"""Benchmark for typed decoding of page records and chat completions.
+
+Compares ``schemas`` (msgspec when installed, else the stdlib fallback)
+with the previous path for:
+  * page records, one JSONL line per corpus page as written by
+    ``crawler.py``: ``json.loads`` versus ``decode_page_record``
+  * chat completion bodies: ``json.loads`` plus dict indexing versus
+    ``decode_completion``
+
+Example:
+    python benchmarks/bench_schemas.py --copies 20
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import schemas  # noqa: E402
+from corpus import load_corpus  # noqa: E402
+from web_scraping_bot import WebScrapingBot  # noqa: E402
+
+
+def time_ms(func, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def legacy_completion_text(body: bytes):
+    result = json.loads(body)
+    if 'choices' in result and len(result['choices']) > 0:
+        return result['choices'][0]['message']['content'].strip()
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark typed decoding of page records and completions.")
+    parser.add_argument("--copies", type=int, default=20, help="Records per corpus page")
+    parser.add_argument("--runs", type=int, default=7, help="Samples per measurement")
+    args = parser.parse_args(argv)
+
+    bot = WebScrapingBot()
+    records = [json.dumps({'url': f'https://bench.example/{name}', 'depth': 1,
+                           **bot._extract_main_content(html)}).encode('utf-8')
+               for name, html in load_corpus().items()] * args.copies
+    completion = json.dumps({
+        "id": "chatcmpl-bench", "object": "chat.completion", "model": "mixtral-8x7b-32768",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": "An answer citing [1]. " * 40}}],
+        "usage": {"prompt_tokens": 3000, "completion_tokens": 400, "total_tokens": 3400}
+    }).encode('utf-8')
+
+    assert schemas.decode_completion(completion).text == legacy_completion_text(completion)
+    backend = "msgspec" if schemas.msgspec is not None else "stdlib fallback"
+    megabytes = sum(len(r) for r in records) / 1e6
+    rows = [
+        (f"Page records ({len(records)})", lambda: [json.loads(r) for r in records],
+         lambda: [schemas.decode_page_record(r) for r in records]),
+        ("Completion x10000", lambda: [legacy_completion_text(completion) for _ in range(10000)],
+         lambda: [schemas.decode_completion(completion).text for _ in range(10000)]),
+    ]
+    print(f"Typed decoding with {backend}, page records {megabytes:.1f} MB")
+    for name, old, new in rows:
+        old_ms, new_ms = time_ms(old, args.runs), time_ms(new, args.runs)
+        print(f"{name:24} previous {old_ms:8.2f} ms  typed {new_ms:8.2f} ms  ({old_ms / new_ms:4.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
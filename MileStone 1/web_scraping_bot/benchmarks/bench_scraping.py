@@ -0,0 +1,392 @@
+"""Offline benchmark for the scraping pipeline.
+
+Serves the benchmark corpus from a local aiohttp server and measures:
+  * fetch throughput of ``WebScrapingBot.scrape_webpage``
+  * extraction time per page and per content section
+  * peak memory while extracting each page
+  * how much the main-content scorer shrinks the chat context for each page
+  * retained memory of each page as nested dicts versus ``PageContent``
+  * /chat scrape payload size and serialization time: full stdlib JSON versus
+    a projected, compressed response as requested by the web UI
+  * end-to-end ``/chat`` scrape latency (p50/p95/p99) through the Flask app
+  * with ``--render``, per-page cost of the pooled headless browser against a
+    cold browser launch (requires Playwright)
+
+Results are written as JSON; pass ``--baseline`` to compare against an
+earlier run and fail when any metric regresses by more than ``--threshold``.
+
+Example:
+    python benchmarks/bench_scraping.py -o bench_results.json
+    python benchmarks/bench_scraping.py --baseline bench_results.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aiohttp import web  # noqa: E402
+
+from corpus import CORPUS_VERSION, load_corpus, load_manifest  # noqa: E402
+from browser_pool import BrowserPool  # noqa: E402
+from content_scorer import chat_context  # noqa: E402
+from page_content import PAGINATED_SECTIONS, PageContent  # noqa: E402
+import responses  # noqa: E402
+from web_scraping_bot import CONTENT_SECTIONS, WebScrapingBot  # noqa: E402
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def deep_sizeof(obj, seen=None) -> int:
+    """Approximate retained size of an object graph in bytes."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__") and not isinstance(obj, (str, bytes)):
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(obj, slot):
+                    size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "mean": statistics.fmean(samples) if samples else 0.0,
+    }
+
+
+class CorpusServer:
+    """Serves corpus pages at ``/pages/<name>`` from a background thread"""
+
+    def __init__(self, pages: Dict[str, str]):
+        self.pages = pages
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    async def _handle(self, request):
+        html = self.pages.get(request.match_info["name"])
+        if html is None:
+            raise web.HTTPNotFound()
+        return web.Response(text=html, content_type="text/html")
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_get("/pages/{name}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self.port}/pages/{name}"
+
+    def stop(self):
+        async def _shutdown():
+            await self._runner.cleanup()
+            self._loop.stop()
+        asyncio.run_coroutine_threadsafe(_shutdown(), self._loop)
+        self._thread.join(timeout=5)
+
+
+async def bench_fetch(server: CorpusServer, pages: Dict[str, str], rounds: int, concurrency: int) -> Dict:
+    bot = WebScrapingBot()
+    await bot.init_session()
+    urls = [server.url(name) for name in pages for _ in range(rounds)]
+    semaphore = asyncio.Semaphore(concurrency)
+    total_bytes = 0
+
+    async def fetch(url):
+        nonlocal total_bytes
+        async with semaphore:
+            html = await bot.scrape_webpage(url)
+            total_bytes += len(html.encode("utf-8"))
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(url) for url in urls))
+        elapsed = time.perf_counter() - start
+    finally:
+        await bot.close_session()
+    return {
+        "pages": len(urls),
+        "seconds": elapsed,
+        "pages_per_second": len(urls) / elapsed,
+        "mb_per_second": total_bytes / elapsed / 1e6,
+    }
+
+
+def bench_extraction(pages: Dict[str, str], rounds: int) -> Dict:
+    bot = WebScrapingBot()
+    results = {}
+    for name, html in pages.items():
+        totals, parse_times = [], []
+        sections = {section: [] for section in CONTENT_SECTIONS}
+        for _ in range(rounds):
+            start = time.perf_counter()
+            soup = bot._parse_html(html)
+            parse_times.append(time.perf_counter() - start)
+            for section in CONTENT_SECTIONS:
+                section_start = time.perf_counter()
+                getattr(bot, f"_extract_{section}")(soup)
+                sections[section].append(time.perf_counter() - section_start)
+            totals.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        content = bot._extract_main_content(html)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        all_chars = len(chat_context(content, region="all"))
+        main_chars = len(chat_context(content, region="main"))
+        compact = PageContent.from_dict(content)
+        if compact.to_dict() != content:
+            raise RuntimeError(f"PageContent round trip changed the content of {name}")
+        dict_bytes, compact_bytes = deep_sizeof(content), deep_sizeof(compact)
+
+        results[name] = {
+            "bytes": len(html.encode("utf-8")),
+            "extract_ms": statistics.median(totals) * 1000,
+            "parse_ms": statistics.median(parse_times) * 1000,
+            "sections_ms": {s: statistics.median(t) * 1000 for s, t in sections.items()},
+            "peak_memory_mb": peak / 1e6,
+            "context_chars": {"all": all_chars, "main": main_chars},
+            "context_reduction": 1 - main_chars / all_chars if all_chars else 0.0,
+            "content_bytes": {"dict": dict_bytes, "compact": compact_bytes},
+        }
+    return results
+
+
+# What the web UI asks for when it scrapes a page
+UI_FIELDS = ("title", "meta_description", "headings", "paragraphs", "links")
+UI_PAGE_SIZE = 100
+
+
+def bench_response(pages: Dict[str, str], rounds: int) -> Dict:
+    bot = WebScrapingBot()
+    results = {}
+    for name, html in pages.items():
+        content = PageContent.from_dict(bot._extract_main_content(html))
+        full_times, projected_times = [], []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            full = json.dumps({"response": content.to_dict()}).encode("utf-8")
+            full_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            projected = {
+                field: content.section_slice(field, 0, UI_PAGE_SIZE) if field in PAGINATED_SECTIONS else content[field]
+                for field in UI_FIELDS
+            }
+            body = responses.dumps({"response": projected})
+            compressed = responses.compress(body, "br" if responses.brotli else "gzip")
+            projected_times.append(time.perf_counter() - start)
+        results[name] = {
+            "full_bytes": len(full),
+            "projected_bytes": len(compressed),
+            "full_ms": statistics.median(full_times) * 1000,
+            "projected_ms": statistics.median(projected_times) * 1000,
+        }
+    return results
+
+
+def bench_chat(server: CorpusServer, pages: Dict[str, str], rounds: int) -> Dict:
+    # The app opens its knowledge base, version store and session store on
+    # import, so point them at a scratch directory. Registered before app's
+    # atexit hooks, so it is removed after they close the stores.
+    state_dir = tempfile.mkdtemp(prefix="bench_chat_")
+    atexit.register(shutil.rmtree, state_dir, True)
+    os.environ["CHAT_KB_DIR"] = os.path.join(state_dir, "knowledge_base")
+    os.environ["CHAT_VERSIONS_DB"] = os.path.join(state_dir, "page_versions.db")
+    os.environ["CHAT_SESSION_DIR"] = os.path.join(state_dir, "chat_sessions")
+    os.environ["PROFILE_DIR"] = os.path.join(state_dir, "profiles")
+    import app as chat_app
+
+    client = chat_app.app.test_client()
+    latencies = {}
+    all_samples = []
+    for name in pages:
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            response = client.post("/chat", json={"message": server.url(name)})
+            samples.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f"/chat failed for {name}: {response.status_code} {response.get_data(as_text=True)[:200]}")
+        latencies[name] = summarize(samples)
+        all_samples.extend(samples)
+    return {"overall_ms": summarize(all_samples), "pages_ms": latencies}
+
+
+async def bench_render(server: CorpusServer, pages: Dict[str, str], rounds: int) -> Dict:
+    cold = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        pool = BrowserPool(size=1)
+        try:
+            await pool.render(server.url(next(iter(pages))))
+        finally:
+            await pool.close()
+        cold.append((time.perf_counter() - start) * 1000)
+
+    pool = BrowserPool(size=2)
+    await pool.start()
+    warm = []
+    try:
+        for name in pages:
+            for _ in range(rounds):
+                start = time.perf_counter()
+                await pool.render(server.url(name))
+                warm.append((time.perf_counter() - start) * 1000)
+    finally:
+        await pool.close()
+    return {"cold_launch_ms": summarize(cold), "pooled_ms": summarize(warm)}
+
+
+# Metrics compared against a baseline: (path, higher_is_better)
+def comparable_metrics(results: Dict) -> Dict[str, tuple]:
+    metrics = {
+        "fetch.pages_per_second": (results["fetch"]["pages_per_second"], True),
+    }
+    for name, page in results["extraction"].items():
+        metrics[f"extraction.{name}.extract_ms"] = (page["extract_ms"], False)
+        metrics[f"extraction.{name}.peak_memory_mb"] = (page["peak_memory_mb"], False)
+        if "content_bytes" in page:
+            metrics[f"extraction.{name}.compact_bytes"] = (page["content_bytes"]["compact"], False)
+    for name, page in results.get("response", {}).items():
+        metrics[f"response.{name}.projected_bytes"] = (page["projected_bytes"], False)
+        metrics[f"response.{name}.projected_ms"] = (page["projected_ms"], False)
+    if "render" in results:
+        metrics["render.pooled_ms.p50"] = (results["render"]["pooled_ms"]["p50"], False)
+    if "chat" in results:
+        for pct in ("p50", "p95", "p99"):
+            metrics[f"chat.overall_ms.{pct}"] = (results["chat"]["overall_ms"][pct], False)
+    return metrics
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Return descriptions of metrics that regressed beyond ``threshold``"""
+    if baseline.get("corpus_version") != results["corpus_version"]:
+        return [f"corpus version changed ({baseline.get('corpus_version')} -> {results['corpus_version']})"]
+    regressions = []
+    current = comparable_metrics(results)
+    for key, (old_value, higher_is_better) in comparable_metrics(baseline).items():
+        if key not in current or old_value == 0:
+            continue
+        new_value = current[key][0]
+        change = (new_value - old_value) / old_value
+        if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+            regressions.append(f"{key}: {old_value:.3f} -> {new_value:.3f} ({change:+.1%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scraping pipeline against a local corpus.")
+    parser.add_argument("-o", "--output", type=Path, default=Path("bench_results.json"), help="Results JSON file")
+    parser.add_argument("--rounds", type=int, default=5, help="Repetitions per page")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent fetches")
+    parser.add_argument("--pages", nargs="+", help="Only benchmark these corpus pages")
+    parser.add_argument("--render", action="store_true", help="Benchmark the headless browser pool")
+    parser.add_argument("--skip-chat", action="store_true", help="Skip the /chat end-to-end benchmark")
+    parser.add_argument("--baseline", type=Path, help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed fractional regression")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    pages = load_corpus()
+    if args.pages:
+        pages = {name: html for name, html in pages.items() if name in args.pages}
+
+    recorded = [entry["name"] for entry in load_manifest().get("recorded", []) if entry["name"] in pages]
+
+    server = CorpusServer(pages).start()
+    try:
+        results = {
+            "corpus_version": CORPUS_VERSION,
+            "recorded_pages": recorded,
+            "rounds": args.rounds,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "fetch": asyncio.run(bench_fetch(server, pages, args.rounds, args.concurrency)),
+            "extraction": bench_extraction(pages, args.rounds),
+            "response": bench_response(pages, args.rounds),
+        }
+        if args.render:
+            results["render"] = asyncio.run(bench_render(server, pages, args.rounds))
+        if not args.skip_chat:
+            results["chat"] = bench_chat(server, pages, args.rounds)
+    finally:
+        server.stop()
+
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if not recorded:
+        print("Corpus: synthetic pages only; record real pages with benchmarks/corpus.py --record")
+    print(f"Fetch: {results['fetch']['pages_per_second']:.1f} pages/s, {results['fetch']['mb_per_second']:.1f} MB/s")
+    for name, page in results["extraction"].items():
+        print(f"Extract {name:30} {page['extract_ms']:9.2f} ms  peak {page['peak_memory_mb']:7.1f} MB"
+              f"  context {-page['context_reduction']:+.0%}"
+              f"  content {page['content_bytes']['dict'] / 1024:.0f} KiB dict / "
+              f"{page['content_bytes']['compact'] / 1024:.0f} KiB compact")
+    for name, page in results["response"].items():
+        print(f"Response {name:29} {page['full_bytes'] / 1024:9.0f} KiB {page['full_ms']:7.2f} ms full"
+              f"  -> {page['projected_bytes'] / 1024:7.1f} KiB {page['projected_ms']:6.2f} ms projected")
+    if "render" in results:
+        render = results["render"]
+        print(f"Render: cold launch p50 {render['cold_launch_ms']['p50']:.1f} ms, "
+              f"pooled p50 {render['pooled_ms']['p50']:.1f} ms")
+    if "chat" in results:
+        overall = results["chat"]["overall_ms"]
+        print(f"/chat latency: p50 {overall['p50']:.1f} ms, p95 {overall['p95']:.1f} ms, p99 {overall['p99']:.1f} ms")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+        if regressions:
+            print("Regressions over threshold:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            return 1
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Benchmark for re-scraping pages that changed little or not at all.
+
+Indexes synthetic pages, then re-scrapes them with a fraction edited (one
+paragraph replaced, one inserted) and compares, per round:
+  * previous: every page re-indexed from scratch (``delete_url`` then
+    ``add_page``, as a re-scrape used to do)
+  * versioned: ``VersionStore.record`` first; unchanged pages stop there,
+    changed pages update the knowledge base in place
+
+Example:
+    python benchmarks/bench_versions.py --pages 200 --changed 0.05
+"""
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from knowledge_base import KnowledgeBase  # noqa: E402
+from page_versions import VersionStore  # noqa: E402
+
+WORDS = ("data service platform customer product team support release update guide network secure cloud "
+         "report value market design system people access share account feature search result policy").split()
+
+
+def make_page(rng: random.Random, paragraphs: int):
+    texts = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 70))) + '.' for _ in range(paragraphs)]
+    return {'title': 'Page', 'headings': {'1': ['Overview']}, 'paragraphs': texts, 'main_text': list(texts)}
+
+
+def edit_page(rng: random.Random, page):
+    texts = list(page['main_text'])
+    texts[rng.randrange(len(texts))] = ' '.join(rng.choice(WORDS) for _ in range(40)) + '.'
+    texts.insert(rng.randrange(len(texts)), ' '.join(rng.choice(WORDS) for _ in range(30)) + '.')
+    return dict(page, paragraphs=texts, main_text=list(texts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark incremental re-scrapes.")
+    parser.add_argument("--pages", type=int, default=200, help="Pages to index")
+    parser.add_argument("--paragraphs", type=int, default=200, help="Paragraphs per page")
+    parser.add_argument("--changed", type=float, default=0.05, help="Fraction of pages edited per round")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    pages = {f'https://bench.example/{i}': make_page(rng, args.paragraphs) for i in range(args.pages)}
+    edited = {url: edit_page(rng, page) if rng.random() < args.changed else page for url, page in pages.items()}
+    directory = tempfile.mkdtemp(prefix='bench_versions_')
+    try:
+        for mode in ('previous', 'versioned'):
+            kb = KnowledgeBase(f'{directory}/{mode}', background_merge=False)
+            store = VersionStore(f'{directory}/{mode}.db')
+            for url, page in pages.items():
+                store.record(url, page)
+                kb.add_page(url, page)
+            written = changed = 0
+            started = time.perf_counter()
+            for url, page in edited.items():
+                if mode == 'previous':
+                    kb.delete_url(url)
+                    written += kb.add_page(url, page)
+                    continue
+                diff = store.record(url, page)
+                if diff.changed:
+                    changed += 1
+                    written += kb.add_page(url, page)
+            elapsed = time.perf_counter() - started
+            print(f"{mode:9} {elapsed * 1000:9.1f} ms for {len(edited)} pages "
+                  f"({elapsed * 1e6 / len(edited):7.0f} us/page), {written} chunks written"
+                  + (f", {changed} pages changed" if mode == 'versioned' else ''))
+            store.close()
+            kb.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
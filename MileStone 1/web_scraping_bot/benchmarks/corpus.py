@@ -0,0 +1,201 @@
+"""Versioned HTML corpus for the scraping benchmarks.
+
+The corpus mixes recorded real-world pages (``corpus/pages/*.html``, listed
+in ``corpus/manifest.json``) with deterministic synthetic pages that cover the
+shapes we care about: small, huge, deeply nested, table-heavy, link-heavy and
+boilerplate-heavy.
+Synthetic pages are generated from a fixed seed so every run of a given
+``CORPUS_VERSION`` sees byte-identical input. No real-world pages have been
+recorded yet, so for now the corpus is synthetic only.
+
+Record new real-world pages with:
+    python benchmarks/corpus.py --record https://example.com/some/page
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+CORPUS_VERSION = 2
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+PAGES_DIR = CORPUS_DIR / "pages"
+MANIFEST_PATH = CORPUS_DIR / "manifest.json"
+
+_WORDS = (
+    "data service platform customer product team support release update guide "
+    "network secure cloud report value market design system people access share "
+    "account feature search result policy privacy content learn build deploy"
+).split()
+
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text.capitalize() + "."
+
+
+def _paragraph(rng: random.Random, sentences: int = 4) -> str:
+    return "<p>" + " ".join(_sentence(rng) for _ in range(sentences)) + "</p>"
+
+
+def _page(title: str, body: str) -> str:
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>{title}</title>"
+        f'<meta name="description" content="{title} benchmark page">'
+        "<style>body{font-family:sans-serif}</style>"
+        "<script>window.analytics = {enabled: true};</script>"
+        "</head><body>"
+        '<nav><ul><li><a href="/">Home</a></li><li><a href="/about">About</a></li>'
+        '<li><a href="/contact">Contact</a></li></ul></nav>'
+        f"<main><h1>{title}</h1>{body}</main>"
+        '<footer><p>Contact us at support@example.com or +1 555 010 0199 for help.</p>'
+        '<a href="https://github.com/example">GitHub</a> '
+        '<a href="https://twitter.com/example">Twitter</a></footer>'
+        "</body></html>"
+    )
+
+
+def small_page(rng: random.Random) -> str:
+    body = "<h2>Overview</h2>" + "".join(_paragraph(rng) for _ in range(3))
+    return _page("Small article", body)
+
+
+def huge_page(rng: random.Random) -> str:
+    sections = []
+    for i in range(400):
+        sections.append(f"<h2>Section {i}</h2>")
+        sections.extend(_paragraph(rng, sentences=8) for _ in range(6))
+        sections.append("<ul>" + "".join(f"<li>{_sentence(rng, 6)}</li>" for _ in range(5)) + "</ul>")
+    return _page("Huge reference manual", "".join(sections))
+
+
+def nested_page(rng: random.Random, depth: int = 250) -> str:
+    opening = "".join(f'<div class="level-{i}">' for i in range(depth))
+    closing = "</div>" * depth
+    body = opening + "".join(_paragraph(rng) for _ in range(20)) + closing
+    return _page("Deeply nested layout", body)
+
+
+def table_page(rng: random.Random, tables: int = 40, rows: int = 100) -> str:
+    parts = []
+    for t in range(tables):
+        header = "<thead><tr>" + "".join(f"<th>Column {c}</th>" for c in range(6)) + "</tr></thead>"
+        body_rows = "".join(
+            "<tr>" + "".join(f"<td>{rng.choice(_WORDS)} {rng.randint(0, 9999)}</td>" for _ in range(6)) + "</tr>"
+            for _ in range(rows)
+        )
+        parts.append(f"<h2>Table {t}</h2><table>{header}<tbody>{body_rows}</tbody></table>")
+    return _page("Table heavy report", "".join(parts))
+
+
+def link_page(rng: random.Random, links: int = 5000) -> str:
+    items = "".join(
+        f'<li><a href="/wiki/{rng.choice(_WORDS)}_{i}?utm_source=bench#s{i % 7}">'
+        f"{rng.choice(_WORDS).title()} {i}</a></li>"
+        for i in range(links)
+    )
+    return _page("Link directory", _paragraph(rng) + f"<ul>{items}</ul>")
+
+
+def boilerplate_page(rng: random.Random) -> str:
+    """A news-style article wrapped in menus, a cookie banner, sidebars and a fat footer."""
+    menu = "".join(f'<li><a href="/section/{w}">{w.title()} news and more</a></li>' for w in _WORDS)
+    related = "".join(
+        f'<li><a href="/story/{i}">{_sentence(rng, 8)}</a></li>' for i in range(30)
+    )
+    body = (
+        '<div id="cookie-consent"><p>We use cookies to personalise content and ads and to analyse '
+        'our traffic. By continuing to browse you agree to our use of cookies.</p></div>'
+        f'<div class="site-menu"><ul>{menu}</ul></div>'
+        '<div class="breadcrumb"><a href="/">Home</a> &gt; <a href="/news">News</a></div>'
+        '<div class="article-body"><h2>Standfirst</h2>'
+        + "".join(_paragraph(rng, sentences=5) for _ in range(8))
+        + "<ul>" + "".join(f"<li>{_sentence(rng, 6)}</li>" for _ in range(4)) + "</ul>"
+        + "".join(_paragraph(rng, sentences=5) for _ in range(4))
+        + '</div>'
+        f'<div class="related-stories"><h3>Related</h3><ul>{related}</ul></div>'
+        '<div class="newsletter-signup"><p>Sign up to our newsletter to get the best stories '
+        'delivered to your inbox every morning, completely free of charge.</p></div>'
+        + '<div class="sidebar">' + "".join(_paragraph(rng, sentences=2) for _ in range(6)) + '</div>'
+    )
+    page = _page("Boilerplate heavy article", body)
+    # Sitemap-style footer columns that end up in every page of a real site
+    footer = "".join(f'<p><a href="/{w}">{w.title()}</a> | <a href="/{w}/help">Help</a></p>' for w in _WORDS)
+    return page.replace("</footer>", footer + "</footer>")
+
+
+SYNTHETIC_PAGES = {
+    "small": small_page,
+    "huge": huge_page,
+    "nested": nested_page,
+    "tables": table_page,
+    "links": link_page,
+    "boilerplate": boilerplate_page,
+}
+
+
+def load_manifest() -> Dict:
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text())
+    return {"version": CORPUS_VERSION, "recorded": []}
+
+
+def load_corpus() -> Dict[str, str]:
+    """Return ``{page_name: html}`` for every page in the current corpus version"""
+    manifest = load_manifest()
+    if manifest.get("version") != CORPUS_VERSION:
+        raise RuntimeError(
+            f"Corpus manifest is version {manifest.get('version')}, expected {CORPUS_VERSION}"
+        )
+
+    pages = {}
+    for name, generator in SYNTHETIC_PAGES.items():
+        pages[name] = generator(random.Random(f"{CORPUS_VERSION}:{name}"))
+    for entry in manifest.get("recorded", []):
+        path = PAGES_DIR / entry["file"]
+        if path.exists():
+            pages[entry["name"]] = path.read_text(encoding="utf-8", errors="replace")
+    return pages
+
+
+async def record_pages(urls: List[str]):
+    """Fetch pages with WebScrapingBot and add them to the corpus manifest"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from web_scraping_bot import WebScrapingBot
+
+    manifest = load_manifest()
+    PAGES_DIR.mkdir(parents=True, exist_ok=True)
+    bot = WebScrapingBot()
+    try:
+        for url in urls:
+            html = await bot.scrape_webpage(url)
+            name = re.sub(r"[^a-z0-9]+", "_", url.lower().split("://", 1)[-1]).strip("_")[:80]
+            (PAGES_DIR / f"{name}.html").write_text(html, encoding="utf-8")
+            manifest["recorded"] = [e for e in manifest["recorded"] if e["name"] != name]
+            manifest["recorded"].append({"name": name, "file": f"{name}.html", "url": url})
+            print(f"Recorded {url} -> {name}.html ({len(html)} chars)")
+    finally:
+        await bot.close_session()
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or extend the benchmark corpus.")
+    parser.add_argument("--record", nargs="+", metavar="URL", help="Record real-world pages into the corpus")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        asyncio.run(record_pages(args.record))
+        return 0
+
+    for name, html in load_corpus().items():
+        print(f"{name:40} {len(html.encode('utf-8')) / 1024:10.1f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
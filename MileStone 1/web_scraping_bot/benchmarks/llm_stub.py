@@ -0,0 +1,351 @@
+"""Local OpenAI-compatible stand-in for the Groq chat completions API.
+
+Serves ``POST /openai/v1/chat/completions`` (and ``/v1/chat/completions``),
+so the scraper and JobSearch can be load-tested offline by pointing
+``GROQ_BASE_URL`` at it. Modes:
+  * ``replay`` (default): answer from a cassette of recorded exchanges,
+    keyed by a fingerprint of model, messages, temperature and max_tokens.
+    Misses get a synthetic reply shaped like what each caller asks for (a
+    JSON array of jobs, a resume analysis, or a cited answer), or a 404 with
+    ``--on-miss error``.
+  * ``record``: forward to the real API and append each exchange, with its
+    measured latency, to the cassette.
+
+Simulated model time is a latency sample (``--latency fixed:0.4``,
+``uniform:0.2,1.0``, ``normal:0.6,0.2``, ``lognormal:0.5,0.6`` as median and
+sigma, or ``recorded``) plus the reply's tokens at ``--tokens-per-second``.
+Streaming requests get server-sent events, one chunk per word. Provider
+behaviour under load is simulated with ``--error-rate`` (random 429s),
+``--rpm`` (a requests-per-minute budget, 429 with Retry-After when spent)
+and ``--concurrency`` (requests beyond it queue). Counters, including total
+simulated model seconds, are served at ``GET /stub/stats``.
+
+Example:
+    python benchmarks/llm_stub.py --port 8089 --latency lognormal:0.5,0.6 --rpm 600
+    GROQ_BASE_URL=http://127.0.0.1:8089 GROQ_API_KEY=stub python app.py
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger("llm_stub")
+
+COMPLETIONS_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+DEFAULT_UPSTREAM = "https://api.groq.com"
+
+STUB_SKILLS = ["Python", "SQL", "JavaScript", "React", "Docker", "AWS", "Kubernetes", "Java", "Go",
+               "Machine Learning", "PostgreSQL", "Communication", "Leadership", "Agile", "Git", "Linux"]
+STUB_LOCATIONS = ["Remote", "Austin, TX", "New York, NY", "Seattle, WA", "Remote", "Chicago, IL"]
+
+
+def request_key(body: Dict) -> str:
+    """Fingerprint of the parts of a completion request that decide its reply."""
+    parts = [body.get("model"), body.get("messages"), body.get("temperature"), body.get("max_tokens")]
+    data = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def parse_latency(spec: str) -> Optional[Callable[[random.Random], float]]:
+    """Sampler for a latency spec in seconds; None for ``recorded``."""
+    name, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()]
+    if name == "recorded":
+        return None
+    if name == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if name == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if name == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if name == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency spec {spec!r}")
+
+
+def synthetic_reply(body: Dict, rng: random.Random) -> str:
+    """A plausible reply for the prompts this repo sends, for replay misses."""
+    prompt = (body.get("messages") or [{}])[-1].get("content", "")
+    search = re.search(r"job postings for the position:\s*(.+)", prompt)
+    if search:
+        title = search.group(1).strip().title()
+        count = re.search(r"Generate (\d+)", prompt)
+        jobs = []
+        for i in range(int(count.group(1)) if count else 5):
+            low = rng.randrange(60, 160, 5)
+            jobs.append({
+                "title": title if i == 0 else f"{rng.choice(['Senior', 'Junior', 'Lead', 'Staff'])} {title}",
+                "company": f"Stub Company {rng.randrange(1000)}",
+                "location": rng.choice(STUB_LOCATIONS),
+                "description": f"Work on {title} projects with a small team. " * 3,
+                "required_skills": rng.sample(STUB_SKILLS, 4),
+                "salary_range": f"${low},000 - ${low + rng.randrange(20, 60, 5)},000",
+                "posting_date": time.strftime("%Y-%m-%d")
+            })
+        return json.dumps(jobs, indent=2)
+    if "Analyze the following resume" in prompt:
+        resume = prompt.split("Resume text:", 1)[-1].lower()
+        skills = [skill for skill in STUB_SKILLS if skill.lower() in resume]
+        years = [int(y) for y in re.findall(r"(\d+)\+?\s+years", resume)]
+        level = "Senior Level" if years and max(years) >= 7 else "Mid Level" if years and max(years) >= 3 else "Entry Level"
+        return json.dumps({"skills": {"technical": skills, "soft": []}, "experience_level": level, "achievements": []})
+    if "Update the summary" in prompt:
+        return "The user asked about the scraped page and got answers from its content."
+    excerpt = re.search(r"\[(\d+)\][^\n]*\n?(.{0,300})", prompt, re.S)
+    if excerpt:
+        sentence = " ".join(excerpt.group(2).split()[:40])
+        return f"According to the excerpts, {sentence} [{excerpt.group(1)}]."
+    return "The answer cannot be found in the content provided."
+
+
+class Cassette:
+    """Recorded exchanges in a JSONL file; repeated requests cycle through their recordings."""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self._replies: Dict[str, List[Dict]] = {}
+        self._next: Dict[str, int] = {}
+        if path and path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._replies.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._replies.values())
+
+    def get(self, key: str) -> Optional[Dict]:
+        entries = self._replies.get(key)
+        if not entries:
+            return None
+        index = self._next.get(key, 0)
+        self._next[key] = (index + 1) % len(entries)
+        return entries[index]
+
+    def add(self, entry: Dict):
+        self._replies.setdefault(entry["key"], []).append(entry)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+class LLMStub:
+    """aiohttp handlers for the stand-in API, with its simulated limits and counters."""
+
+    def __init__(self, mode: str = "replay", cassette: Optional[Path] = None, latency: str = "fixed:0.3",
+                 tokens_per_second: float = 0.0, error_rate: float = 0.0, rpm: int = 0, concurrency: int = 0,
+                 on_miss: str = "synthetic", upstream: str = DEFAULT_UPSTREAM, seed: int = 0):
+        self.mode = mode
+        self.cassette = Cassette(cassette)
+        self.sample_latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rpm = rpm
+        self.on_miss = on_miss
+        self.upstream = upstream.rstrip("/")
+        self.rng = random.Random(seed)
+        self._semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+        # Requests-per-minute budget as a token bucket refilled continuously
+        self._allowance = float(rpm)
+        self._last_refill = time.monotonic()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.stats = {"requests": 0, "replayed": 0, "recorded": 0, "synthetic": 0, "missed": 0,
+                      "rate_limited": 0, "injected_errors": 0, "in_flight": 0, "model_seconds": 0.0, "tokens": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        for path in COMPLETIONS_PATHS:
+            app.router.add_post(path, self.handle_completion)
+        app.router.add_get("/stub/stats", self.handle_stats)
+        app.router.add_post("/stub/reset", self.handle_reset)
+        app.on_cleanup.append(self._close)
+        return app
+
+    async def _close(self, app):
+        if self._session is not None:
+            await self._session.close()
+
+    async def handle_stats(self, request):
+        return web.json_response(dict(self.stats, cassette_entries=len(self.cassette)))
+
+    async def handle_reset(self, request):
+        for name in self.stats:
+            self.stats[name] = 0.0 if isinstance(self.stats[name], float) else 0
+        return web.json_response({"reset": True})
+
+    def _rate_limited(self) -> Optional[float]:
+        """Seconds until a request is allowed, or None if it may proceed now."""
+        if not self.rpm:
+            return None
+        now = time.monotonic()
+        self._allowance = min(float(self.rpm), self._allowance + (now - self._last_refill) * self.rpm / 60.0)
+        self._last_refill = now
+        if self._allowance < 1.0:
+            return (1.0 - self._allowance) * 60.0 / self.rpm
+        self._allowance -= 1.0
+        return None
+
+    @staticmethod
+    def _error(status: int, message: str, error_type: str, retry_after: Optional[float] = None):
+        headers = {"Retry-After": f"{max(retry_after, 0.001):.3f}"} if retry_after is not None else None
+        return web.json_response({"error": {"message": message, "type": error_type}}, status=status, headers=headers)
+
+    async def handle_completion(self, request):
+        body = await request.json()
+        self.stats["requests"] += 1
+        wait = self._rate_limited()
+        if wait is not None:
+            self.stats["rate_limited"] += 1
+            return self._error(429, "Rate limit reached for requests per minute", "rate_limit_exceeded", wait)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            return self._error(429, "Injected rate limit error", "rate_limit_exceeded", 1.0)
+
+        if self._semaphore is None:
+            return await self._complete(request, body)
+        async with self._semaphore:
+            return await self._complete(request, body)
+
+    async def _complete(self, request, body: Dict):
+        key = request_key(body)
+        self.stats["in_flight"] += 1
+        try:
+            if self.mode == "record":
+                entry = await self._record(request, body, key)
+                self.stats["recorded"] += 1
+            else:
+                entry = self.cassette.get(key)
+                if entry is not None:
+                    self.stats["replayed"] += 1
+                elif self.on_miss == "error":
+                    self.stats["missed"] += 1
+                    return self._error(404, f"No recorded reply for request {key}", "not_found")
+                else:
+                    self.stats["synthetic"] += 1
+                    entry = {"key": key, "content": synthetic_reply(body, self.rng), "model_seconds": 0.0}
+
+            content = entry["content"]
+            words = re.findall(r"\S+\s*", content) or [content]
+            if self.mode == "record":
+                # The real API already took its time; pass the reply straight through
+                first_byte, per_token = 0.0, 0.0
+                model_seconds = entry["model_seconds"]
+            else:
+                first_byte = (entry.get("model_seconds", 0.0) if self.sample_latency is None
+                              else self.sample_latency(self.rng))
+                per_token = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+                model_seconds = first_byte + per_token * len(words)
+            self.stats["model_seconds"] += model_seconds
+            self.stats["tokens"] += len(words)
+            headers = {"X-Stub-Model-Seconds": f"{model_seconds:.6f}"}
+            model = body.get("model", "stub")
+            completion_id = f"chatcmpl-{key[:12]}"
+
+            if not body.get("stream"):
+                await asyncio.sleep(first_byte + per_token * len(words))
+                return web.json_response({
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": entry.get("usage") or {
+                        "prompt_tokens": sum(len(m.get("content", "").split()) for m in body.get("messages", [])),
+                        "completion_tokens": len(words),
+                        "total_tokens": len(words)
+                    }
+                }, headers=headers)
+            return await self._stream(request, completion_id, model, words, first_byte, per_token, headers)
+        finally:
+            self.stats["in_flight"] -= 1
+
+    async def _stream(self, request, completion_id: str, model: str, words: List[str],
+                      first_byte: float, per_token: float, headers: Dict[str, str]):
+        response = web.StreamResponse(headers=dict(headers, **{"Content-Type": "text/event-stream",
+                                                               "Cache-Control": "no-cache"}))
+        await response.prepare(request)
+        await asyncio.sleep(first_byte)
+
+        def event(delta: Dict, finish_reason=None) -> bytes:
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        await response.write(event({"role": "assistant", "content": ""}))
+        for word in words:
+            if per_token:
+                await asyncio.sleep(per_token)
+            await response.write(event({"content": word}))
+        await response.write(event({}, "stop"))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _record(self, request, body: Dict, key: str) -> Dict:
+        """Forward to the real API without streaming and store the reply."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        authorization = request.headers.get("Authorization") or f"Bearer {os.getenv('GROQ_API_KEY', '')}"
+        started = time.perf_counter()
+        async with self._session.post(f"{self.upstream}/openai/v1/chat/completions",
+                                      json=dict(body, stream=False),
+                                      headers={"Authorization": authorization}) as upstream:
+            upstream.raise_for_status()
+            result = await upstream.json()
+        entry = {
+            "key": key,
+            "model": body.get("model"),
+            "messages": body.get("messages"),
+            "content": result["choices"][0]["message"]["content"],
+            "usage": result.get("usage"),
+            "model_seconds": time.perf_counter() - started
+        }
+        self.cassette.add(entry)
+        return entry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an OpenAI-compatible LLM stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--cassette", type=Path, default=Path("llm_cassette.jsonl"),
+                        help="JSONL file of recorded exchanges")
+    parser.add_argument("--latency", default="fixed:0.3",
+                        help="Time to first token: fixed:S, uniform:A,B, normal:MEAN,SD, lognormal:MEDIAN,SIGMA or recorded")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Generation speed; 0 sends the reply at once")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 429")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests-per-minute limit (0 for none)")
+    parser.add_argument("--concurrency", type=int, default=0, help="Requests served at once; more queue (0 for no limit)")
+    parser.add_argument("--on-miss", choices=["synthetic", "error"], default="synthetic",
+                        help="Reply to requests missing from the cassette")
+    parser.add_argument("--upstream", default=os.getenv("GROQ_UPSTREAM_URL", DEFAULT_UPSTREAM),
+                        help="Real API base URL for record mode")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for latencies, errors and synthetic replies")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    stub = LLMStub(args.mode, args.cassette, args.latency, args.tokens_per_second, args.error_rate,
+                   args.rpm, args.concurrency, args.on_miss, args.upstream, args.seed)
+    logger.info("LLM stub (%s mode, %d recorded replies) on http://%s:%d",
+                args.mode, len(stub.cassette), args.host, args.port)
+    web.run_app(stub.app(), host=args.host, port=args.port, access_log=None, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
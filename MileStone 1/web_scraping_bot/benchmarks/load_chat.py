@@ -0,0 +1,177 @@
+"""Open-loop load test of ``/chat`` against the LLM stand-in server.
+
+Replays ``/chat`` requests at a target rate, whether or not earlier ones
+have finished, and separates the app's own latency from model time:
+  * end-to-end latency per request kind (scrape, question), p50/p95/p99
+  * simulated model seconds per request, from ``llm_stub.py``'s
+    ``/stub/stats``
+  * time the app spent waiting on the LLM, from its
+    ``scraper_llm_request_seconds`` metric; the difference from model time
+    is client and connection overhead
+  * our overhead: mean end-to-end latency minus mean LLM wait
+
+Requests come from a traffic file recorded with ``CHAT_TRAFFIC_LOG`` (JSONL
+of ``/chat`` bodies), or from ``--url`` and ``--question``. Start the stub
+and the app first:
+
+    python benchmarks/llm_stub.py --latency lognormal:0.5,0.6 &
+    GROQ_BASE_URL=http://127.0.0.1:8089 GROQ_API_KEY=stub python app.py &
+    python benchmarks/load_chat.py --traffic traffic.jsonl --rps 20 --duration 60 -o load_results.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_scraping import summarize  # noqa: E402
+
+DEFAULT_QUESTIONS = [
+    "What is this page about?",
+    "Summarize the main points.",
+    "Which names or numbers are mentioned?",
+]
+
+
+def load_traffic(path: Optional[Path], urls: List[str], questions: List[str]) -> List[Dict]:
+    """Request bodies to replay, in order"""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        return [{key: value for key, value in entry.items() if key != "time"} for entry in entries]
+    return [{"message": url} for url in urls] + [{"message": question} for question in questions]
+
+
+async def llm_wait_seconds(session: aiohttp.ClientSession, app_url: str) -> Optional[Dict[str, float]]:
+    """Sum and count of ``scraper_llm_request_seconds`` from the app's /metrics"""
+    try:
+        async with session.get(f"{app_url}/metrics") as response:
+            text = await response.text()
+    except aiohttp.ClientError:
+        return None
+    if response.status != 200:
+        return None
+    # The histogram has no lines until the first LLM call
+    values = dict(re.findall(r"^scraper_llm_request_seconds_(sum|count) (\S+)$", text, re.M))
+    return {"sum": float(values.get("sum", 0.0)), "count": float(values.get("count", 0.0))}
+
+
+async def stub_stats(session: aiohttp.ClientSession, stub_url: str) -> Optional[Dict]:
+    try:
+        async with session.get(f"{stub_url}/stub/stats") as response:
+            return await response.json()
+    except aiohttp.ClientError:
+        return None
+
+
+async def run_load(app_url: str, stub_url: str, traffic: List[Dict], rps: float, duration: float,
+                   warmup: int) -> Dict:
+    results: List[Dict] = []
+    timeout = aiohttp.ClientTimeout(total=300)
+    async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(limit=0)) as session:
+        async def send(body: Dict, record: bool):
+            kind = "scrape" if body.get("message", "").startswith(("http://", "https://")) else "question"
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{app_url}/chat", json=body) as response:
+                    await response.read()
+                    status = response.status
+            except aiohttp.ClientError as e:
+                status = type(e).__name__
+            if record:
+                results.append({"kind": kind, "status": status, "ms": (time.perf_counter() - started) * 1000})
+
+        # Warm-up requests (typically the scrapes questions depend on) run first and are not measured
+        for body in traffic[:warmup]:
+            await send(body, False)
+
+        stub_before = await stub_stats(session, stub_url)
+        wait_before = await llm_wait_seconds(session, app_url)
+        pending = []
+        started = time.perf_counter()
+        bodies = itertools.cycle(traffic[warmup:] or traffic)
+        for index in itertools.count():
+            due = started + index / rps
+            if due - started >= duration:
+                break
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            pending.append(asyncio.ensure_future(send(next(bodies), True)))
+        await asyncio.gather(*pending)
+        elapsed = time.perf_counter() - started
+        stub_after = await stub_stats(session, stub_url)
+        wait_after = await llm_wait_seconds(session, app_url)
+
+    report = {
+        "target_rps": rps,
+        "achieved_rps": len(results) / elapsed if elapsed else 0.0,
+        "requests": len(results),
+        "errors": sum(1 for r in results if r["status"] != 200),
+        "end_to_end_ms": {
+            kind: summarize([r["ms"] for r in results if r["kind"] == kind])
+            for kind in sorted({r["kind"] for r in results})
+        }
+    }
+    mean_ms = sum(r["ms"] for r in results) / len(results) if results else 0.0
+    if stub_before and stub_after and results:
+        llm_calls = stub_after["requests"] - stub_before["requests"]
+        report["llm"] = {
+            "calls": llm_calls,
+            "rate_limited": stub_after["rate_limited"] - stub_before["rate_limited"] +
+            stub_after["injected_errors"] - stub_before["injected_errors"],
+            "model_ms_per_request": (stub_after["model_seconds"] - stub_before["model_seconds"]) * 1000 / len(results)
+        }
+    if wait_before and wait_after and results:
+        wait_ms = (wait_after["sum"] - wait_before["sum"]) * 1000 / len(results)
+        report.setdefault("llm", {})["wait_ms_per_request"] = wait_ms
+        if "model_ms_per_request" in report["llm"]:
+            report["llm"]["client_overhead_ms_per_request"] = wait_ms - report["llm"]["model_ms_per_request"]
+        report["app_overhead_ms_per_request"] = mean_ms - wait_ms
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay /chat traffic at a target rate against the LLM stub.")
+    parser.add_argument("-o", "--output", type=Path, default=Path("load_results.json"), help="Results JSON file")
+    parser.add_argument("--app", default="http://127.0.0.1:5000", help="Base URL of the running app")
+    parser.add_argument("--stub", default="http://127.0.0.1:8089", help="Base URL of llm_stub.py")
+    parser.add_argument("--traffic", type=Path, help="JSONL of /chat bodies recorded with CHAT_TRAFFIC_LOG")
+    parser.add_argument("--url", action="append", default=[], help="Page to scrape first (repeatable)")
+    parser.add_argument("--question", action="append", help="Question to ask (repeatable)")
+    parser.add_argument("--warmup", type=int, default=None,
+                        help="Leading requests sent once, unmeasured (default: the --url scrapes)")
+    parser.add_argument("--rps", type=float, default=5.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to send requests for")
+    args = parser.parse_args(argv)
+
+    traffic = load_traffic(args.traffic, args.url, args.question or DEFAULT_QUESTIONS)
+    if not traffic:
+        parser.error("no requests: pass --traffic or --url/--question")
+    warmup = len(args.url) if args.warmup is None and not args.traffic else (args.warmup or 0)
+    report = asyncio.run(run_load(args.app.rstrip("/"), args.stub.rstrip("/"), traffic,
+                                  args.rps, args.duration, warmup))
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    print(f"{report['requests']} requests at {report['achieved_rps']:.1f}/s "
+          f"(target {args.rps:.1f}/s), {report['errors']} errors")
+    for kind, latency in report["end_to_end_ms"].items():
+        print(f"{kind:9} p50 {latency['p50']:8.1f} ms  p95 {latency['p95']:8.1f} ms  p99 {latency['p99']:8.1f} ms")
+    llm = report.get("llm", {})
+    if "model_ms_per_request" in llm:
+        print(f"Model time {llm['model_ms_per_request']:.1f} ms/request over {llm['calls']} LLM calls "
+              f"({llm['rate_limited']} rate limited)")
+    if "app_overhead_ms_per_request" in report:
+        print(f"LLM wait {llm['wait_ms_per_request']:.1f} ms/request; "
+              f"our overhead {report['app_overhead_ms_per_request']:.1f} ms/request")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
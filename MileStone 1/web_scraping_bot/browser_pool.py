@@ -0,0 +1,143 @@
+"""Pooled headless browser for rendering JavaScript-heavy pages.
+
+One Chromium instance is launched lazily and kept alive, with a fixed number
+of browser contexts leased out per URL. Images, fonts and media are blocked,
+and pages are considered ready on network idle (or a caller-supplied CSS
+selector) rather than after fixed sleeps. Contexts are recycled after
+``max_uses`` renders so cookies and caches don't grow without bound.
+
+Requires the optional ``playwright`` package (``pip install playwright`` and
+``playwright install chromium``).
+"""
+import asyncio
+import logging
+from typing import Optional
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'media'})
+
+
+def playwright_available() -> bool:
+    try:
+        import playwright.async_api  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class BrowserPool:
+    """A long-lived headless browser with a bounded pool of reusable contexts."""
+
+    def __init__(self, size: int = 2, max_uses: int = 50, user_agent: Optional[str] = None,
+                 timeout: float = 30):
+        self.size = size
+        self.max_uses = max_uses
+        self.user_agent = user_agent
+        self.timeout_ms = int(timeout * 1000)
+        self._playwright = None
+        self._browser = None
+        self._contexts: Optional[asyncio.Queue] = None
+        self._uses = {}
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        """Launch the browser and create the contexts if not already running."""
+        async with self._start_lock:
+            if self._browser is not None:
+                return
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._contexts = asyncio.Queue()
+            for _ in range(self.size):
+                self._contexts.put_nowait(await self._new_context())
+            logger.info("Started headless browser pool with %d contexts", self.size)
+
+    async def _new_context(self):
+        context = await self._browser.new_context(user_agent=self.user_agent, java_script_enabled=True)
+        context.set_default_timeout(self.timeout_ms)
+        await context.route("**/*", self._block_heavy_resources)
+        self._uses[id(context)] = 0
+        return context
+
+    @staticmethod
+    async def _block_heavy_resources(route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def render(self, url: str, wait_for: Optional[str] = None) -> str:
+        """Render ``url`` and return the resulting HTML.
+
+        Waits for ``wait_for`` (a CSS selector) when given, otherwise for the
+        network to go idle. Blocks while all contexts are leased.
+        """
+        await self.start()
+        context = await self._acquire()
+        try:
+            with metrics.timer(metrics.RENDER_SECONDS):
+                page = await context.new_page()
+                try:
+                    if wait_for:
+                        await page.goto(url, wait_until='domcontentloaded')
+                        await page.wait_for_selector(wait_for)
+                    else:
+                        await page.goto(url, wait_until='networkidle')
+                    html = await page.content()
+                finally:
+                    await page.close()
+            metrics.RENDER_TOTAL.inc(outcome='ok')
+            return html
+        except Exception:
+            metrics.RENDER_TOTAL.inc(outcome='error')
+            raise
+        finally:
+            await self._release(context)
+
+    async def _acquire(self):
+        context = await self._contexts.get()
+        if context is None:
+            # The slot's context could not be replaced last time; try again
+            try:
+                context = await self._new_context()
+            except Exception:
+                self._contexts.put_nowait(None)
+                raise
+        return context
+
+    async def _release(self, context):
+        self._uses[id(context)] += 1
+        if self._uses[id(context)] >= self.max_uses:
+            # Recycle so cookies, storage and caches don't accumulate
+            self._uses.pop(id(context), None)
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug("Error closing browser context: %s", e)
+            try:
+                context = await self._new_context()
+            except Exception as e:
+                # Keep the slot: the next render to take it creates the context
+                logger.error("Could not replace browser context: %s", e)
+                context = None
+        self._contexts.put_nowait(context)
+
+    async def close(self):
+        """Close all contexts, the browser and the Playwright driver."""
+        async with self._start_lock:
+            if self._browser is None:
+                return
+            try:
+                await self._browser.close()
+            finally:
+                await self._playwright.stop()
+                self._browser = None
+                self._playwright = None
+                self._contexts = None
+                self._uses.clear()
+                logger.debug("Closed headless browser pool")
@@ -0,0 +1,180 @@
+"""Boilerplate-aware main-content scoring, in the style of jusText.
+
+The parsed page is split into text blocks at block-level tags. Each block is
+classified by length, link density, boilerplate hints on its ancestors (nav,
+footer, cookie banners, sidebars, ...) and position on the page. Short and
+borderline blocks are then reclassified from their neighbours, so headings
+and short paragraphs inside an article are kept while menus and footers are
+dropped.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup, Comment, NavigableString
+
+BLOCK_TAGS = frozenset({
+    'p', 'li', 'td', 'th', 'dd', 'dt', 'pre', 'blockquote', 'figcaption', 'caption',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'section', 'article', 'main', 'header',
+    'footer', 'nav', 'aside', 'form', 'table', 'ul', 'ol', 'dl', 'body'
+})
+HEADING_TAGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+BOILERPLATE_TAGS = frozenset({'nav', 'footer', 'aside', 'form', 'header'})
+CONTENT_TAGS = frozenset({'main', 'article'})
+
+_BOILERPLATE_HINT = re.compile(
+    r'nav|menu|footer|cookie|consent|banner|sidebar|breadcrumb|comment|share|social|'
+    r'subscribe|newsletter|promo|advert|related|widget|popup|modal', re.I)
+_CONTENT_HINT = re.compile(r'article|content|post|entry|story|main|body-text', re.I)
+
+GOOD, NEAR_GOOD, SHORT, BAD = 'good', 'near_good', 'short', 'bad'
+
+# Length thresholds in characters
+LENGTH_LOW = 70
+LENGTH_HIGH = 200
+MAX_LINK_DENSITY = 0.2
+# Fraction of blocks at each end of the page treated as likely header/footer
+EDGE_FRACTION = 0.1
+
+
+class Block:
+    __slots__ = ('text', 'tag', 'link_chars', 'hint', 'kind')
+
+    def __init__(self, tag: str, hint: int):
+        self.text: List[str] = []
+        self.tag = tag
+        self.link_chars = 0
+        self.hint = hint
+        self.kind = BAD
+
+    @property
+    def link_density(self) -> float:
+        length = sum(len(t) for t in self.text)
+        return self.link_chars / length if length else 1.0
+
+
+def _own_hint(element) -> int:
+    """+1 for content containers, -1 for boilerplate, 0 if neutral."""
+    if element.name in BOILERPLATE_TAGS:
+        return -1
+    if element.name in CONTENT_TAGS:
+        return 1
+    attrs = ' '.join(element.get('class', [])) + ' ' + (element.get('id') or '') + ' ' + (element.get('role') or '')
+    if attrs.strip():
+        if _BOILERPLATE_HINT.search(attrs):
+            return -1
+        if _CONTENT_HINT.search(attrs):
+            return 1
+    return 0
+
+
+def segment_blocks(soup: BeautifulSoup) -> List[Block]:
+    """Group the page's text into blocks at block-level tag boundaries."""
+    blocks: Dict[int, Block] = {}
+    order: List[Block] = []
+    hints: Dict[int, int] = {}
+
+    def hint_of(element) -> int:
+        # Nearest explicit hint wins; memoized per element
+        key = id(element)
+        if key not in hints:
+            own = _own_hint(element)
+            parent = element.parent
+            hints[key] = own if own or parent is None else hint_of(parent)
+        return hints[key]
+
+    for string in soup.find_all(string=True):
+        if isinstance(string, Comment) or not isinstance(string, NavigableString):
+            continue
+        text = string.strip()
+        if not text:
+            continue
+        in_link = False
+        block_element = None
+        for parent in string.parents:
+            if parent.name == 'a':
+                in_link = True
+            elif parent.name in BLOCK_TAGS:
+                block_element = parent
+                break
+        if block_element is None:
+            continue
+        block = blocks.get(id(block_element))
+        if block is None:
+            block = blocks[id(block_element)] = Block(block_element.name, hint_of(block_element))
+            order.append(block)
+        block.text.append(text)
+        if in_link:
+            block.link_chars += len(text)
+    return order
+
+
+def classify_blocks(blocks: List[Block]) -> List[Block]:
+    """Mark each block good, near-good, short or bad, then smooth by context."""
+    count = len(blocks)
+    edge = int(count * EDGE_FRACTION)
+    for position, block in enumerate(blocks):
+        length = sum(len(t) for t in block.text) + len(block.text) - 1
+        if block.hint < 0 or block.link_density > MAX_LINK_DENSITY * 2:
+            block.kind = BAD
+        elif block.link_density > MAX_LINK_DENSITY:
+            block.kind = SHORT if length < LENGTH_LOW else BAD
+        elif length < LENGTH_LOW:
+            block.kind = SHORT
+        elif length >= LENGTH_HIGH or block.hint > 0:
+            block.kind = GOOD
+        else:
+            block.kind = NEAR_GOOD
+        # Borderline blocks at the very top or bottom are usually chrome
+        if block.kind == NEAR_GOOD and block.hint == 0 and (position < edge or position >= count - edge):
+            block.kind = SHORT
+
+    def neighbours():
+        """Class of the nearest block that isn't short on each side; edges count as bad."""
+        before, after = [BAD] * count, [BAD] * count
+        for index in range(1, count):
+            previous = blocks[index - 1].kind
+            before[index] = before[index - 1] if previous == SHORT else previous
+        for index in range(count - 2, -1, -1):
+            following = blocks[index + 1].kind
+            after[index] = after[index + 1] if following == SHORT else following
+        return before, after
+
+    # Near-good blocks next to good or other near-good blocks are prose
+    before, after = neighbours()
+    near_kinds = {
+        index: GOOD if {GOOD, NEAR_GOOD} & {before[index], after[index]} else BAD
+        for index, block in enumerate(blocks) if block.kind == NEAR_GOOD
+    }
+    for index, kind in near_kinds.items():
+        blocks[index].kind = kind
+
+    # Short blocks between good content, and headings introducing it, are content
+    before, after = neighbours()
+    for index, block in enumerate(blocks):
+        if block.kind == SHORT:
+            good_context = after[index] == GOOD and (before[index] == GOOD or block.tag in HEADING_TAGS)
+            block.kind = GOOD if good_context else BAD
+    return blocks
+
+
+def extract_main_text(soup: BeautifulSoup) -> List[str]:
+    """Text of the page's main-content blocks, in document order."""
+    return [' '.join(block.text) for block in classify_blocks(segment_blocks(soup)) if block.kind == GOOD]
+
+
+def chat_context(content: Dict[str, Any], region: str = 'main', limit: Optional[int] = None) -> str:
+    """Text to send to the LLM for a scraped page.
+
+    ``region='main'`` uses the main-content blocks, falling back to every
+    paragraph and list item when none were found; ``region='all'`` always
+    uses the latter.
+    """
+    if region == 'main' and content.get('main_text'):
+        context = " ".join(content['main_text'])
+    else:
+        context = " ".join(content.get('paragraphs', []))
+        for list_type in ('ordered', 'unordered'):
+            for lst in content.get('lists', {}).get(list_type, []):
+                context += " " + " ".join(lst)
+    context = context.strip()
+    return context[:limit] if limit else context
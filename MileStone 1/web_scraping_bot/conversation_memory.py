@@ -0,0 +1,186 @@
+"""Token-budgeted conversation memory for multi-turn chat.
+
+Recent turns are kept verbatim in a sliding window; once the history goes
+over its token budget the oldest turns are folded into a running summary, so
+the prompt sent for each turn stays bounded however long the conversation
+runs. Each session's memory is persisted as a JSON file named by a hash of
+the session ID, and only the most recently used sessions stay in memory.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional
+    _ENCODING = None
+
+# Per-message overhead for role and formatting tokens in chat APIs
+MESSAGE_OVERHEAD_TOKENS = 4
+
+Summarizer = Callable[[str, List[Dict[str, str]], int], str]
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, otherwise estimate (~4 chars/token)."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+
+def extractive_summary(previous: str, turns: List[Dict[str, str]], max_tokens: int) -> str:
+    """Fold turns into the summary by keeping the first sentence of each one."""
+    lines = [previous] if previous else []
+    for turn in turns:
+        first_sentence = re.split(r'(?<=[.!?])\s', turn['content'].strip(), maxsplit=1)[0]
+        lines.append(f"{turn['role']}: {first_sentence[:300]}")
+    summary = "\n".join(lines)
+    # Drop the oldest summary lines until it fits its budget
+    while count_tokens(summary) > max_tokens and "\n" in summary:
+        summary = summary.split("\n", 1)[1]
+    if count_tokens(summary) > max_tokens:
+        summary = summary[-max_tokens * 4:]
+    return summary
+
+
+class ConversationMemory:
+    """Sliding window of recent turns plus a compacted summary of older ones."""
+
+    def __init__(self, session_id: str, budget_tokens: int = 2000, summary_tokens: int = 400,
+                 min_recent_messages: int = 2, summarizer: Optional[Summarizer] = None):
+        self.session_id = session_id
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.min_recent_messages = min_recent_messages
+        self.summarizer = summarizer or extractive_summary
+        self.summary = ""
+        self.messages: List[Dict] = []
+        # Held while a turn reads or updates the memory, and while it is saved
+        self.lock = threading.Lock()
+
+    @property
+    def history_tokens(self) -> int:
+        tokens = sum(message['tokens'] for message in self.messages)
+        if self.summary:
+            tokens += count_tokens(self.summary) + MESSAGE_OVERHEAD_TOKENS
+        return tokens
+
+    def add(self, role: str, content: str):
+        """Append a turn and compact older turns if the budget is exceeded."""
+        self.messages.append({
+            'role': role,
+            'content': content,
+            'tokens': count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        })
+        self._compact()
+
+    def _compact(self):
+        while self.history_tokens > self.budget_tokens and len(self.messages) > self.min_recent_messages:
+            evicted = [self.messages.pop(0)]
+            # Keep user/assistant pairs together where possible
+            if self.messages and self.messages[0]['role'] == 'assistant' \
+                    and len(self.messages) > self.min_recent_messages:
+                evicted.append(self.messages.pop(0))
+            # The summary counts against the budget too, so fold in each pair as it leaves
+            self.summary = self._summarize(evicted)
+
+    def _summarize(self, turns: List[Dict]) -> str:
+        turns = [{'role': t['role'], 'content': t['content']} for t in turns]
+        try:
+            summary = self.summarizer(self.summary, turns, self.summary_tokens)
+        except Exception as e:
+            logger.warning("Summarizer failed, falling back to extractive summary: %s", e)
+            summary = extractive_summary(self.summary, turns, self.summary_tokens)
+        if count_tokens(summary) > self.summary_tokens:
+            summary = extractive_summary("", [{'role': 'summary', 'content': summary}], self.summary_tokens)
+        return summary
+
+    def prompt_messages(self) -> List[Dict[str, str]]:
+        """History messages to send ahead of the current turn."""
+        messages = []
+        if self.summary:
+            messages.append({
+                'role': 'system',
+                'content': f"Summary of the earlier conversation:\n{self.summary}"
+            })
+        messages.extend({'role': m['role'], 'content': m['content']} for m in self.messages)
+        return messages
+
+    def to_dict(self) -> Dict:
+        return {'session_id': self.session_id, 'summary': self.summary, 'messages': self.messages}
+
+    def load_dict(self, data: Dict):
+        self.summary = data.get('summary', '')
+        self.messages = data.get('messages', [])
+        self._compact()
+
+
+class SessionStore:
+    """Loads and persists ConversationMemory objects, one JSON file per session.
+
+    At most ``max_sessions`` memories are cached, least recently used first
+    out; every turn is saved, so an evicted session reloads from its file.
+    """
+
+    def __init__(self, directory: str, max_sessions: int = 1000, **memory_options):
+        self.directory = Path(directory)
+        self.max_sessions = max_sessions
+        self.memory_options = memory_options
+        self._sessions: OrderedDict[str, ConversationMemory] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, session_id: str) -> Path:
+        digest = hashlib.blake2b(session_id.encode('utf-8'), digest_size=16).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def _legacy_path(self, session_id: str) -> Path:
+        # Files used to be named by the sanitized ID, which distinct IDs could share
+        safe_id = re.sub(r'[^A-Za-z0-9_-]', '_', session_id)[:64] or 'default'
+        return self.directory / f"{safe_id}.json"
+
+    def _load(self, memory: ConversationMemory):
+        for path in (self._path(memory.session_id), self._legacy_path(memory.session_id)):
+            if not path.exists():
+                continue
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable session file %s: %s", path, e)
+                continue
+            if data.get('session_id') == memory.session_id:
+                memory.load_dict(data)
+                return
+
+    def get(self, session_id: str) -> ConversationMemory:
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is not None:
+                self._sessions.move_to_end(session_id)
+                return memory
+            memory = ConversationMemory(session_id, **self.memory_options)
+            self._load(memory)
+            self._sessions[session_id] = memory
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return memory
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def save(self, memory: ConversationMemory):
+        """Write ``memory`` to its file; callers hold ``memory.lock``."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(memory.session_id)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(memory.to_dict()), encoding='utf-8')
+        tmp_path.replace(path)
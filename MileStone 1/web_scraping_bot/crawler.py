@@ -0,0 +1,314 @@
+"""Same-site crawler built on the links extracted by ``WebScrapingBot``.
+
+URLs are normalized before they are queued, seen URLs are deduplicated with
+a Bloom filter, and the frontier is a priority queue stored in SQLite, so
+memory stays bounded even with millions of queued URLs. The frontier, Bloom
+filter and page count are checkpointed to the same SQLite file, so an
+interrupted crawl resumes where it left off when run again with the same
+state file.
+
+Pages whose paragraph text nearly duplicates an earlier page (see ``dedup``)
+are only used for their links; the rest of their extraction and the page
+callback are skipped.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import metrics
+from dedup import NearDuplicateIndex, page_fingerprint
+from page_content import PageContent
+from web_scraping_bot import WebScrapingBot
+
+logger = logging.getLogger(__name__)
+
+TRACKING_PARAMS = frozenset({
+    'gclid', 'fbclid', 'msclkid', 'dclid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'igshid', 'ref_src'
+})
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """Canonical form of ``url`` for deduplication, or None if it can't be crawled.
+
+    Resolves against ``base``, lowercases scheme and host, drops default ports,
+    fragments and tracking parameters, and sorts the remaining query string.
+    """
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower().rstrip('.')
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+def site_of(url: str) -> str:
+    """Host of a normalized URL without a leading ``www.``, used for same-site checks."""
+    host = urlsplit(url).hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Sized for ``capacity`` items at ``error_rate`` false positives; one
+    million URLs at 1% takes about 1.2 MB.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add ``item``; returns False if it was (probably) already present."""
+        new = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                self.bits[p >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+
+class Frontier:
+    """SQLite-backed priority queue of URLs to crawl, plus checkpointed crawl state."""
+
+    PENDING, IN_FLIGHT = 0, 1
+
+    def __init__(self, path: str = ':memory:'):
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                depth INTEGER NOT NULL,
+                priority REAL NOT NULL,
+                seq INTEGER NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS frontier_order ON frontier (state, priority, seq);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);
+        """)
+        # URLs leased by a crawl that was interrupted go back in the queue
+        self.db.execute("UPDATE frontier SET state = ? WHERE state = ?", (self.PENDING, self.IN_FLIGHT))
+        self._seq = self.db.execute("SELECT COALESCE(MAX(seq), 0) FROM frontier").fetchone()[0]
+
+    def push(self, url: str, depth: int, priority: float) -> bool:
+        self._seq += 1
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO frontier (url, depth, priority, seq) VALUES (?, ?, ?, ?)",
+            (url, depth, priority, self._seq)
+        )
+        return cursor.rowcount > 0
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Lease the highest-priority pending URL as ``(url, depth)``."""
+        row = self.db.execute(
+            "SELECT url, depth FROM frontier WHERE state = ? ORDER BY priority, seq LIMIT 1",
+            (self.PENDING,)
+        ).fetchone()
+        if row:
+            self.db.execute("UPDATE frontier SET state = ? WHERE url = ?", (self.IN_FLIGHT, row[0]))
+        return row
+
+    def done(self, url: str):
+        self.db.execute("DELETE FROM frontier WHERE url = ?", (url,))
+
+    def pending(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM frontier WHERE state = ?", (self.PENDING,)).fetchone()[0]
+
+    def get_meta(self, key: str) -> Optional[bytes]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+PageCallback = Callable[[str, int, Dict[str, Any]], Optional[Awaitable[None]]]
+
+
+class Crawler:
+    """Breadth-first same-site crawler with page and depth budgets."""
+
+    def __init__(self, start_url: str, bot: Optional[WebScrapingBot] = None, max_pages: int = 100,
+                 max_depth: int = 3, concurrency: int = 5, state_path: str = ':memory:',
+                 capacity: int = 1_000_000, checkpoint_every: int = 20,
+                 skip_duplicates: bool = True):
+        self.start_url = normalize_url(start_url)
+        if self.start_url is None:
+            raise ValueError(f"Cannot crawl URL: {start_url}")
+        self.site = site_of(self.start_url)
+        self.bot = bot or WebScrapingBot()
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.frontier = Frontier(state_path)
+        # Not checkpointed: a resumed crawl only dedupes against pages it fetches itself
+        self.duplicates = NearDuplicateIndex() if skip_duplicates else None
+        self.duplicate_pages = 0
+
+        self.seen = BloomFilter(capacity)
+        bits = self.frontier.get_meta('bloom')
+        if bits is not None and len(bits) == len(self.seen.bits):
+            self.seen.bits = bytearray(bits)
+            self.seen.count = int(self.frontier.get_meta('bloom_count') or 0)
+        self.pages_crawled = int(self.frontier.get_meta('pages_crawled') or 0)
+        self.errors = 0
+        self.in_flight = 0
+
+        if self.seen.add(self.start_url):
+            self.frontier.push(self.start_url, 0, 0)
+
+    def _enqueue_links(self, page_url: str, depth: int, content: Dict[str, Any]):
+        if depth >= self.max_depth:
+            return
+        for link in content.get('links', []):
+            url = normalize_url(link['url'], page_url)
+            if url is None or site_of(url) != self.site:
+                continue
+            if self.seen.add(url):
+                # Shallower pages first; ties keep discovery order
+                self.frontier.push(url, depth + 1, depth + 1)
+
+    def _extract(self, html: str, url: str) -> Dict[str, Any]:
+        """Extract a page, stopping after paragraphs and links if it is a near-duplicate."""
+        if self.duplicates is None:
+            return PageContent.from_dict(self.bot._extract_main_content(html, base_url=url))
+        with metrics.timer(metrics.PARSE_SECONDS):
+            soup = self.bot._parse_html(html)
+        content = self.bot._extract_sections(soup, url, sections=('paragraphs', 'links'))
+        duplicate_of = self.duplicates.check_and_add(url, page_fingerprint(content['paragraphs']))
+        if duplicate_of is not None:
+            metrics.DUPLICATE_PAGES.inc()
+            return dict(content, duplicate_of=duplicate_of)
+        return PageContent.from_dict(self.bot._extract_sections(soup, url, content))
+
+    def checkpoint(self):
+        self.frontier.set_meta('bloom', bytes(self.seen.bits))
+        self.frontier.set_meta('bloom_count', str(self.seen.count))
+        self.frontier.set_meta('pages_crawled', str(self.pages_crawled))
+        self.frontier.commit()
+        logger.debug("Checkpointed crawl: %d pages, %d pending", self.pages_crawled, self.frontier.pending())
+
+    async def _worker(self, on_page: Optional[PageCallback]):
+        # In-flight pages count against the budget so workers don't overshoot it
+        while self.pages_crawled + self.in_flight < self.max_pages:
+            leased = self.frontier.pop()
+            if leased is None:
+                if not self.in_flight:
+                    return
+                # Other workers may still discover links
+                await asyncio.sleep(0.05)
+                continue
+            url, depth = leased
+            self.in_flight += 1
+            try:
+                html = await self.bot.scrape_webpage(url)
+                content = self._extract(html, url)
+                self.pages_crawled += 1
+                self._enqueue_links(url, depth, content)
+                if 'duplicate_of' in content:
+                    logger.debug("Skipping %s, a near-duplicate of %s", url, content['duplicate_of'])
+                    self.duplicate_pages += 1
+                elif on_page is not None:
+                    result = on_page(url, depth, content)
+                    if asyncio.iscoroutine(result):
+                        await result
+                if self.pages_crawled % self.checkpoint_every == 0:
+                    self.checkpoint()
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Failed to crawl %s: %s", url, e)
+            finally:
+                self.in_flight -= 1
+                self.frontier.done(url)
+
+    async def crawl(self, on_page: Optional[PageCallback] = None) -> Dict[str, int]:
+        """Crawl until the page budget or the frontier runs out.
+
+        ``on_page(url, depth, content)`` is called (and awaited if it returns
+        a coroutine) for every page fetched.
+        """
+        await self.bot.init_session()
+        try:
+            await asyncio.gather(*(self._worker(on_page) for _ in range(self.concurrency)))
+        finally:
+            self.checkpoint()
+        return {'pages': self.pages_crawled, 'duplicates': self.duplicate_pages,
+                'errors': self.errors, 'pending': self.frontier.pending()}
+
+    async def close(self):
+        self.frontier.close()
+        await self.bot.close_session()
+
+
+async def _main(args):
+    crawler = Crawler(args.url, max_pages=args.max_pages, max_depth=args.max_depth,
+                      concurrency=args.concurrency, state_path=args.state,
+                      skip_duplicates=not args.keep_duplicates)
+    with open(args.output, 'a', encoding='utf-8') as out:
+        def write_page(url, depth, content):
+            out.write(json.dumps({'url': url, 'depth': depth, **content}) + '\n')
+        try:
+            summary = await crawler.crawl(write_page)
+        finally:
+            await crawler.close()
+    print(f"Crawled {summary['pages']} pages ({summary['duplicates']} near-duplicates skipped, "
+          f"{summary['errors']} errors, {summary['pending']} still queued)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl a site by following its links.")
+    parser.add_argument("url", help="Start URL")
+    parser.add_argument("--max-pages", type=int, default=100, help="Page budget")
+    parser.add_argument("--max-depth", type=int, default=3, help="Maximum link depth from the start URL")
+    parser.add_argument("--concurrency", type=int, default=5, help="Concurrent fetches")
+    parser.add_argument("--keep-duplicates", action="store_true", help="Output near-duplicate pages too")
+    parser.add_argument("--state", default="crawl_state.db", help="Checkpoint file; rerun to resume")
+    parser.add_argument("-o", "--output", default="crawl_pages.jsonl", help="Append crawled pages here")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,99 @@
+"""Near-duplicate page detection with SimHash.
+
+A page's fingerprint is the 64-bit SimHash of the word shingles in its
+paragraph text, so templated near-copies (pagination, print views, tracking
+variants) land within a few bits of each other. ``NearDuplicateIndex`` finds
+fingerprints within ``max_distance`` bits without scanning every page. It
+splits fingerprints into ``max_distance + 1`` bands, and by the pigeonhole
+principle any match within that distance shares at least one band exactly,
+so only pages in the same band buckets are compared.
+"""
+import hashlib
+import logging
+import re
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+# Pages with fewer shingles than this are too short to fingerprint reliably
+MIN_SHINGLES = 8
+
+_WORD = re.compile(r'\w+')
+
+
+def simhash(text: str, shingle_size: int = 3) -> Optional[int]:
+    """64-bit SimHash of the word shingles in ``text``, or None if it is too short."""
+    words = _WORD.findall(text.lower())
+    shingles = {' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in shingles),
+        dtype='<u8', count=len(shingles)
+    )
+    # Per bit position, count how many shingle hashes have that bit set
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int(np.packbits(majority, bitorder='little').view('<u8')[0])
+
+
+def page_fingerprint(paragraphs: Iterable[str]) -> Optional[int]:
+    return simhash(' '.join(paragraphs))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """Banded SimHash index answering "is this page a near-copy of one seen before?"."""
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.num_bands = max_distance + 1
+        self.band_bits = -(-FINGERPRINT_BITS // self.num_bands)
+        self._band_mask = (1 << self.band_bits) - 1
+        self._buckets: List[Dict[int, List[tuple]]] = [{} for _ in range(self.num_bands)]
+        self.size = 0
+
+    def _bands(self, fingerprint: int):
+        for band in range(self.num_bands):
+            yield band, (fingerprint >> (band * self.band_bits)) & self._band_mask
+
+    def find(self, fingerprint: int) -> Optional[Hashable]:
+        """Key of an indexed page within ``max_distance`` bits, if any."""
+        for band, value in self._bands(fingerprint):
+            for key, candidate in self._buckets[band].get(value, ()):
+                if hamming_distance(fingerprint, candidate) <= self.max_distance:
+                    return key
+        return None
+
+    def add(self, key: Hashable, fingerprint: int):
+        for band, value in self._bands(fingerprint):
+            self._buckets[band].setdefault(value, []).append((key, fingerprint))
+        self.size += 1
+
+    def check_and_add(self, key: Hashable, fingerprint: Optional[int]) -> Optional[Hashable]:
+        """Return the key this page duplicates, or index it and return None."""
+        if fingerprint is None:
+            return None
+        duplicate_of = self.find(fingerprint)
+        if duplicate_of is None:
+            self.add(key, fingerprint)
+        return duplicate_of
+
+
+def collapse_duplicates(pages: List[Dict[str, Any]], max_distance: int = 3) -> List[Dict[str, Any]]:
+    """Drop pages whose paragraph text nearly duplicates an earlier page."""
+    index = NearDuplicateIndex(max_distance)
+    unique = []
+    for position, page in enumerate(pages):
+        duplicate_of = index.check_and_add(position, page_fingerprint(page.get('paragraphs', [])))
+        if duplicate_of is None:
+            unique.append(page)
+    if len(unique) < len(pages):
+        logger.info("Collapsed %d near-duplicate pages", len(pages) - len(unique))
+    return unique
@@ -0,0 +1,577 @@
+"""Local CPU sentence embeddings and a vector store for semantic retrieval.
+
+``Embedder`` runs a small sentence-embedding model (``all-MiniLM-L6-v2`` by
+default) with transformers and torch, imported only on first use. Its
+``Linear`` layers are quantized to int8 with dynamic quantization, which is
+typically 2-3x faster on CPU with near-identical retrieval quality.
+``EmbeddingService`` puts a micro-batcher in front of it, so texts from
+concurrent callers share one forward pass, and caches vectors by text hash.
+
+``VectorStore`` keeps unit-normalized vectors in one contiguous NumPy array,
+persisted as an append-only file. It searches by brute-force dot product,
+or through an IVF index (k-means coarse clusters, searching only the
+``nprobe`` nearest ones) once it holds enough vectors. ``SemanticIndex``
+ties the two together for knowledge base chunks.
+"""
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import metrics
+from knowledge_base import SearchHit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_TOKENS = 256
+# Below this many vectors brute force is fast enough and exact
+IVF_MIN_VECTORS = 50000
+SEARCH_BLOCK_ROWS = 65536
+
+
+def available() -> bool:
+    """Whether torch and transformers are installed."""
+    return all(importlib.util.find_spec(name) is not None for name in ('torch', 'transformers'))
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class Embedder:
+    """Sentence-embedding model on CPU, loaded on first use."""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, quantize: bool = True, batch_size: int = 32,
+                 max_tokens: int = MAX_TOKENS, threads: Optional[int] = None):
+        self.model_name = model_name
+        self.quantize = quantize
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.threads = threads
+        self._model = None
+        self._tokenizer = None
+        self._torch = None
+        self._load_error: Optional[Exception] = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._model is not None:
+                return
+            if self._load_error is not None:
+                raise RuntimeError(f"Embedding model unavailable: {self._load_error}")
+            try:
+                import torch
+                from transformers import AutoModel, AutoTokenizer
+                if self.threads:
+                    torch.set_num_threads(self.threads)
+                tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                model = AutoModel.from_pretrained(self.model_name).eval()
+                if self.quantize:
+                    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            except Exception as e:
+                self._load_error = e
+                raise RuntimeError(f"Embedding model unavailable: {e}") from e
+            self._torch, self._tokenizer, self._model = torch, tokenizer, model
+            logger.info("Loaded embedding model %s%s", self.model_name, " (int8)" if self.quantize else "")
+
+    @property
+    def dimension(self) -> int:
+        self.load()
+        return self._model.config.hidden_size
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit-normalized float32 embeddings, one row per text."""
+        self.load()
+        torch = self._torch
+        result = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        # Batching similar lengths together keeps padding, and wasted compute, low
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        with torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                encoded = self._tokenizer([texts[i] for i in batch], padding=True, truncation=True,
+                                          max_length=self.max_tokens, return_tensors='pt')
+                hidden = self._model(**encoded).last_hidden_state
+                # Mean pooling over real (non-padding) tokens
+                mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                pooled = torch.nn.functional.normalize(pooled, dim=1)
+                result[batch] = pooled.numpy()
+        return result
+
+
+class MicroBatcher:
+    """Groups texts from concurrent callers into shared ``encode`` calls.
+
+    The worker takes the first waiting request, then keeps collecting for up
+    to ``max_wait`` seconds or until ``max_batch`` texts are queued.
+    """
+
+    def __init__(self, encode, max_batch: int = 64, max_wait: float = 0.005):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, texts: List[str]) -> Future:
+        future: Future = Future()
+        if not texts:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='embed-batcher', daemon=True)
+                self._thread.start()
+        self._queue.put((texts, future))
+        return future
+
+    def _run(self):
+        while True:
+            requests = [self._queue.get()]
+            count = len(requests[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while count < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                requests.append(request)
+                count += len(request[0])
+            texts = [text for batch, _ in requests for text in batch]
+            try:
+                with metrics.timer(metrics.EMBED_SECONDS):
+                    vectors = self.encode(texts)
+                metrics.EMBED_TEXTS.inc(len(texts))
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for batch, future in requests:
+                future.set_result(vectors[offset:offset + len(batch)])
+                offset += len(batch)
+
+
+class EmbeddingService:
+    """Cached, micro-batched embeddings for chunks and questions."""
+
+    def __init__(self, embedder: Optional[Embedder] = None, cache_size: int = 100000,
+                 max_batch: int = 64, max_wait: float = 0.005):
+        self.embedder = embedder or Embedder()
+        self.batcher = MicroBatcher(self.embedder.encode, max_batch, max_wait)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        return self.embedder.dimension
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings for ``texts``; blocks until computed. Safe to call from many threads."""
+        keys = [text_key(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[bytes, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    vectors[i] = cached
+                else:
+                    missing.setdefault(key, []).append(i)
+        metrics.EMBED_CACHE.inc(len(texts) - sum(len(v) for v in missing.values()), outcome='hit')
+        if missing:
+            metrics.EMBED_CACHE.inc(sum(len(v) for v in missing.values()), outcome='miss')
+            computed = self.batcher.submit([texts[positions[0]] for positions in missing.values()]).result()
+            with self._lock:
+                for (key, positions), vector in zip(missing.items(), computed):
+                    self._cache[key] = vector
+                    for i in positions:
+                        vectors[i] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.stack(vectors)
+
+
+def kmeans(vectors: np.ndarray, clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids of unit vectors."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = np.bincount(assignment, minlength=clusters) == 0
+        # Reseed empty clusters from random vectors
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid of each vector."""
+    return np.argmax(vectors.astype(np.float32) @ centroids.T, axis=1).astype(np.int32)
+
+
+class VectorStore:
+    """Append-only store of unit vectors with brute-force and IVF search."""
+
+    def __init__(self, directory: str, dimension: int, dtype=np.float32):
+        self.directory = directory
+        self.dimension = dimension
+        self.dtype = np.dtype(dtype)
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, f'vectors.{self.dtype.name}')
+        self._lists_path = os.path.join(directory, 'lists.i32')
+        self._centroids_path = os.path.join(directory, 'centroids.npy')
+        self._lock = threading.Lock()
+
+        stored = np.fromfile(self._vectors_path, dtype=self.dtype) if os.path.exists(self._vectors_path) \
+            else np.zeros(0, dtype=self.dtype)
+        self.count = len(stored) // dimension
+        self._vectors = np.zeros((max(1024, self.count * 2), dimension), dtype=self.dtype)
+        self._vectors[:self.count] = stored[:self.count * dimension].reshape(self.count, dimension)
+        self.live = np.ones(len(self._vectors), dtype=bool)
+
+        self.centroids: Optional[np.ndarray] = None
+        self._lists = np.full(len(self._vectors), -1, dtype=np.int32)
+        # (centroids, rows of each list), rebuilt when either changes
+        self._members: Optional[Tuple[np.ndarray, List[np.ndarray]]] = None
+        if os.path.exists(self._centroids_path) and os.path.exists(self._lists_path):
+            self.centroids = np.load(self._centroids_path)
+            lists = np.fromfile(self._lists_path, dtype=np.int32)[:self.count]
+            self._lists[:len(lists)] = lists
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self.count]
+
+    def _grow(self, needed: int):
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name, fill in (('_vectors', 0), ('live', True), ('_lists', -1)):
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        """Append vectors; returns their row ids."""
+        vectors = np.asarray(vectors, dtype=self.dtype).reshape(-1, self.dimension)
+        with self._lock:
+            start = self.count
+            self._grow(start + len(vectors))
+            self._vectors[start:start + len(vectors)] = vectors
+            with open(self._vectors_path, 'ab') as f:
+                f.write(vectors.tobytes())
+            if self.centroids is not None:
+                lists = _nearest(vectors, self.centroids)
+                self._lists[start:start + len(vectors)] = lists
+                with open(self._lists_path, 'ab') as f:
+                    f.write(lists.tobytes())
+                self._members = None
+            self.count += len(vectors)
+        return np.arange(start, start + len(vectors))
+
+    def truncate(self, count: int):
+        """Drop rows from ``count`` on, on disk as well."""
+        with self._lock:
+            if count >= self.count:
+                return
+            self.count = count
+            os.truncate(self._vectors_path, count * self.dimension * self.dtype.itemsize)
+            if self.centroids is not None:
+                os.truncate(self._lists_path, count * 4)
+            self._members = None
+
+    def delete(self, rows: Sequence[int]):
+        self.live[np.asarray(rows, dtype=np.int64)] = False
+
+    def needs_training(self) -> bool:
+        """True once there are enough vectors for IVF, or 4x more than at the last training."""
+        if self.count < IVF_MIN_VECTORS:
+            return False
+        return self.centroids is None or self.count >= len(self.centroids) ** 2
+
+    def train_ivf(self, clusters: Optional[int] = None):
+        """Cluster the stored vectors and assign every row to its nearest centroid.
+
+        k-means runs on the rows present when it starts, without holding the
+        lock, so adds and searches carry on; rows added meanwhile are
+        assigned when the new centroids are swapped in.
+        """
+        count = self.count
+        vectors = self._vectors[:count]
+        clusters = clusters or max(1, int(2 * np.sqrt(count)))
+        rng = np.random.default_rng(0)
+        # 40 training vectors per centroid is enough for k-means to settle
+        sample = min(count, clusters * 40)
+        training = vectors[rng.choice(count, sample, replace=False)].astype(np.float32)
+        centroids = kmeans(training, min(clusters, len(training)))
+        lists = np.concatenate([_nearest(vectors[start:start + SEARCH_BLOCK_ROWS], centroids)
+                                for start in range(0, count, SEARCH_BLOCK_ROWS)])
+        with self._lock:
+            if self.count > count:
+                lists = np.concatenate([lists, _nearest(self._vectors[count:self.count], centroids)])
+            lists = lists[:self.count]
+            self._lists[:len(lists)] = lists
+            np.save(self._centroids_path, centroids)
+            lists.tofile(self._lists_path)
+            self._members = None
+            self.centroids = centroids
+        logger.info("Trained IVF index: %d clusters over %d vectors", len(centroids), len(lists))
+
+    def _list_members(self, centroids: np.ndarray) -> List[np.ndarray]:
+        members = self._members
+        if members is None or members[0] is not centroids:
+            lists = self._lists[:self.count]
+            order = np.argsort(lists, kind='stable')
+            bounds = np.searchsorted(lists[order], np.arange(len(centroids) + 1))
+            members = self._members = (centroids, [order[bounds[c]:bounds[c + 1]] for c in range(len(centroids))])
+        return members[1]
+
+    def search(self, query: np.ndarray, k: int = 8, nprobe: Optional[int] = 32,
+               rows: Optional[Sequence[int]] = None) -> List[Tuple[float, int]]:
+        """``(score, row)`` of the ``k`` most similar live vectors.
+
+        Uses the IVF index when it is trained and ``nprobe`` is set, and
+        brute force otherwise. Given ``rows``, only those rows are scored.
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        count = self.count
+        if not count:
+            return []
+        centroids = self.centroids
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+            rows = rows[rows < count]
+            rows = rows[self.live[rows]]
+            scores = self._vectors[rows].astype(np.float32, copy=False) @ query
+        elif centroids is not None and nprobe:
+            probes = np.argsort(centroids @ query)[-nprobe:]
+            members = self._list_members(centroids)
+            rows = np.concatenate([members[c] for c in probes])
+            rows = rows[self.live[rows]]
+            scores = self._vectors[rows].astype(np.float32, copy=False) @ query
+        else:
+            # Score in blocks so float16 storage is converted a block at a time
+            scores = np.concatenate([
+                self._vectors[start:min(start + SEARCH_BLOCK_ROWS, count)].astype(np.float32, copy=False) @ query
+                for start in range(0, count, SEARCH_BLOCK_ROWS)])
+            scores[~self.live[:count]] = -np.inf
+            rows = np.arange(count)
+        if len(rows) > k:
+            top = np.argpartition(scores, -k)[-k:]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores)
+        return [(float(scores[i]), int(rows[i])) for i in order if np.isfinite(scores[i])]
+
+
+class SemanticIndex:
+    """Embeddings of knowledge base chunks, searchable by meaning.
+
+    Row metadata (URL, title, chunk text) is kept in an append-only JSONL
+    log alongside the vectors. Re-adding a URL keeps the rows of chunks it
+    still has and deletes the rest, with a ``delete_rows`` tombstone in the
+    log; chunks seen before reuse their stored vectors instead of being
+    embedded again. The IVF index is (re)trained on a background thread
+    unless ``background_training`` is False.
+    """
+
+    def __init__(self, directory: str, service: Optional[EmbeddingService] = None, dtype=np.float32,
+                 background_training: bool = True):
+        self.directory = directory
+        self.service = service or EmbeddingService()
+        self.dtype = dtype
+        self.background_training = background_training
+        self._train_thread: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+        self._rows_path = os.path.join(directory, 'rows.jsonl')
+        self._lock = threading.Lock()
+        self.rows: List[Dict[str, Any]] = []
+        self._url_rows: Dict[str, List[int]] = {}
+        self._key_rows: Dict[bytes, int] = {}
+        self.store: Optional[VectorStore] = None
+        self._dimension_path = os.path.join(directory, 'dimension')
+        if os.path.exists(self._dimension_path):
+            with open(self._dimension_path, encoding='utf-8') as f:
+                self.store = VectorStore(directory, int(f.read()), dtype)
+        self._load_rows()
+
+    def _load_rows(self):
+        deleted = []
+        valid_bytes = 0
+        if os.path.exists(self._rows_path):
+            with open(self._rows_path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash; everything after it is dropped
+                        break
+                    valid_bytes += len(line)
+                    if 'delete' in record:
+                        deleted.extend(self._url_rows.pop(record['delete'], []))
+                    elif 'delete_rows' in record:
+                        rows = set(record['delete_rows'])
+                        self._url_rows[record['url']] = [row for row in self._url_rows.get(record['url'], [])
+                                                         if row not in rows]
+                        deleted.extend(rows)
+                    else:
+                        self._index_row(record)
+            if valid_bytes < os.path.getsize(self._rows_path):
+                os.truncate(self._rows_path, valid_bytes)
+        if self.store is not None:
+            # Vectors are appended before their rows, so a crash can leave extras
+            self.store.truncate(len(self.rows))
+            self.store.delete(deleted)
+
+    def _open_store(self, dimension: int) -> VectorStore:
+        with open(self._dimension_path, 'w', encoding='utf-8') as f:
+            f.write(str(dimension))
+        return VectorStore(self.directory, dimension, self.dtype)
+
+    def _index_row(self, record: Dict[str, Any]):
+        row = len(self.rows)
+        self.rows.append(record)
+        self._url_rows.setdefault(record['url'], []).append(row)
+        self._key_rows[text_key(record['text'])] = row
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._url_rows.values())
+
+    def add_page(self, url: str, title: str, chunks: List[str]) -> int:
+        """Embed and store a page's chunks, replacing earlier ones; returns new embeddings computed.
+
+        Rows of chunks the page still has are kept, and only the rows of
+        chunks it no longer has are deleted, so a re-scraped page costs
+        work in proportion to what changed.
+        """
+        if not chunks:
+            self.delete_url(url)
+            return 0
+        with self._lock:
+            existing = Counter(self.rows[row]['text'] for row in self._url_rows.get(url, [])
+                               if self.rows[row]['title'] == title)
+        added = []
+        for chunk in chunks:
+            if existing[chunk] > 0:
+                existing[chunk] -= 1
+            else:
+                added.append(chunk)
+        with self._lock:
+            reused = {i: self._key_rows[text_key(chunk)] for i, chunk in enumerate(added)
+                      if text_key(chunk) in self._key_rows}
+        fresh = [chunk for i, chunk in enumerate(added) if i not in reused]
+        new_vectors = self.service.embed(fresh) if fresh else None
+        with self._lock:
+            if self.store is None:
+                self.store = self._open_store(new_vectors.shape[1] if new_vectors is not None
+                                              else self.service.dimension)
+            vectors = np.zeros((len(added), self.store.dimension), dtype=np.float32)
+            fresh_index = 0
+            for i in range(len(added)):
+                if i in reused:
+                    vectors[i] = self.store.vectors[reused[i]]
+                else:
+                    vectors[i] = new_vectors[fresh_index]
+                    fresh_index += 1
+            keep = Counter(chunks) - Counter(added)
+            stale = []
+            for row in self._url_rows.get(url, []):
+                text = self.rows[row]['text']
+                if keep[text] > 0 and self.rows[row]['title'] == title:
+                    keep[text] -= 1
+                else:
+                    stale.append(row)
+            with open(self._rows_path, 'a', encoding='utf-8') as f:
+                if stale:
+                    self.store.delete(stale)
+                    stale_rows = set(stale)
+                    self._url_rows[url] = [row for row in self._url_rows[url] if row not in stale_rows]
+                    f.write(json.dumps({'delete_rows': stale, 'url': url}) + '\n')
+                if added:
+                    self.store.add(vectors)
+                for chunk in added:
+                    record = {'url': url, 'title': title, 'text': chunk}
+                    f.write(json.dumps(record) + '\n')
+                    self._index_row(record)
+        if added and self.store.needs_training():
+            self._train()
+        return len(fresh)
+
+    def _train(self):
+        if not self.background_training:
+            self.store.train_ivf()
+            return
+        with self._lock:
+            if self._train_thread is not None and self._train_thread.is_alive():
+                return
+            self._train_thread = threading.Thread(target=self._train_loop, name='ivf-train', daemon=True)
+            self._train_thread.start()
+
+    def _train_loop(self):
+        # Rows added while training may already call for the next round
+        try:
+            while self.store.needs_training():
+                self.store.train_ivf()
+        except Exception:
+            logger.exception("IVF training failed")
+
+    def close(self):
+        """Wait for a running IVF training to finish."""
+        if self._train_thread is not None:
+            self._train_thread.join()
+
+    def _delete_url_locked(self, url: str) -> int:
+        rows = self._url_rows.pop(url, [])
+        if rows:
+            self.store.delete(rows)
+            with open(self._rows_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'delete': url}) + '\n')
+        return len(rows)
+
+    def delete_url(self, url: str) -> int:
+        with self._lock:
+            return self._delete_url_locked(url) if self.store is not None else 0
+
+    def search(self, question: str, k: int = 8, nprobe: int = 32, url: Optional[str] = None) -> List[SearchHit]:
+        """Chunks most similar to ``question``; with ``url``, only that page's chunks."""
+        if self.store is None:
+            return []
+        page_rows = None
+        if url is not None:
+            page_rows = list(self._url_rows.get(url, ()))
+            if not page_rows:
+                return []
+        query = self.service.embed([question])[0]
+        hits = []
+        rows = self.rows
+        for score, row in self.store.search(query, k, nprobe, rows=page_rows):
+            if row >= len(rows):
+                # add_page stores a page's vectors just before appending their rows
+                continue
+            record = rows[row]
+            hits.append(SearchHit(score, record['url'], record['title'], record['text']))
+        return hits
@@ -0,0 +1,298 @@
+"""Bulk ingestion of a whole site from its sitemaps.
+
+Sitemaps are found through the ``Sitemap:`` lines of robots.txt (falling
+back to ``/sitemap.xml``), and sitemap indexes are followed recursively.
+Sitemaps are parsed as they stream in, gzipped or not, so memory does not
+grow with sitemap size. Discovered pages are queued newest-``lastmod``-first
+in a SQLite frontier and fetched concurrently. Pages whose ``lastmod`` has
+not changed since the last run are skipped, and fetched pages whose text is
+unchanged are not passed on again.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, NamedTuple, Optional, Set
+from urllib.parse import urljoin
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from content_scorer import chat_context
+from crawler import Frontier, normalize_url, site_of
+from page_content import PageContent
+from web_scraping_bot import WebScrapingBot
+
+logger = logging.getLogger(__name__)
+
+# Limits from the sitemaps protocol, with some headroom
+MAX_SITEMAP_BYTES = 64 * 1024 * 1024
+MAX_SITEMAP_DEPTH = 3
+CHUNK_SIZE = 64 * 1024
+
+
+class SitemapEntry(NamedTuple):
+    url: str
+    lastmod: Optional[float]  # Unix timestamp
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """W3C datetime (``2024-05-01`` or ``2024-05-01T10:00:00+00:00``) to a timestamp."""
+    if not value:
+        return None
+    value = value.strip().replace('Z', '+00:00')
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+class SitemapStreamParser:
+    """Incrementally parses sitemap XML, gzipped or plain, from raw byte chunks."""
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=('start', 'end'))
+        self._decompressor = None
+        self._sniffed = False
+        self._bytes = 0
+        self._root = None
+        self.is_index = False
+
+    def feed(self, chunk: bytes):
+        """Feed raw bytes; returns the ``(kind, SitemapEntry)`` pairs completed so far.
+
+        ``kind`` is ``'url'`` for pages and ``'sitemap'`` for nested sitemaps.
+        """
+        if not self._sniffed:
+            self._sniffed = True
+            if chunk[:2] == b'\x1f\x8b':
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor is None:
+            self._feed_xml(chunk)
+        else:
+            # Inflate in bounded pieces so a gzip bomb can't allocate more than a piece at once
+            while chunk:
+                self._feed_xml(self._decompressor.decompress(chunk, CHUNK_SIZE * 4))
+                chunk = self._decompressor.unconsumed_tail
+        return self._drain()
+
+    def _feed_xml(self, data: bytes):
+        self._bytes += len(data)
+        if self._bytes > MAX_SITEMAP_BYTES:
+            raise ValueError("Sitemap exceeds the maximum uncompressed size")
+        self._parser.feed(data)
+
+    def close(self):
+        if self._decompressor is not None:
+            self._feed_xml(self._decompressor.flush())
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self):
+        entries = []
+        for event, element in self._parser.read_events():
+            name = _local_name(element.tag)
+            if event == 'start':
+                if self._root is None:
+                    self._root = element
+                    self.is_index = name == 'sitemapindex'
+                continue
+            if name not in ('url', 'sitemap'):
+                continue
+            fields = {_local_name(child.tag): (child.text or '').strip() for child in element}
+            if fields.get('loc'):
+                entries.append((name, SitemapEntry(fields['loc'], parse_lastmod(fields.get('lastmod')))))
+            # Drop finished entries so the tree never holds more than one at a time
+            if element in self._root:
+                self._root.remove(element)
+            else:
+                element.clear()
+        return entries
+
+
+PageCallback = Callable[[str, Dict[str, Any]], Optional[Awaitable[None]]]
+
+
+class SiteIngestor:
+    """Discovers a site's pages from its sitemaps and fetches new or changed ones."""
+
+    def __init__(self, site_url: str, bot: Optional[WebScrapingBot] = None, concurrency: int = 20,
+                 state_path: str = 'ingest_state.db', max_pages: Optional[int] = None):
+        self.site_url = normalize_url(site_url)
+        if self.site_url is None:
+            raise ValueError(f"Cannot ingest URL: {site_url}")
+        self.site = site_of(self.site_url)
+        self.bot = bot or WebScrapingBot()
+        self.bot.max_connections = max(self.bot.max_connections, concurrency)
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.frontier = Frontier(state_path)
+        self.frontier.db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                sitemap_lastmod REAL,
+                lastmod REAL,
+                content_hash TEXT,
+                fetched_at REAL
+            )
+        """)
+        self.stats = {'discovered': 0, 'disallowed': 0, 'skipped_unchanged': 0, 'fetched': 0,
+                      'content_unchanged': 0, 'errors': 0}
+
+    async def _sitemap_urls(self):
+        urls = []
+        if self.bot.robots is not None:
+            urls = await self.bot.robots.sitemaps(self.site_url)
+        return urls or [urljoin(self.site_url, '/sitemap.xml')]
+
+    async def iter_sitemap(self, url: str, depth: int = 0, seen: Optional[Set[str]] = None
+                           ) -> AsyncIterator[SitemapEntry]:
+        """Yield page entries from a sitemap, following sitemap indexes."""
+        seen = set() if seen is None else seen
+        if url in seen or depth > MAX_SITEMAP_DEPTH:
+            return
+        seen.add(url)
+        if self.bot.robots is not None and not await self.bot.robots.allowed(url):
+            logger.info("Skipping sitemap disallowed by robots.txt: %s", url)
+            return
+
+        parser = SitemapStreamParser()
+        nested = []
+        try:
+            async with self.bot.session.get(url, allow_redirects=True, ssl=False) as response:
+                if response.status != 200:
+                    logger.warning("Sitemap %s returned HTTP %d", url, response.status)
+                    return
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    for kind, entry in parser.feed(chunk):
+                        if kind == 'sitemap':
+                            nested.append(entry.url)
+                        else:
+                            yield entry
+            for kind, entry in parser.close():
+                if kind == 'sitemap':
+                    nested.append(entry.url)
+                else:
+                    yield entry
+        except (ParseError, ValueError) as e:
+            logger.warning("Could not parse sitemap %s: %s", url, e)
+        for child in nested:
+            async for entry in self.iter_sitemap(child, depth + 1, seen):
+                yield entry
+
+    def _unchanged_since_last_run(self, entry: SitemapEntry) -> bool:
+        if entry.lastmod is None:
+            return False
+        row = self.frontier.db.execute("SELECT lastmod FROM pages WHERE url = ?", (entry.url,)).fetchone()
+        return row is not None and row[0] is not None and entry.lastmod <= row[0]
+
+    async def discover(self) -> int:
+        """Queue every new or changed page listed in the site's sitemaps."""
+        await self.bot.init_session()
+        queued = 0
+        for sitemap_url in await self._sitemap_urls():
+            async for entry in self.iter_sitemap(sitemap_url):
+                url = normalize_url(entry.url)
+                if url is None or site_of(url) != self.site:
+                    continue
+                entry = entry._replace(url=url)
+                self.stats['discovered'] += 1
+                if self.bot.robots is not None and not await self.bot.robots.allowed(url):
+                    self.stats['disallowed'] += 1
+                    continue
+                if self._unchanged_since_last_run(entry):
+                    self.stats['skipped_unchanged'] += 1
+                    continue
+                # Newest first; pages without a lastmod go last
+                priority = -entry.lastmod if entry.lastmod is not None else float('inf')
+                self.frontier.db.execute(
+                    "INSERT INTO pages (url, sitemap_lastmod) VALUES (?, ?) "
+                    "ON CONFLICT (url) DO UPDATE SET sitemap_lastmod = excluded.sitemap_lastmod",
+                    (url, entry.lastmod)
+                )
+                if self.frontier.push(url, 0, priority):
+                    queued += 1
+        self.frontier.commit()
+        logger.info("Discovered %d pages, queued %d, %d unchanged since last run",
+                    self.stats['discovered'], queued, self.stats['skipped_unchanged'])
+        return queued
+
+    def _record(self, url: str, content_hash: str) -> bool:
+        """Store the page's state; returns False if its text is unchanged."""
+        row = self.frontier.db.execute("SELECT content_hash FROM pages WHERE url = ?", (url,)).fetchone()
+        self.frontier.db.execute(
+            "UPDATE pages SET lastmod = sitemap_lastmod, content_hash = ?, fetched_at = ? WHERE url = ?",
+            (content_hash, time.time(), url)
+        )
+        return row is None or row[0] != content_hash
+
+    async def _worker(self, on_page: Optional[PageCallback]):
+        while self.max_pages is None or self.stats['fetched'] < self.max_pages:
+            leased = self.frontier.pop()
+            if leased is None:
+                return
+            url = leased[0]
+            try:
+                html = await self.bot.scrape_webpage(url)
+                content = PageContent.from_dict(self.bot._extract_main_content(html, base_url=url))
+                self.stats['fetched'] += 1
+                content_hash = hashlib.sha256(chat_context(content).encode('utf-8')).hexdigest()
+                if not self._record(url, content_hash):
+                    self.stats['content_unchanged'] += 1
+                elif on_page is not None:
+                    result = on_page(url, content)
+                    if asyncio.iscoroutine(result):
+                        await result
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning("Failed to ingest %s: %s", url, e)
+            finally:
+                self.frontier.done(url)
+            if self.stats['fetched'] % 50 == 0:
+                self.frontier.commit()
+
+    async def ingest(self, on_page: Optional[PageCallback] = None) -> Dict[str, int]:
+        """Discover pages and fetch them; ``on_page(url, content)`` gets new or changed pages."""
+        await self.discover()
+        try:
+            await asyncio.gather(*(self._worker(on_page) for _ in range(self.concurrency)))
+        finally:
+            self.frontier.commit()
+        return dict(self.stats, pending=self.frontier.pending())
+
+    async def close(self):
+        self.frontier.close()
+        await self.bot.close_session()
+
+
+async def _main(args):
+    ingestor = SiteIngestor(args.url, concurrency=args.concurrency, state_path=args.state,
+                            max_pages=args.max_pages)
+    with open(args.output, 'a', encoding='utf-8') as out:
+        def write_page(url, content):
+            out.write(json.dumps({'url': url, **content}) + '\n')
+        try:
+            stats = await ingestor.ingest(write_page)
+        finally:
+            await ingestor.close()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a whole site from its robots.txt and sitemaps.")
+    parser.add_argument("url", help="Site root, e.g. https://docs.example.com/")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent fetches")
+    parser.add_argument("--max-pages", type=int, help="Stop after fetching this many pages")
+    parser.add_argument("--state", default="ingest_state.db", help="State file; reruns skip unchanged pages")
+    parser.add_argument("-o", "--output", default="ingested_pages.jsonl", help="Append new or changed pages here")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
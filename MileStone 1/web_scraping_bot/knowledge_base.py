@@ -0,0 +1,841 @@
+"""Persistent multi-page knowledge base for cross-page Q&A.
+
+Every scraped page is split into chunks of main-content text, which are
+written to immutable segment files. Each segment holds:
+  * an inverted index: sorted ``uint64`` term hashes, posting offsets, and
+    posting doc ids and term frequencies, scored with BM25
+  * a document store: chunk lengths and offsets into one UTF-8 text blob
+  * a page table: URL hashes, titles and chunk ranges, for source
+    attribution and for replacing a page when it is scraped again
+
+Segments are memory-mapped, so opening the knowledge base reads only the
+manifest and the segment headers, and a query touches only the posting
+lists of its own terms. New pages always go into a new segment. A
+background thread merges the smallest segments once there are
+``merge_factor`` of them, dropping deleted chunks on the way. The manifest
+lists the live segments and their deletion files, and is replaced
+atomically, so a crash never leaves a half-written index behind.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import metrics
+from schemas import SchemaError, decode_page_record
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'KBSEG\x00\x01\x00'
+MANIFEST = 'MANIFEST.json'
+SEGMENT_SUFFIX = '.kbs'
+DELETES_SUFFIX = '.del'
+
+CHUNK_CHARS = 1000
+# On average one block in this many ends a chunk early (see chunk_page)
+CHUNK_ANCHOR_EVERY = 4
+MAX_TERM_CHARS = 40
+MAX_TERM_FREQUENCY = np.iinfo(np.uint16).max
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Query terms in more than this fraction of chunks don't select candidates
+COMMON_TERM_FRACTION = 0.05
+
+_TOKEN = re.compile(r'[^\W_]+')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from has have he her his i if in into is it its '
+    'of on or our she so that the their them then there these they this to was we were '
+    'what when which who will with you your'.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens, without stopwords."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS and len(t) <= MAX_TERM_CHARS]
+
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def url_hash(url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8, person=b'kb-url').digest(),
+                          'little')
+
+
+def _split_long(block: str, max_chars: int) -> List[str]:
+    """Split a block longer than ``max_chars`` at sentence, then word, boundaries."""
+    pieces, current = [], ''
+    for sentence in _SENTENCE_END.split(block):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _is_anchor(piece: str) -> bool:
+    return zlib.crc32(piece.encode('utf-8')) % CHUNK_ANCHOR_EVERY == 0
+
+
+def chunk_page(content: Mapping[str, Any], max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Pack a page's main-content blocks into chunks of up to ``max_chars``.
+
+    Falls back to paragraphs and list items when the page has no main-content
+    blocks, as ``content_scorer.chat_context`` does. Boundaries are content
+    defined: a chunk also ends, once at least half full, after a block whose
+    hash makes it an anchor. An edit then changes only the chunks around it,
+    instead of shifting every later boundary, so a re-scraped page keeps most
+    of its chunks.
+    """
+    blocks = list(content.get('main_text') or [])
+    if not blocks:
+        blocks = list(content.get('paragraphs', []))
+        for list_type in ('ordered', 'unordered'):
+            blocks.extend(' '.join(items) for items in content.get('lists', {}).get(list_type, []))
+    chunks, current = [], ''
+    for block in blocks:
+        block = block.strip()
+        if not block:
+            continue
+        for piece in (_split_long(block, max_chars) if len(block) > max_chars else [block]):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current}\n{piece}" if current else piece
+            if len(current) * 2 >= max_chars and _is_anchor(piece):
+                chunks.append(current)
+                current = ''
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class SearchHit(NamedTuple):
+    score: float
+    url: str
+    title: str
+    text: str
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _write_file(path: str, data: Iterable[bytes]):
+    """Write ``data`` to ``path`` atomically."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for piece in data:
+            f.write(piece)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _write_segment(path: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    """Write named arrays after a JSON header, each aligned to 8 bytes."""
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = [offset, array.dtype.str, int(array.size)]
+        offset = _align(offset + array.nbytes)
+    header = json.dumps({'arrays': layout, **meta}, separators=(',', ':')).encode('utf-8')
+    preamble = MAGIC + struct.pack('<Q', len(header)) + header
+    pieces = [preamble, b'\0' * (_align(len(preamble)) - len(preamble))]
+    for name, array in arrays.items():
+        pieces.append(array.tobytes())
+        pieces.append(b'\0' * (_align(array.nbytes) - array.nbytes))
+    _write_file(path, pieces)
+
+
+def _segment_arrays(term_hashes: np.ndarray, docs: np.ndarray, frequencies: np.ndarray,
+                    doc_lengths: np.ndarray, doc_pages: np.ndarray, text_offsets: np.ndarray,
+                    text: np.ndarray, page_hashes: np.ndarray, page_docs: np.ndarray,
+                    page_offsets: np.ndarray, page_meta: np.ndarray) -> Dict[str, np.ndarray]:
+    """Sort postings by (term, doc) and lay out every column of a segment."""
+    order = np.lexsort((docs, term_hashes))
+    term_hashes = term_hashes[order]
+    terms, starts = np.unique(term_hashes, return_index=True)
+    return {
+        'terms': terms.astype(np.uint64),
+        'term_offsets': np.append(starts, len(term_hashes)).astype(np.uint64),
+        'postings': docs[order].astype(np.uint32),
+        'frequencies': frequencies[order].astype(np.uint16),
+        'doc_lengths': doc_lengths.astype(np.uint32),
+        'doc_pages': doc_pages.astype(np.uint32),
+        'text_offsets': text_offsets.astype(np.uint64),
+        'text': text.astype(np.uint8),
+        'page_hashes': page_hashes.astype(np.uint64),
+        'page_order': np.argsort(page_hashes, kind='stable').astype(np.uint32),
+        'page_docs': page_docs.astype(np.uint32),
+        'page_offsets': page_offsets.astype(np.uint64),
+        'page_meta': page_meta.astype(np.uint8),
+    }
+
+
+def _blob(pieces: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate byte strings; returns ``(offsets, blob)``."""
+    offsets = np.zeros(len(pieces) + 1, dtype=np.uint64)
+    np.cumsum([len(p) for p in pieces], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(pieces), dtype=np.uint8)
+
+
+def build_segment(path: str, pages: List[Tuple[str, str, List[str]]]) -> Dict[str, Any]:
+    """Write a segment for ``(url, title, chunks)`` pages; returns its manifest entry."""
+    hashes: Dict[str, int] = {}
+    term_column, doc_column, frequency_column = [], [], []
+    doc_lengths, doc_pages, texts, metas, page_docs = [], [], [], [], [0]
+    for page_index, (url, title, chunks) in enumerate(pages):
+        metas.append(json.dumps({'url': url, 'title': title, 'added': time.time()}).encode('utf-8'))
+        for chunk in chunks:
+            doc = len(doc_lengths)
+            tokens = tokenize(chunk)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                h = hashes.get(token)
+                if h is None:
+                    h = hashes[token] = term_hash(token)
+                term_column.append(h)
+                doc_column.append(doc)
+                frequency_column.append(min(count, MAX_TERM_FREQUENCY))
+            doc_lengths.append(len(tokens))
+            doc_pages.append(page_index)
+            texts.append(chunk.encode('utf-8'))
+        page_docs.append(len(doc_lengths))
+
+    text_offsets, text = _blob(texts)
+    page_offsets, page_meta = _blob(metas)
+    arrays = _segment_arrays(
+        np.array(term_column, dtype=np.uint64), np.array(doc_column, dtype=np.uint32),
+        np.array(frequency_column, dtype=np.uint16), np.array(doc_lengths, dtype=np.uint32),
+        np.array(doc_pages, dtype=np.uint32), text_offsets, text,
+        np.array([url_hash(url) for url, _, _ in pages], dtype=np.uint64),
+        np.array(page_docs, dtype=np.uint32), page_offsets, page_meta
+    )
+    meta = {'docs': len(doc_lengths), 'pages': len(pages), 'total_length': int(sum(doc_lengths))}
+    _write_segment(path, arrays, meta)
+    return meta
+
+
+class Segment:
+    """Read-only, memory-mapped segment file.
+
+    Never closed explicitly: a search may still hold a segment that a merge
+    has replaced, so its map is released when the last reference goes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Kept, as the file may be unlinked while the segment is still read
+        self.size = len(self._mmap)
+        if self._mmap[:8] != MAGIC:
+            raise ValueError(f"Not a knowledge base segment: {path}")
+        header_length = struct.unpack_from('<Q', self._mmap, 8)[0]
+        header = json.loads(self._mmap[16:16 + header_length])
+        base = _align(16 + header_length)
+        for name, (offset, dtype, count) in header['arrays'].items():
+            setattr(self, name, np.frombuffer(self._mmap, dtype=dtype, count=count, offset=base + offset))
+        self.doc_count = header['docs']
+        self.page_count = header['pages']
+        self.total_length = header['total_length']
+
+    def lookup(self, h: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Doc ids and term frequencies for a term hash (empty if absent)."""
+        index = int(np.searchsorted(self.terms, np.uint64(h)))
+        if index == len(self.terms) or self.terms[index] != h:
+            return self.postings[:0], self.frequencies[:0]
+        start, stop = int(self.term_offsets[index]), int(self.term_offsets[index + 1])
+        return self.postings[start:stop], self.frequencies[start:stop]
+
+    def text_of(self, doc: int) -> str:
+        return self.text[int(self.text_offsets[doc]):int(self.text_offsets[doc + 1])].tobytes().decode('utf-8')
+
+    def page_of(self, doc: int) -> Dict[str, Any]:
+        page = int(self.doc_pages[doc])
+        return json.loads(self.page_meta[int(self.page_offsets[page]):int(self.page_offsets[page + 1])].tobytes())
+
+    def docs_for_url(self, h: int) -> np.ndarray:
+        """Doc ids of every chunk stored for a URL hash."""
+        sorted_hashes = self.page_hashes[self.page_order]
+        start = int(np.searchsorted(sorted_hashes, np.uint64(h), 'left'))
+        stop = int(np.searchsorted(sorted_hashes, np.uint64(h), 'right'))
+        ranges = [np.arange(self.page_docs[p], self.page_docs[p + 1], dtype=np.uint32)
+                  for p in self.page_order[start:stop]]
+        return np.concatenate(ranges) if ranges else np.zeros(0, dtype=np.uint32)
+
+
+class _SegmentState:
+    """A live segment with its deleted doc ids, as listed in one manifest generation."""
+
+    __slots__ = ('name', 'segment', 'deletes', 'deletes_file', '_live')
+
+    def __init__(self, name: str, segment: Segment, deletes: Optional[np.ndarray] = None,
+                 deletes_file: Optional[str] = None):
+        self.name = name
+        self.segment = segment
+        self.deletes = deletes if deletes is not None else np.zeros(0, dtype=np.uint32)
+        self.deletes_file = deletes_file
+        self._live = None
+
+    @property
+    def live_count(self) -> int:
+        return self.segment.doc_count - len(self.deletes)
+
+    @property
+    def live(self) -> Optional[np.ndarray]:
+        """Boolean mask of live docs, or None when nothing is deleted."""
+        if not len(self.deletes):
+            return None
+        if self._live is None:
+            live = np.ones(self.segment.doc_count, dtype=bool)
+            live[self.deletes] = False
+            self._live = live
+        return self._live
+
+    def entry(self) -> Dict[str, Any]:
+        return {'name': self.name, 'deletes': self.deletes_file}
+
+
+def merge_segments(path: str, states: List[_SegmentState]) -> Tuple[Dict[str, Any], List[np.ndarray]]:
+    """Write one segment holding the live chunks of ``states``.
+
+    Postings are remapped rather than re-tokenized. Returns the new manifest
+    entry and, per source, the new doc id of each old doc (-1 if deleted).
+    """
+    columns: Dict[str, List[np.ndarray]] = {name: [] for name in (
+        'term_hashes', 'docs', 'frequencies', 'doc_lengths', 'doc_pages', 'text_lengths', 'page_hashes',
+        'page_doc_counts', 'meta_lengths')}
+    texts, metas, mappings = [], [], []
+    doc_base = page_base = 0
+    for state in states:
+        segment = state.segment
+        live = state.live
+        if live is None:
+            live = np.ones(segment.doc_count, dtype=bool)
+        new_ids = np.cumsum(live, dtype=np.int64) - 1 + doc_base
+        new_ids[~live] = -1
+        mappings.append(new_ids)
+
+        term_of_posting = np.repeat(segment.terms, np.diff(segment.term_offsets).astype(np.int64))
+        mapped = new_ids[segment.postings]
+        keep = mapped >= 0
+        columns['term_hashes'].append(term_of_posting[keep])
+        columns['docs'].append(mapped[keep])
+        columns['frequencies'].append(segment.frequencies[keep])
+
+        page_live_counts = np.bincount(segment.doc_pages[live], minlength=segment.page_count)
+        live_pages = page_live_counts > 0
+        new_page_ids = np.cumsum(live_pages, dtype=np.int64) - 1 + page_base
+        columns['doc_lengths'].append(segment.doc_lengths[live])
+        columns['doc_pages'].append(new_page_ids[segment.doc_pages[live]])
+        columns['text_lengths'].append(np.diff(segment.text_offsets)[live])
+        columns['page_hashes'].append(segment.page_hashes[live_pages])
+        columns['page_doc_counts'].append(page_live_counts[live_pages])
+        columns['meta_lengths'].append(np.diff(segment.page_offsets)[live_pages])
+        texts.extend(_runs(segment.text, segment.text_offsets, live))
+        metas.extend(_runs(segment.page_meta, segment.page_offsets, live_pages))
+        doc_base += int(live.sum())
+        page_base += int(live_pages.sum())
+
+    joined = {name: np.concatenate(parts) if parts else np.zeros(0) for name, parts in columns.items()}
+
+    def offsets(lengths):
+        result = np.zeros(len(lengths) + 1, dtype=np.uint64)
+        np.cumsum(lengths, out=result[1:])
+        return result
+
+    arrays = _segment_arrays(
+        joined['term_hashes'].astype(np.uint64), joined['docs'], joined['frequencies'],
+        joined['doc_lengths'], joined['doc_pages'], offsets(joined['text_lengths']),
+        np.concatenate(texts) if texts else np.zeros(0, dtype=np.uint8),
+        joined['page_hashes'], offsets(joined['page_doc_counts']), offsets(joined['meta_lengths']),
+        np.concatenate(metas) if metas else np.zeros(0, dtype=np.uint8)
+    )
+    meta = {'docs': doc_base, 'pages': page_base, 'total_length': int(joined['doc_lengths'].sum())}
+    _write_segment(path, arrays, meta)
+    return meta, mappings
+
+
+def _runs(blob: np.ndarray, offsets: np.ndarray, live: np.ndarray) -> List[np.ndarray]:
+    """Slices of ``blob`` covering each run of consecutive live items."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], live, [False])).astype(np.int8)))
+    return [blob[int(offsets[start]):int(offsets[stop])] for start, stop in zip(edges[::2], edges[1::2])]
+
+
+class KnowledgeBase:
+    """On-disk BM25 index of every page added, searchable across pages."""
+
+    def __init__(self, directory: str, merge_factor: int = 8, chunk_chars: int = CHUNK_CHARS,
+                 background_merge: bool = True):
+        self.directory = directory
+        self.merge_factor = merge_factor
+        self.chunk_chars = chunk_chars
+        self.background_merge = background_merge
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._merge_wanted = threading.Event()
+        self._merge_thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._generation = 0
+        self._next_segment = 0
+        # Replaced, never mutated, so searches can read it without locking
+        self._states: Tuple[_SegmentState, ...] = ()
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        manifest_path = self._path(MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            self._generation = manifest['generation']
+            self._next_segment = manifest['next_segment']
+            states = []
+            for entry in manifest['segments']:
+                deletes = None
+                if entry['deletes']:
+                    deletes = np.fromfile(self._path(entry['deletes']), dtype=np.uint32)
+                states.append(_SegmentState(entry['name'], Segment(self._path(entry['name'])),
+                                            deletes, entry['deletes']))
+            self._states = tuple(states)
+        self._remove_unreferenced()
+
+    def _retire(self, names: Iterable[Optional[str]]):
+        """Delete files dropped from the manifest."""
+        for name in names:
+            if not name:
+                continue
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                # Still mapped on platforms that lock open files; removed on next open
+                pass
+
+    def _save_manifest(self, states: Tuple[_SegmentState, ...]):
+        self._generation += 1
+        manifest = {
+            'version': 1,
+            'generation': self._generation,
+            'next_segment': self._next_segment,
+            'segments': [state.entry() for state in states],
+        }
+        _write_file(self._path(MANIFEST), [json.dumps(manifest, indent=1).encode('utf-8')])
+        self._states = states
+
+    def _remove_unreferenced(self):
+        """Delete files left behind by a crash or by a failed removal."""
+        referenced = {MANIFEST}
+        for state in self._states:
+            referenced.add(state.name)
+            if state.deletes_file:
+                referenced.add(state.deletes_file)
+        for name in os.listdir(self.directory):
+            if name not in referenced and name.endswith((SEGMENT_SUFFIX, DELETES_SUFFIX, '.tmp')):
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    # Still mapped on platforms that lock open files; retried on next open
+                    pass
+
+    @staticmethod
+    def _replaced_deletes(old: Iterable[_SegmentState], new: Iterable[_SegmentState]) -> List[str]:
+        """Deletion files of ``old`` that ``new`` no longer references."""
+        current = {state.deletes_file for state in new}
+        return [state.deletes_file for state in old if state.deletes_file not in current]
+
+    def _new_segment_name(self) -> str:
+        with self._lock:
+            self._next_segment += 1
+            return f"seg_{self._next_segment:06d}{SEGMENT_SUFFIX}"
+
+    def _with_deletes(self, state: _SegmentState, doc_ids: np.ndarray) -> _SegmentState:
+        """Copy of ``state`` with ``doc_ids`` also deleted, written to a new deletion file."""
+        deletes = np.union1d(state.deletes, doc_ids).astype(np.uint32)
+        if len(deletes) == len(state.deletes):
+            return state
+        name = f"{state.name[:-len(SEGMENT_SUFFIX)]}.{self._generation + 1}{DELETES_SUFFIX}"
+        _write_file(self._path(name), [deletes.tobytes()])
+        return _SegmentState(state.name, state.segment, deletes, name)
+
+    def add_page(self, url: str, content: Mapping[str, Any]) -> int:
+        return self.add_pages([(url, content)])
+
+    def _live_chunks(self, states: Tuple[_SegmentState, ...], url: str) -> List[Tuple[int, int, str, str]]:
+        """``(state index, doc id, text, title)`` of every live chunk of ``url``."""
+        h = url_hash(url)
+        found = []
+        for i, state in enumerate(states):
+            docs = state.segment.docs_for_url(h)
+            if len(docs) and len(state.deletes):
+                docs = np.setdiff1d(docs, state.deletes)
+            for doc in docs:
+                found.append((i, int(doc), state.segment.text_of(doc), state.segment.page_of(doc)['title']))
+        return found
+
+    def add_pages(self, pages: Iterable[Tuple[str, Mapping[str, Any]]]) -> int:
+        """Add or replace pages; returns the number of chunks written.
+
+        A page already in the knowledge base is updated in place: chunks it
+        still has are kept, only new chunks are written, and chunks it no
+        longer has are deleted (all of them when its title changed). The
+        deletes go in the same manifest update that adds the new segment, so
+        searches never see both versions.
+        """
+        by_url: Dict[str, Tuple[str, List[str]]] = {}
+        for url, content in pages:
+            by_url[url] = (content.get('title') or '', chunk_page(content, self.chunk_chars))
+        if not by_url:
+            return 0
+        snapshot = self._states
+        batch, kept = [], {}
+        for url, (title, chunks) in by_url.items():
+            existing = Counter(text for _, _, text, old_title in self._live_chunks(snapshot, url)
+                               if old_title == title)
+            added = []
+            for chunk in chunks:
+                if existing[chunk] > 0:
+                    existing[chunk] -= 1
+                else:
+                    added.append(chunk)
+            kept[url] = Counter(chunks) - Counter(added)
+            if added:
+                batch.append((url, title, added))
+        name = segment = None
+        written = 0
+        if batch:
+            name = self._new_segment_name()
+            written = build_segment(self._path(name), batch)['docs']
+            segment = Segment(self._path(name))
+        with self._lock:
+            # Stale chunks are found again under the lock, as a merge may have replaced segments
+            stale: Dict[int, List[int]] = {}
+            for url, keep in kept.items():
+                for i, doc, text, _ in self._live_chunks(self._states, url):
+                    if keep[text] > 0:
+                        keep[text] -= 1
+                    else:
+                        stale.setdefault(i, []).append(doc)
+            if stale or segment is not None:
+                states = [self._with_deletes(state, np.array(stale[i], dtype=np.uint32)) if i in stale else state
+                          for i, state in enumerate(self._states)]
+                if segment is not None:
+                    states.append(_SegmentState(name, segment))
+                old_states = self._states
+                self._save_manifest(tuple(states))
+                self._retire(self._replaced_deletes(old_states, states))
+        logger.debug("Updated %d pages in %s: %d chunks written, %d deleted", len(by_url), self.directory,
+                     written, sum(len(docs) for docs in stale.values()))
+        self._maybe_merge()
+        return written
+
+    def delete_url(self, url: str) -> int:
+        """Delete every chunk of ``url``; returns how many were deleted."""
+        h = url_hash(url)
+        deleted = 0
+        with self._lock:
+            states = []
+            for state in self._states:
+                old = np.setdiff1d(state.segment.docs_for_url(h), state.deletes)
+                deleted += len(old)
+                states.append(self._with_deletes(state, old) if len(old) else state)
+            if deleted:
+                old_states = self._states
+                self._save_manifest(tuple(states))
+                self._retire(self._replaced_deletes(old_states, states))
+        return deleted
+
+    def search(self, query: str, k: int = 8, max_per_page: int = 3,
+               url: Optional[str] = None) -> List[SearchHit]:
+        """Top ``k`` chunks for ``query`` by BM25, at most ``max_per_page`` per URL.
+
+        With ``url``, only that page's chunks are searched and the per-page cap does not apply.
+        """
+        with metrics.timer(metrics.KB_SEARCH_SECONDS):
+            return self._search(query, k, k if url else max_per_page, url)
+
+    def _search(self, query: str, k: int, max_per_page: int, url: Optional[str] = None) -> List[SearchHit]:
+        states = self._states
+        hashes = [term_hash(t) for t in dict.fromkeys(tokenize(query))]
+        total_docs = sum(state.segment.doc_count for state in states)
+        if not hashes or not total_docs:
+            return []
+        average_length = max(sum(state.segment.total_length for state in states) / total_docs, 1.0)
+
+        postings = [[state.segment.lookup(h) for h in hashes] for state in states]
+        document_frequency = [sum(len(per_term[i][0]) for per_term in postings) for i in range(len(hashes))]
+        idf = [math.log(1 + (total_docs - df + 0.5) / (df + 0.5)) for df in document_frequency]
+
+        # Terms in more than COMMON_TERM_FRACTION of all chunks add little to
+        # BM25 but have the longest posting lists. When the query has rarer
+        # terms, only those pick candidates and common terms just add to their
+        # scores (MaxScore-style pruning); otherwise every posting is scored.
+        # Terms in no chunk at all cannot pick candidates either.
+        rare = [i for i, df in enumerate(document_frequency) if 0 < df <= COMMON_TERM_FRACTION * total_docs]
+        essential = set(rare or range(len(hashes)))
+
+        candidates = []
+        # Over-fetch so the per-page cap can still fill k results
+        wanted = k * max(max_per_page, 1) * 2
+        # BM25 length normalisation as K1 * (1 - B + B * length / average), in float32
+        length_weight = np.float32(K1 * B / average_length)
+        length_base = np.float32(K1 * (1 - B))
+        for state, per_term in zip(states, postings):
+            segment = state.segment
+
+            def term_scores(i, docs, frequencies):
+                tf = frequencies.astype(np.float32)
+                norm = segment.doc_lengths[docs].astype(np.float32) * length_weight + length_base
+                return np.float32(idf[i] * (K1 + 1)) * tf / (tf + norm)
+
+            essential_postings = [(i, *per_term[i]) for i in essential if len(per_term[i][0])]
+            if not essential_postings:
+                continue
+            if sum(len(docs) for _, docs, _ in essential_postings) > segment.doc_count // 8:
+                dense = np.zeros(segment.doc_count, dtype=np.float32)
+                for i, docs, frequencies in essential_postings:
+                    # Each doc appears once per posting list, so fancy-index addition is exact
+                    dense[docs] += term_scores(i, docs, frequencies)
+                hits = np.flatnonzero(dense)
+                scores = dense[hits]
+            elif len(essential_postings) == 1:
+                i, hits, frequencies = essential_postings[0]
+                scores = term_scores(i, hits, frequencies)
+            else:
+                hits, inverse = np.unique(np.concatenate([docs for _, docs, _ in essential_postings]),
+                                          return_inverse=True)
+                scores = np.bincount(inverse, weights=np.concatenate(
+                    [term_scores(*posting) for posting in essential_postings])).astype(np.float32)
+
+            for i, (docs, frequencies) in enumerate(per_term):
+                if i in essential or not len(docs):
+                    continue
+                # Postings are sorted by doc id, so candidates are found by binary search
+                positions = np.minimum(np.searchsorted(docs, hits), len(docs) - 1)
+                found = docs[positions] == hits
+                scores[found] += term_scores(i, docs[positions[found]], frequencies[positions[found]])
+
+            if state.live is not None:
+                live = state.live[hits]
+                hits, scores = hits[live], scores[live]
+            if url is not None:
+                on_page = np.isin(hits, segment.docs_for_url(url_hash(url)))
+                hits, scores = hits[on_page], scores[on_page]
+            if len(hits) > wanted:
+                top = np.argpartition(scores, -wanted)[-wanted:]
+                hits, scores = hits[top], scores[top]
+            candidates.extend((float(score), segment, int(doc)) for score, doc in zip(scores, hits))
+
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        results: List[SearchHit] = []
+        per_page: Dict[str, int] = {}
+        for score, segment, doc in candidates:
+            page = segment.page_of(doc)
+            if per_page.get(page['url'], 0) >= max_per_page:
+                continue
+            per_page[page['url']] = per_page.get(page['url'], 0) + 1
+            results.append(SearchHit(score, page['url'], page['title'], segment.text_of(doc)))
+            if len(results) == k:
+                break
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        states = self._states
+        return {
+            'segments': len(states),
+            'chunks': sum(state.live_count for state in states),
+            'deleted_chunks': sum(len(state.deletes) for state in states),
+            'bytes': sum(state.segment.size for state in states),
+        }
+
+    def __len__(self) -> int:
+        return sum(state.live_count for state in self._states)
+
+    def _maybe_merge(self):
+        if len(self._states) < self.merge_factor:
+            return
+        if not self.background_merge:
+            self.merge()
+            return
+        with self._lock:
+            if self._merge_thread is None or not self._merge_thread.is_alive():
+                self._merge_thread = threading.Thread(target=self._merge_loop, name='kb-merge', daemon=True)
+                self._merge_thread.start()
+        self._merge_wanted.set()
+
+    def _merge_loop(self):
+        while not self._closed:
+            self._merge_wanted.wait()
+            self._merge_wanted.clear()
+            if self._closed:
+                return
+            try:
+                self.merge()
+            except Exception:
+                logger.exception("Knowledge base merge failed")
+
+    def merge(self, force: bool = False) -> int:
+        """Merge the smallest segments until fewer than ``merge_factor`` remain.
+
+        With ``force``, merge everything into one segment. Returns the number
+        of merges done.
+        """
+        merges = 0
+        while True:
+            states = self._states
+            if force and (len(states) > 1 or any(len(state.deletes) for state in states)):
+                sources = list(states)
+            elif len(states) >= self.merge_factor:
+                sources = sorted(states, key=lambda state: state.live_count)[:self.merge_factor]
+            else:
+                return merges
+            self._merge(sources)
+            merges += 1
+            force = False
+
+    def _merge(self, sources: List[_SegmentState]):
+        name = self._new_segment_name()
+        started = time.perf_counter()
+        meta, mappings = merge_segments(self._path(name), sources)
+        merged = _SegmentState(name, Segment(self._path(name)))
+        with self._lock:
+            current = {state.name: state for state in self._states}
+            # Carry over deletes that happened while the merge was running
+            late_deletes = [
+                mapping[np.setdiff1d(current[source.name].deletes, source.deletes)]
+                for source, mapping in zip(sources, mappings)
+            ]
+            late_deletes = np.concatenate(late_deletes)
+            late_deletes = late_deletes[late_deletes >= 0].astype(np.uint32)
+            if len(late_deletes):
+                merged = self._with_deletes(merged, late_deletes)
+            source_names = {source.name for source in sources}
+            states = tuple(state for state in self._states if state.name not in source_names) + (merged,)
+            self._save_manifest(states)
+            # Searches that took a snapshot before the swap keep reading the
+            # sources; unlinked files stay mapped until they drop them
+            self._retire([current[name].deletes_file for name in source_names] + list(source_names))
+        logger.info("Merged %d segments into %s (%d chunks) in %.2fs",
+                    len(sources), name, meta['docs'], time.perf_counter() - started)
+
+    def close(self):
+        self._closed = True
+        self._merge_wanted.set()
+        if self._merge_thread is not None:
+            self._merge_thread.join()
+
+
+def format_sources(hits: List[SearchHit], limit: int) -> Tuple[str, List[Dict[str, Any]]]:
+    """Lay out hits as numbered sources for a prompt, within ``limit`` characters.
+
+    Returns the context text and the sources it cites, numbered by page.
+    """
+    numbers: Dict[str, int] = {}
+    sources: List[Dict[str, Any]] = []
+    blocks, length = [], 0
+    for hit in hits:
+        if hit.url not in numbers:
+            numbers[hit.url] = len(numbers) + 1
+        block = f"[{numbers[hit.url]}] {hit.title or hit.url}\n{hit.text}"
+        if blocks and length + len(block) > limit:
+            break
+        blocks.append(block[:limit])
+        length += len(block) + 2
+        if numbers[hit.url] > len(sources):
+            sources.append({'number': numbers[hit.url], 'url': hit.url, 'title': hit.title})
+    return "\n\n".join(blocks), sources
+
+
+def fuse_hits(hit_lists: List[List[SearchHit]], k: int, rank_constant: int = 60) -> List[SearchHit]:
+    """Merge ranked hit lists by reciprocal rank fusion, dropping repeated chunks.
+
+    Scores from different rankers (BM25, cosine similarity) aren't
+    comparable, so each hit counts ``1 / (rank_constant + rank)`` per list.
+    """
+    fused: Dict[Tuple[str, str], List[Any]] = {}
+    for hits in hit_lists:
+        for rank, hit in enumerate(hits, 1):
+            entry = fused.setdefault((hit.url, hit.text), [0.0, hit])
+            entry[0] += 1.0 / (rank_constant + rank)
+    ranked = sorted(fused.values(), key=lambda entry: entry[0], reverse=True)[:k]
+    return [hit._replace(score=score) for score, hit in ranked]
+
+
+def _main(args):
+    kb = KnowledgeBase(args.directory, background_merge=False)
+    try:
+        if args.command == 'add':
+            with open(args.pages, 'rb') as f:
+                batch, skipped = [], 0
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        page = decode_page_record(line)
+                    except SchemaError as e:
+                        logger.warning("Skipping line %d of %s: %s", line_number, args.pages, e)
+                        skipped += 1
+                        continue
+                    batch.append((page.pop('url'), page))
+                    if len(batch) == args.batch:
+                        kb.add_pages(batch)
+                        batch = []
+                kb.add_pages(batch)
+            if skipped:
+                logger.warning("Skipped %d invalid page records", skipped)
+        elif args.command == 'search':
+            for hit in kb.search(args.query, k=args.k):
+                print(f"{hit.score:7.3f}  {hit.url}\n         {hit.text[:200]!r}")
+        elif args.command == 'merge':
+            kb.merge(force=True)
+        print(json.dumps(kb.stats(), indent=2))
+    finally:
+        kb.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the scraped-pages knowledge base.")
+    parser.add_argument("--directory", default=os.getenv("CHAT_KB_DIR", "knowledge_base"),
+                        help="Knowledge base directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Add pages from a JSONL file written by crawler.py or ingest.py")
+    add.add_argument("pages")
+    add.add_argument("--batch", type=int, default=500, help="Pages per segment")
+    search = commands.add_parser("search", help="Search the knowledge base")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=8, help="Number of results")
+    commands.add_parser("merge", help="Merge all segments into one")
+    commands.add_parser("stats", help="Show segment and chunk counts")
+    logging.basicConfig(level=logging.INFO)
+    _main(parser.parse_args())
@@ -0,0 +1,218 @@
+"""Lightweight counters, histograms and timers for the scraping hot path.
+
+Metrics are rendered in the Prometheus text exposition format by the
+``/metrics`` endpoint. Set ``SCRAPER_METRICS=0`` to disable collection; the
+timers then return a shared no-op context manager so instrumented code pays
+only an attribute lookup and a function call.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from types import SimpleNamespace
+from typing import Dict, List, Sequence, Tuple
+
+import aiohttp
+
+ENABLED = os.getenv("SCRAPER_METRICS", "1").lower() not in ("0", "false", "no")
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL_TIMER = nullcontext()
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not ENABLED:
+            return
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not ENABLED:
+            return
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """Context manager that observes the elapsed time of its block."""
+        if not ENABLED:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_PHASE_SECONDS = REGISTRY.register(Histogram(
+    "scraper_http_phase_seconds", "Time spent in each phase of a page fetch", labels=("phase",)))
+FETCH_TOTAL = REGISTRY.register(Counter(
+    "scraper_fetch_total", "Page fetch attempts by outcome", labels=("outcome",)))
+PARSE_SECONDS = REGISTRY.register(Histogram(
+    "scraper_parse_seconds", "Time spent parsing HTML into a document tree"))
+EXTRACT_SECTION_SECONDS = REGISTRY.register(Histogram(
+    "scraper_extract_section_seconds", "Time spent extracting each content section", labels=("section",)))
+SCRAPE_SECONDS = REGISTRY.register(Histogram(
+    "scraper_scrape_seconds", "End-to-end time to fetch and extract a URL"))
+LLM_SECONDS = REGISTRY.register(Histogram(
+    "scraper_llm_request_seconds", "Time spent waiting on the LLM API"))
+RENDER_SECONDS = REGISTRY.register(Histogram(
+    "scraper_render_seconds", "Time spent rendering a page in the headless browser pool"))
+RENDER_TOTAL = REGISTRY.register(Counter(
+    "scraper_render_total", "Headless browser renders by outcome", labels=("outcome",)))
+DUPLICATE_PAGES = REGISTRY.register(Counter(
+    "scraper_duplicate_pages_total", "Crawled pages skipped as near-duplicates of earlier pages"))
+KB_SEARCH_SECONDS = REGISTRY.register(Histogram(
+    "scraper_kb_search_seconds", "Time spent searching the knowledge base"))
+EMBED_SECONDS = REGISTRY.register(Histogram(
+    "scraper_embed_batch_seconds", "Time spent in each batched embedding forward pass"))
+EMBED_TEXTS = REGISTRY.register(Counter(
+    "scraper_embed_texts_total", "Texts embedded by the local model"))
+EMBED_CACHE = REGISTRY.register(Counter(
+    "scraper_embed_cache_total", "Embedding cache lookups by outcome", labels=("outcome",)))
+SINGLE_FLIGHT = REGISTRY.register(Counter(
+    "scraper_single_flight_total", "Coalescable calls by role: leaders did the work, coalesced waited on it",
+    labels=("name", "outcome")))
+PAGE_VERSIONS = REGISTRY.register(Counter(
+    "scraper_page_versions_total", "Recorded page scrapes by outcome: new, changed or unchanged",
+    labels=("outcome",)))
+PAGE_BLOCK_CHANGES = REGISTRY.register(Counter(
+    "scraper_page_block_changes_total", "Blocks added to or removed from re-scraped pages", labels=("op",)))
+EXPORT_SECONDS = REGISTRY.register(Histogram(
+    "scraper_export_seconds", "Time spent exporting scraped data", labels=("format",)))
+
+
+def timer(histogram: Histogram, **labels):
+    """Time a block against ``histogram``; a no-op when metrics are disabled."""
+    return histogram.time(**labels)
+
+
+def http_trace_configs() -> List[aiohttp.TraceConfig]:
+    """aiohttp trace configs recording DNS, connect and time-to-first-byte."""
+    if not ENABLED:
+        return []
+
+    async def on_request_start(session, ctx, params):
+        ctx.request_start = time.perf_counter()
+
+    async def on_dns_start(session, ctx, params):
+        ctx.dns_start = time.perf_counter()
+
+    async def on_dns_end(session, ctx, params):
+        HTTP_PHASE_SECONDS.observe(time.perf_counter() - ctx.dns_start, phase="dns")
+
+    async def on_connect_start(session, ctx, params):
+        ctx.connect_start = time.perf_counter()
+
+    async def on_connect_end(session, ctx, params):
+        HTTP_PHASE_SECONDS.observe(time.perf_counter() - ctx.connect_start, phase="connect")
+
+    async def on_request_end(session, ctx, params):
+        # Fired once the response headers arrive
+        HTTP_PHASE_SECONDS.observe(time.perf_counter() - ctx.request_start, phase="ttfb")
+
+    trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=lambda trace_request_ctx: SimpleNamespace())
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connect_start)
+    trace_config.on_connection_create_end.append(on_connect_end)
+    trace_config.on_request_end.append(on_request_end)
+    return [trace_config]
@@ -0,0 +1,223 @@
+"""Compact, columnar storage for extracted page content.
+
+``_extract_main_content`` builds nested dicts and lists of strings. That is
+convenient, but on link- and table-heavy pages the per-object overhead
+(a dict per link, a list per table row, a str object per cell) is several
+times the size of the text itself. ``PageContent`` keeps the same data in:
+  * one ``StringPool`` per page: every distinct string interned once, stored
+    back to back in a single ``str`` and addressed by integer id
+  * ``array`` columns of string ids and offsets for links, lists, tables,
+    headings and the plain string sections
+
+It implements the read-only ``Mapping`` interface, so existing code that
+does ``content['links']`` or ``content.get('tables')`` keeps working. Each
+section is rebuilt as plain dicts and lists when it is accessed, and
+``to_dict`` returns the full dict form.
+"""
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Section order of the dict form (matches web_scraping_bot.CONTENT_SECTIONS)
+SECTIONS = (
+    'title', 'meta_description', 'headings', 'paragraphs', 'links',
+    'lists', 'tables', 'contact_info', 'social_links', 'main_text'
+)
+STRING_LIST_SECTIONS = ('paragraphs', 'social_links', 'main_text')
+# Sections made of a sequence of items, which can be sliced and paginated
+PAGINATED_SECTIONS = ('paragraphs', 'links', 'lists', 'tables', 'social_links', 'main_text')
+CONTACT_FIELDS = ('emails', 'phones', 'addresses')
+LIST_KINDS = ('ordered', 'unordered')
+
+
+class StringPool:
+    """Immutable interned strings stored in one buffer, addressed by id."""
+
+    __slots__ = ('_text', '_offsets')
+
+    def __init__(self, strings: List[str]):
+        self._text = ''.join(strings)
+        offsets = array('I', [0])
+        position = 0
+        for s in strings:
+            position += len(s)
+            offsets.append(position)
+        self._offsets = offsets
+
+    def __getitem__(self, string_id: int) -> str:
+        return self._text[self._offsets[string_id]:self._offsets[string_id + 1]]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def strings(self, ids: Iterable[int]) -> List[str]:
+        return [self[i] for i in ids]
+
+
+class _PoolBuilder:
+    __slots__ = ('ids', 'strings')
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, s: str) -> int:
+        string_id = self.ids.get(s)
+        if string_id is None:
+            string_id = self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return string_id
+
+    def column(self, strings: Iterable[str]) -> array:
+        return array('I', (self.add(s) for s in strings))
+
+
+def _offsets(groups: Iterable[list]) -> array:
+    """Start offset of each group in a flattened column, plus the total length."""
+    offsets = array('I', [0])
+    for group in groups:
+        offsets.append(offsets[-1] + len(group))
+    return offsets
+
+
+class PageContent(Mapping):
+    """Read-only, memory-compact view of one page's extracted content."""
+
+    __slots__ = (
+        '_pool', 'title', 'meta_description',
+        '_heading_levels', '_heading_ids',
+        '_string_lists',
+        '_link_urls', '_link_texts',
+        '_list_kinds', '_list_offsets', '_list_item_ids',
+        '_table_header_offsets', '_table_header_ids', '_table_row_offsets', '_row_cell_offsets', '_cell_ids',
+        '_contact_ids', '_extra'
+    )
+
+    @classmethod
+    def from_dict(cls, content: Dict[str, Any]) -> 'PageContent':
+        """Build from the dict form returned by ``_extract_main_content``."""
+        page = cls.__new__(cls)
+        pool = _PoolBuilder()
+        page.title = content.get('title', '')
+        page.meta_description = content.get('meta_description', '')
+
+        headings = content.get('headings', {})
+        page._heading_levels = array('B', (int(level) for level, texts in headings.items() for _ in texts))
+        page._heading_ids = pool.column(text for texts in headings.values() for text in texts)
+
+        page._string_lists = {name: pool.column(content.get(name, [])) for name in STRING_LIST_SECTIONS}
+
+        links = content.get('links', [])
+        page._link_urls = pool.column(link['url'] for link in links)
+        page._link_texts = pool.column(link['text'] for link in links)
+
+        lists = content.get('lists', {})
+        all_lists = [(kind, items) for kind in LIST_KINDS for items in lists.get(kind, [])]
+        page._list_kinds = array('B', (LIST_KINDS.index(kind) for kind, _ in all_lists))
+        page._list_offsets = _offsets(items for _, items in all_lists)
+        page._list_item_ids = pool.column(item for _, items in all_lists for item in items)
+
+        tables = content.get('tables', [])
+        page._table_header_offsets = _offsets(table['headers'] for table in tables)
+        page._table_header_ids = pool.column(h for table in tables for h in table['headers'])
+        page._table_row_offsets = _offsets(table['data'] for table in tables)
+        rows = [row for table in tables for row in table['data']]
+        page._row_cell_offsets = _offsets(rows)
+        page._cell_ids = pool.column(cell for row in rows for cell in row)
+
+        contact = content.get('contact_info', {})
+        page._contact_ids = {field: pool.column(contact.get(field, [])) for field in CONTACT_FIELDS}
+
+        page._extra = {k: v for k, v in content.items() if k not in SECTIONS} or None
+        page._pool = StringPool(pool.strings)
+        return page
+
+    def _section(self, name: str) -> Any:
+        if name == 'title':
+            return self.title
+        if name == 'meta_description':
+            return self.meta_description
+        if name in PAGINATED_SECTIONS:
+            return self.section_slice(name)
+        if name == 'headings':
+            headings: Dict[str, List[str]] = {}
+            for level, string_id in zip(self._heading_levels, self._heading_ids):
+                headings.setdefault(str(level), []).append(self._pool[string_id])
+            return headings
+        if name == 'contact_info':
+            return {field: self._pool.strings(ids) for field, ids in self._contact_ids.items()}
+        return self._extra[name]
+
+    def section_length(self, name: str) -> int:
+        """Number of items in a paginated section."""
+        if name in STRING_LIST_SECTIONS:
+            return len(self._string_lists[name])
+        if name == 'links':
+            return len(self._link_urls)
+        if name == 'lists':
+            return len(self._list_kinds)
+        if name == 'tables':
+            return len(self._table_row_offsets) - 1
+        raise KeyError(name)
+
+    def section_slice(self, name: str, start: int = 0, stop: Optional[int] = None) -> Any:
+        """Items ``start:stop`` of a paginated section, building only those items.
+
+        ``lists`` counts ordered lists before unordered ones and returns the
+        usual ``{'ordered': [...], 'unordered': [...]}`` shape.
+        """
+        total = self.section_length(name)
+        start, stop, _ = slice(start, stop).indices(total)
+        strings = self._pool.strings
+        if name in STRING_LIST_SECTIONS:
+            return strings(self._string_lists[name][start:stop])
+        if name == 'links':
+            pool = self._pool
+            return [{'url': pool[self._link_urls[i]], 'text': pool[self._link_texts[i]]}
+                    for i in range(start, stop)]
+        if name == 'lists':
+            lists = {kind: [] for kind in LIST_KINDS}
+            offsets = self._list_offsets
+            for index in range(start, stop):
+                items = strings(self._list_item_ids[offsets[index]:offsets[index + 1]])
+                lists[LIST_KINDS[self._list_kinds[index]]].append(items)
+            return lists
+        tables = []
+        header_offsets, row_offsets, cell_offsets = (
+            self._table_header_offsets, self._table_row_offsets, self._row_cell_offsets)
+        for t in range(start, stop):
+            tables.append({
+                'headers': strings(self._table_header_ids[header_offsets[t]:header_offsets[t + 1]]),
+                'data': [strings(self._cell_ids[cell_offsets[r]:cell_offsets[r + 1]])
+                         for r in range(row_offsets[t], row_offsets[t + 1])]
+            })
+        return tables
+
+    def __getitem__(self, key: str) -> Any:
+        if key in SECTIONS or (self._extra and key in self._extra):
+            return self._section(key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from SECTIONS
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return len(SECTIONS) + (len(self._extra) if self._extra else 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Full dict form, as returned by ``_extract_main_content``."""
+        return {key: self._section(key) for key in self}
+
+    def has_text(self) -> bool:
+        """Whether any text section (headings, paragraphs, lists, tables, main text) has items."""
+        return bool(len(self._heading_ids)) or any(
+            self.section_length(name) for name in ('paragraphs', 'main_text', 'lists', 'tables'))
+
+    @property
+    def link_count(self) -> int:
+        return len(self._link_urls)
+
+    def __repr__(self) -> str:
+        return f"<PageContent {self.title!r}: {len(self._pool)} strings, {self.link_count} links>"
@@ -0,0 +1,265 @@
+"""Per-URL version store and block-level diffs of re-scraped pages.
+
+A page's extraction is split into blocks: the title, each heading,
+paragraph, list, table and main-content block. Each block gets a stable
+fingerprint, a hash of its kind and whitespace-normalized text, and the page
+digest is a hash of the fingerprints in order. The store keeps the latest
+extraction and digest of every URL in SQLite. When a page is recorded
+again:
+  * an unchanged digest ends the work: nothing is decompressed, diffed,
+    written or re-indexed
+  * otherwise the previous extraction is diffed against the new one as
+    multisets of fingerprints, and only added and removed blocks are
+    appended to the ``changes`` table, the diff stream that ``/changes``
+    and ``python page_versions.py changes`` read from
+
+Monitoring many pages for changes then costs a hash per block for
+unchanged pages, and work in proportion to the changed blocks otherwise.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional
+
+import metrics
+from page_content import LIST_KINDS
+from web_scraping_bot import WebScrapingBot
+
+logger = logging.getLogger(__name__)
+
+
+class Block(NamedTuple):
+    kind: str
+    fingerprint: str
+    text: str
+
+
+class PageDiff(NamedTuple):
+    url: str
+    version: int
+    added: List[Block]
+    removed: List[Block]
+    # True for a new page and for added or removed blocks; blocks that only moved don't count
+    changed: bool
+
+
+def block_fingerprint(kind: str, text: str) -> str:
+    normalized = ' '.join(text.split())
+    return hashlib.blake2b(f"{kind}\x1f{normalized}".encode('utf-8'), digest_size=8).hexdigest()
+
+
+def page_blocks(content: Mapping[str, Any]) -> List[Block]:
+    """The page's blocks in document order, section by section."""
+    pieces = []
+    if content.get('title'):
+        pieces.append(('title', content['title']))
+    for level, texts in (content.get('headings') or {}).items():
+        pieces.extend((f'h{level}', text) for text in texts)
+    pieces.extend(('paragraph', text) for text in content.get('paragraphs') or [])
+    lists = content.get('lists') or {}
+    for kind in LIST_KINDS:
+        pieces.extend((f'{kind}_list', '\n'.join(items)) for items in lists.get(kind, []))
+    for table in content.get('tables') or []:
+        rows = [table.get('headers') or []] + list(table.get('data') or [])
+        pieces.append(('table', '\n'.join('\t'.join(row) for row in rows)))
+    pieces.extend(('main', text) for text in content.get('main_text') or [])
+    return [Block(kind, block_fingerprint(kind, text), text) for kind, text in pieces if text]
+
+
+def page_digest(blocks: List[Block]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for block in blocks:
+        digest.update(bytes.fromhex(block.fingerprint))
+    return digest.hexdigest()
+
+
+def diff_blocks(old: List[Block], new: List[Block]):
+    """``(added, removed)`` blocks, as multisets of fingerprints.
+
+    A block moved within the page is neither; a block repeated once more
+    than before is added once.
+    """
+    old_counts = Counter(block.fingerprint for block in old)
+    new_counts = Counter(block.fingerprint for block in new)
+    added, removed = [], []
+    for block in new:
+        if old_counts[block.fingerprint] > 0:
+            old_counts[block.fingerprint] -= 1
+        else:
+            added.append(block)
+    for block in old:
+        if new_counts[block.fingerprint] > 0:
+            new_counts[block.fingerprint] -= 1
+        else:
+            removed.append(block)
+    return added, removed
+
+
+def _pack(content: Mapping[str, Any]) -> bytes:
+    data = content.to_dict() if hasattr(content, 'to_dict') else dict(content)
+    # Fast level: written on every change, read only when the page changes again
+    return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'), 1)
+
+
+class VersionStore:
+    """Latest extraction of every recorded URL, plus the stream of block changes."""
+
+    def __init__(self, path: str = 'page_versions.db'):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS versions (
+                url TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                content BLOB NOT NULL,
+                checked_at REAL NOT NULL,
+                changed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                time REAL NOT NULL,
+                op TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS changes_url ON changes (url, seq);
+        """)
+
+    def record(self, url: str, content: Mapping[str, Any]) -> PageDiff:
+        """Store ``content`` as the latest version of ``url`` and return what changed."""
+        blocks = page_blocks(content)
+        digest = page_digest(blocks)
+        now = time.time()
+        with self._lock:
+            row = self.db.execute("SELECT version, digest, content FROM versions WHERE url = ?",
+                                  (url,)).fetchone()
+            if row is not None and row[1] == digest:
+                self.db.execute("UPDATE versions SET checked_at = ? WHERE url = ?", (now, url))
+                self.db.commit()
+                metrics.PAGE_VERSIONS.inc(outcome="unchanged")
+                return PageDiff(url, row[0], [], [], False)
+            if row is None:
+                version, added, removed = 1, blocks, []
+            else:
+                version = row[0] + 1
+                added, removed = diff_blocks(page_blocks(json.loads(zlib.decompress(row[2]))), blocks)
+            self.db.execute(
+                "INSERT OR REPLACE INTO versions (url, version, digest, content, checked_at, changed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, version, digest, _pack(content), now, now)
+            )
+            self.db.executemany(
+                "INSERT INTO changes (url, version, time, op, kind, fingerprint, text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(url, version, now, op, *block) for op, changed in (('+', added), ('-', removed))
+                 for block in changed]
+            )
+            self.db.commit()
+        metrics.PAGE_VERSIONS.inc(outcome="new" if row is None else "changed")
+        metrics.PAGE_BLOCK_CHANGES.inc(len(added), op="added")
+        metrics.PAGE_BLOCK_CHANGES.inc(len(removed), op="removed")
+        return PageDiff(url, version, added, removed, row is None or bool(added or removed))
+
+    def forget(self, url: str):
+        """Drop the stored version of ``url``, so its next recording counts as new."""
+        with self._lock:
+            self.db.execute("DELETE FROM versions WHERE url = ?", (url,))
+            self.db.commit()
+
+    def latest(self, url: str) -> Optional[Dict[str, Any]]:
+        """The latest recorded extraction of ``url``, as a dict, or None."""
+        with self._lock:
+            row = self.db.execute("SELECT content FROM versions WHERE url = ?", (url,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def changes(self, since: int = 0, url: Optional[str] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Block changes with a sequence number above ``since``, oldest first."""
+        query = "SELECT seq, url, version, time, op, kind, fingerprint, text FROM changes WHERE seq > ?"
+        params: List[Any] = [since]
+        if url is not None:
+            query += " AND url = ?"
+            params.append(url)
+        query += " ORDER BY seq LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.db.execute(query, params).fetchall()
+        keys = ('seq', 'url', 'version', 'time', 'op', 'kind', 'fingerprint', 'text')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def iter_changes(self, since: int = 0, url: Optional[str] = None, batch: int = 1000) -> Iterator[Dict[str, Any]]:
+        while True:
+            changes = self.changes(since, url, batch)
+            yield from changes
+            if len(changes) < batch:
+                return
+            since = changes[-1]['seq']
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+
+async def _watch(args):
+    store = VersionStore(args.db)
+    bot = WebScrapingBot()
+    with open(args.urls, encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip()]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def check(url):
+        async with semaphore:
+            try:
+                html = await bot.scrape_webpage(url)
+                content = bot._extract_main_content(html, base_url=url)
+                diff = await loop.run_in_executor(None, store.record, url, content)
+            except Exception as e:
+                logger.warning("Failed to check %s: %s", url, e)
+                return
+            if diff.changed:
+                print(f"{url} v{diff.version}: +{len(diff.added)} -{len(diff.removed)} blocks")
+
+    try:
+        await bot.init_session()
+        await asyncio.gather(*(check(url) for url in urls))
+    finally:
+        await bot.close_session()
+        store.close()
+
+
+def _main(args):
+    if args.command == 'watch':
+        asyncio.run(_watch(args))
+        return
+    store = VersionStore(args.db)
+    try:
+        for change in store.iter_changes(args.since, args.url):
+            print(json.dumps(change))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Track page versions and stream block-level changes.")
+    parser.add_argument("--db", default="page_versions.db", help="Version store file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    watch = commands.add_parser("watch", help="Re-scrape the URLs in a file and record what changed")
+    watch.add_argument("urls", help="File with one URL per line")
+    watch.add_argument("--concurrency", type=int, default=10, help="Concurrent fetches")
+    changes = commands.add_parser("changes", help="Print block changes as JSONL")
+    changes.add_argument("--since", type=int, default=0, help="Only changes after this sequence number")
+    changes.add_argument("--url", help="Only changes to this URL")
+    logging.basicConfig(level=logging.INFO)
+    _main(parser.parse_args())
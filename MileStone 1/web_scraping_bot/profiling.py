@@ -0,0 +1,243 @@
+"""Opt-in profiling for slow /chat requests.
+
+Two capture modes are supported for a single request:
+  * ``sample``: a sampling profiler that records collapsed stacks (the input
+    format of flamegraph.pl and speedscope) for the threads doing the work
+  * ``cprofile``: a deterministic cProfile run saved as a ``.pstats`` file
+
+Captured profiles are stored in ``PROFILE_DIR`` together with a metadata file
+holding the URL, page size and scrape stage timings. A global low-rate
+sampler (``PROFILE_SAMPLE_HZ``) can also aggregate hot stacks across all
+traffic.
+"""
+import cProfile
+import json
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('sample', 'cprofile')
+
+# Only one cProfile run can be active per process (3.12+ raises on a second one)
+_cprofile_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Periodically samples thread stacks into collapsed-stack counts."""
+
+    def __init__(self, interval: float = 0.005, thread_ids: Optional[Iterable[int]] = None,
+                 max_depth: int = 128):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(exclude=own_id)
+
+    def sample(self, exclude: Optional[int] = None):
+        """Record one stack per observed thread"""
+        frames = sys._current_frames()
+        collected = []
+        for thread_id, frame in frames.items():
+            if thread_id == exclude or (self.thread_ids and thread_id not in self.thread_ids):
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            collected.append(";".join(reversed(stack)))
+        with self._lock:
+            self.stacks.update(collected)
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format: ``root;child;leaf count`` per line"""
+        with self._lock:
+            items = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+
+
+class ProfileStore:
+    """Stores profile artifacts and their metadata on disk."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def save(self, mode: str, data: bytes, metadata: Dict[str, Any]) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        extension = 'pstats' if mode == 'cprofile' else 'collapsed'
+        (self.directory / f"{profile_id}.{extension}").write_bytes(data)
+        metadata = dict(metadata, id=profile_id, mode=mode, artifact=f"{profile_id}.{extension}")
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(metadata, indent=2))
+        logger.info("Stored %s profile %s for %s", mode, profile_id, metadata.get('url'))
+        return profile_id
+
+    def metadata(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(f"{profile_id}.json")
+        if path is None or not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def artifact_path(self, profile_id: str) -> Optional[Path]:
+        metadata = self.metadata(profile_id)
+        if metadata is None:
+            return None
+        return self._path(metadata['artifact'])
+
+    def list(self):
+        if not self.directory.exists():
+            return []
+        return sorted(
+            (json.loads(path.read_text()) for path in self.directory.glob('*.json')),
+            key=lambda meta: meta['id'],
+            reverse=True
+        )
+
+    def _path(self, name: str) -> Optional[Path]:
+        # Profile ids come from URLs; refuse anything that escapes the directory
+        path = (self.directory / name).resolve()
+        if path.parent != self.directory.resolve():
+            return None
+        return path
+
+
+class RequestProfiler:
+    """Profiles one request in the requested mode and stores the result."""
+
+    def __init__(self, mode: str, store: ProfileStore, thread_ids: Optional[Iterable[int]] = None,
+                 interval: float = 0.001):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.store = store
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self._sampler = None
+        self._profile = None
+        self._start = None
+        # Set when a cprofile request was sampled instead
+        self.fallback_reason: Optional[str] = None
+
+    def start(self):
+        """Begin sampling; cProfile runs are started by ``profile_coroutine``"""
+        self._start = time.perf_counter()
+        if self.mode == 'sample':
+            self._sampler = SamplingProfiler(self.interval, self.thread_ids).start()
+        return self
+
+    async def profile_coroutine(self, coro):
+        """Await ``coro`` under cProfile when in cprofile mode.
+
+        Must run on the thread executing the work; other tasks sharing the
+        event loop during the request are included in the profile. Requests
+        share that loop, so waiting for another cProfile run would deadlock:
+        while one is active this request is sampled instead.
+        """
+        if self.mode != 'cprofile':
+            return await coro
+        if not _cprofile_lock.acquire(blocking=False):
+            self._fall_back_to_sampling("another cProfile run is active")
+            return await coro
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler (a debugger, say) holds the profiling hook
+            _cprofile_lock.release()
+            self._fall_back_to_sampling(str(e))
+            return await coro
+        self._profile = profile
+        try:
+            return await coro
+        finally:
+            profile.disable()
+            _cprofile_lock.release()
+
+    def _fall_back_to_sampling(self, reason: str):
+        logger.info("Sampling this request instead of running cProfile: %s", reason)
+        self.mode = 'sample'
+        self.fallback_reason = reason
+        self._sampler = SamplingProfiler(self.interval, self.thread_ids).start()
+
+    def finish(self, tags: Dict[str, Any]) -> str:
+        """Stop profiling and store the artifact tagged with ``tags``"""
+        elapsed = time.perf_counter() - self._start
+        if self.mode == 'sample':
+            self._sampler.stop()
+            data = self._sampler.collapsed().encode('utf-8')
+            tags = dict(tags, samples=self._sampler.samples)
+            if self.fallback_reason:
+                tags['fallback_reason'] = self.fallback_reason
+        else:
+            # Same layout as Profile.dump_stats, so pstats/snakeviz can load it
+            data = b''
+            if self._profile is not None:
+                self._profile.create_stats()
+                data = marshal.dumps(self._profile.stats)
+        return self.store.save(self.mode, data, dict(tags, request_seconds=elapsed))
+
+
+class GlobalSampler:
+    """Low-rate sampler aggregating hot stacks across all requests."""
+
+    def __init__(self, hz: float):
+        self.profiler = SamplingProfiler(interval=1.0 / hz)
+        self.started_at = None
+
+    def start(self):
+        self.started_at = time.time()
+        self.profiler.start()
+        logger.info("Global sampling profiler started at %.1f Hz", 1.0 / self.profiler.interval)
+        return self
+
+    def snapshot(self) -> str:
+        return self.profiler.collapsed()
+
+
+def requested_mode(headers, args) -> Optional[str]:
+    """Profile mode requested via the X-Profile header or ?profile= flag, if any"""
+    value = (headers.get('X-Profile') or args.get('profile') or '').strip().lower()
+    if not value:
+        return None
+    if value in ('1', 'true', 'yes'):
+        return 'sample'
+    return value if value in PROFILE_MODES else None
@@ -0,0 +1,109 @@
+"""Fast JSON encoding, content negotiation and pagination cursors for API responses.
+
+``orjson`` is used when installed (several times faster than the stdlib
+encoder and produces bytes directly), then ``msgspec``; otherwise the
+stdlib ``json`` module is used with compact separators. Bodies over
+``MIN_COMPRESS_BYTES`` are compressed with brotli or gzip, following the
+client's ``Accept-Encoding``.
+"""
+import base64
+import gzip
+import hashlib
+import json
+from typing import Any, Optional, Tuple
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional
+    msgspec = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+# Favour speed over ratio: responses are compressed per request
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+if msgspec is not None:
+    _msgspec_encoder = msgspec.json.Encoder()
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    if msgspec is not None:
+        return _msgspec_encoder.encode(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an Accept-Encoding header, honouring q=0."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def json_response(payload: Any, status: int = 200, accept_encoding: str = '') -> Response:
+    """JSON response, compressed when the client accepts it and the body is large enough."""
+    body = dumps(payload)
+    response = Response(body, status=status, mimetype='application/json')
+    response.headers['Vary'] = 'Accept-Encoding'
+    if len(body) >= MIN_COMPRESS_BYTES:
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding:
+            response.set_data(compress(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+
+
+def encode_cursor(url: str, section: str, offset: int) -> str:
+    """Opaque cursor for the next page of ``section`` of the page scraped from ``url``."""
+    raw = json.dumps([_url_key(url), section, offset], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, url: Optional[str]) -> Tuple[str, int]:
+    """Return ``(section, offset)``; raises ValueError if invalid or for another page."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key, section, offset = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if url is None or key != _url_key(url):
+        raise ValueError("Cursor refers to a page that is no longer loaded")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor")
+    return section, offset
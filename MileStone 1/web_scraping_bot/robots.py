@@ -0,0 +1,134 @@
+"""Per-host robots.txt cache.
+
+Rules are fetched once per host and kept for ``ttl`` seconds. Following RFC
+9309, the most specific (longest) matching rule wins, a missing robots.txt
+(4xx) allows everything, and an unreachable one (5xx or network error)
+disallows everything for a short retry period. That last rule is meant for
+crawlers; with ``strict=False``, as for interactive scrapes, an unreachable
+robots.txt allows everything until the retry. The cache also exposes the
+``Sitemap:`` lines and enforces ``Crawl-delay``.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Product token matched against User-agent lines; WebScrapingBot sends it in its User-Agent header too
+ROBOTS_USER_AGENT = "WebScrapingBot"
+# Cap on robots.txt size read (RFC 9309 requires at least 500 KiB be parsed)
+MAX_ROBOTS_BYTES = 512 * 1024
+UNREACHABLE_RETRY_SECONDS = 60
+
+
+class _LongestMatchParser(RobotFileParser):
+    """``RobotFileParser`` applying the longest matching rule, Allow winning ties.
+
+    The stdlib parser applies the first rule that matches, in file order.
+    """
+
+    def parse(self, lines):
+        super().parse(lines)
+        entries = self.entries + ([self.default_entry] if self.default_entry else [])
+        for entry in entries:
+            entry.rulelines.sort(key=lambda rule: (-len(rule.path), not rule.allowance))
+
+
+class RobotsCache:
+    """Fetches, parses and caches robots.txt rules per scheme and host."""
+
+    def __init__(self, session_factory, ttl: float = 3600, user_agent: str = ROBOTS_USER_AGENT,
+                 strict: bool = True):
+        # Called to get the current aiohttp session, which may be recreated
+        self._session_factory = session_factory
+        self.ttl = ttl
+        self.user_agent = user_agent
+        # Whether an unreachable robots.txt disallows the host (RFC 9309) or allows it
+        self.strict = strict
+        self._rules: Dict[str, tuple] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._next_fetch: Dict[str, float] = {}
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def _unreachable(self, parser: RobotFileParser) -> tuple:
+        if self.strict:
+            parser.disallow_all = True
+        else:
+            parser.allow_all = True
+        return parser, time.monotonic() + UNREACHABLE_RETRY_SECONDS, True
+
+    async def _fetch(self, origin: str) -> tuple:
+        """``(parser, expires, unreachable)`` for ``origin``"""
+        parser = _LongestMatchParser(f"{origin}/robots.txt")
+        try:
+            session = self._session_factory()
+            async with session.get(f"{origin}/robots.txt", allow_redirects=True, ssl=False) as response:
+                if response.status >= 500:
+                    logger.warning("robots.txt for %s returned %d, %s for now", origin, response.status,
+                                   "disallowing" if self.strict else "allowing")
+                    return self._unreachable(parser)
+                if response.status >= 400:
+                    parser.allow_all = True
+                else:
+                    body = await response.content.read(MAX_ROBOTS_BYTES)
+                    parser.parse(body.decode('utf-8', errors='replace').splitlines())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("Could not fetch robots.txt for %s, %s for now: %s", origin,
+                           "disallowing" if self.strict else "allowing", e)
+            return self._unreachable(parser)
+        return parser, time.monotonic() + self.ttl, False
+
+    async def _entry(self, url: str) -> tuple:
+        origin = self._origin(url)
+        cached = self._rules.get(origin)
+        if cached and cached[1] > time.monotonic():
+            return cached
+        pending = self._pending.get(origin)
+        if pending is None:
+            pending = self._pending[origin] = asyncio.ensure_future(self._fetch(origin))
+            pending.add_done_callback(lambda _: self._pending.pop(origin, None))
+        entry = await asyncio.shield(pending)
+        self._rules[origin] = entry
+        return entry
+
+    async def rules(self, url: str) -> RobotFileParser:
+        """Parsed rules for the host of ``url``; concurrent callers share one fetch."""
+        return (await self._entry(url))[0]
+
+    async def allowed(self, url: str) -> bool:
+        return (await self.rules(url)).can_fetch(self.user_agent, url)
+
+    async def blocked_reason(self, url: str) -> Optional[str]:
+        """Why ``url`` may not be fetched, or None if it may."""
+        parser, _, unreachable = await self._entry(url)
+        if parser.can_fetch(self.user_agent, url):
+            return None
+        return "blocked by robots.txt (unreachable)" if unreachable else "disallowed by robots.txt"
+
+    async def sitemaps(self, url: str) -> List[str]:
+        return (await self.rules(url)).site_maps() or []
+
+    async def crawl_delay(self, url: str) -> Optional[float]:
+        delay = (await self.rules(url)).crawl_delay(self.user_agent)
+        return float(delay) if delay else None
+
+    async def throttle(self, url: str):
+        """Sleep as needed so requests to a host respect its Crawl-delay."""
+        delay = await self.crawl_delay(url)
+        if not delay:
+            return
+        origin = self._origin(url)
+        now = time.monotonic()
+        slot = max(now, self._next_fetch.get(origin, now))
+        self._next_fetch[origin] = slot + delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
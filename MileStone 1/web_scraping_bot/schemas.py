@@ -0,0 +1,170 @@
+"""Typed schemas for scraped pages and LLM chat completions.
+
+``PageRecord`` is one line of the JSONL written by ``crawler.py`` and
+``ingest.py``: a page's extracted sections plus its URL. ``ChatCompletion``
+is the part of an OpenAI-compatible completion response the chatbot reads.
+
+With ``msgspec`` installed, bytes are decoded straight into these types by
+compiled decoders that validate every field in one pass; page records come
+out as plain dicts, so the knowledge base takes them unchanged. Without it,
+the stdlib ``json`` module is used with the same checks done in Python.
+Either way a record that does not match raises ``SchemaError``, so a bad
+line can be skipped on its own.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, TypedDict, Union
+
+from page_content import CONTACT_FIELDS, LIST_KINDS, SECTIONS
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional
+    msgspec = None
+
+
+class SchemaError(ValueError):
+    """A payload that is not valid JSON or does not match its schema."""
+
+
+class Link(TypedDict):
+    url: str
+    text: str
+
+
+class Table(TypedDict):
+    headers: List[str]
+    data: List[List[str]]
+
+
+class Lists(TypedDict, total=False):
+    ordered: List[List[str]]
+    unordered: List[List[str]]
+
+
+class ContactInfo(TypedDict, total=False):
+    emails: List[str]
+    phones: List[str]
+    addresses: List[str]
+
+
+class Page(TypedDict, total=False):
+    """Extracted sections of a page, as built by ``_extract_main_content``"""
+    title: str
+    meta_description: str
+    headings: Dict[str, List[str]]
+    paragraphs: List[str]
+    links: List[Link]
+    lists: Lists
+    tables: List[Table]
+    contact_info: ContactInfo
+    social_links: List[str]
+    main_text: List[str]
+
+
+class PageRecord(Page):
+    url: str
+
+
+@dataclass
+class Message:
+    content: Optional[str] = None
+    role: str = "assistant"
+
+
+@dataclass
+class Choice:
+    message: Message
+
+
+@dataclass
+class ChatCompletion:
+    choices: List[Choice] = field(default_factory=list)
+
+    @property
+    def text(self) -> Optional[str]:
+        """Reply text of the first choice, stripped, or None"""
+        if self.choices and self.choices[0].message.content is not None:
+            return self.choices[0].message.content.strip()
+        return None
+
+
+if msgspec is not None:
+    _page_record_decoder = msgspec.json.Decoder(PageRecord)
+    _completion_decoder = msgspec.json.Decoder(ChatCompletion)
+
+
+def _loads(data: Union[str, bytes]) -> Any:
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError as e:
+        raise SchemaError(str(e)) from e
+
+
+def _is_strings(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(s, str) for s in value)
+
+
+def _is_string_lists(value: Any) -> bool:
+    return isinstance(value, list) and all(_is_strings(item) for item in value)
+
+
+def _is_groups(value: Any, keys) -> bool:
+    return isinstance(value, dict) and all(k not in keys or _is_strings(v) for k, v in value.items())
+
+
+_SECTION_CHECKS = {
+    'title': lambda v: isinstance(v, str),
+    'meta_description': lambda v: isinstance(v, str),
+    'headings': lambda v: isinstance(v, dict) and all(_is_strings(h) for h in v.values()),
+    'paragraphs': _is_strings,
+    'links': lambda v: isinstance(v, list) and all(
+        isinstance(link, dict) and isinstance(link.get('url'), str) and isinstance(link.get('text'), str)
+        for link in v),
+    'lists': lambda v: isinstance(v, dict) and all(
+        kind not in LIST_KINDS or _is_string_lists(items) for kind, items in v.items()),
+    'tables': lambda v: isinstance(v, list) and all(
+        isinstance(t, dict) and _is_strings(t.get('headers')) and _is_string_lists(t.get('data'))
+        for t in v),
+    'contact_info': lambda v: _is_groups(v, CONTACT_FIELDS),
+    'social_links': _is_strings,
+    'main_text': _is_strings,
+}
+
+
+def decode_page_record(data: Union[str, bytes]) -> PageRecord:
+    """Decode one JSONL page record; unknown top-level keys are dropped"""
+    if msgspec is not None:
+        try:
+            return _page_record_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise SchemaError(str(e)) from e
+    raw = _loads(data)
+    if not isinstance(raw, dict) or not isinstance(raw.get('url'), str):
+        raise SchemaError("Expected an object with a string `url`")
+    record = {'url': raw['url']}
+    for section in SECTIONS:
+        if section in raw:
+            if not _SECTION_CHECKS[section](raw[section]):
+                raise SchemaError(f"Invalid `{section}` section")
+            record[section] = raw[section]
+    return record
+
+
+def decode_completion(data: Union[str, bytes]) -> ChatCompletion:
+    """Decode a chat completion response body"""
+    if msgspec is not None:
+        try:
+            return _completion_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise SchemaError(str(e)) from e
+    raw = _loads(data)
+    if not isinstance(raw, dict) or not isinstance(raw.get('choices', []), list):
+        raise SchemaError("Expected an object with a `choices` array")
+    choices = []
+    for choice in raw.get('choices', []):
+        message = choice.get('message') if isinstance(choice, dict) else None
+        if not isinstance(message, dict) or not isinstance(message.get('content'), (str, type(None))):
+            raise SchemaError("Expected each choice to have a `message` with string `content`")
+        choices.append(Choice(Message(message.get('content'), message.get('role', 'assistant'))))
+    return ChatCompletion(choices)
@@ -3,12 +3,25 @@ import csv
 import json
 import logging
 import os
+import threading
+import time
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from rich.console import Console
 from rich.table import Table
 from rich import print as rprint
-from web_scraping_bot import WebScrapingBot
+from web_scraping_bot import MIN_STATIC_TEXT_CHARS, WebScrapingBot
+from content_scorer import chat_context
+from page_content import PageContent
+from conversation_memory import SessionStore, extractive_summary
+from knowledge_base import KnowledgeBase, chunk_page, format_sources, fuse_hits
+from embeddings import DEFAULT_MODEL, Embedder, EmbeddingService, SemanticIndex, available as embeddings_available
+from crawler import normalize_url
+from single_flight import SingleFlight, fingerprint
+from schemas import decode_completion
+from page_versions import VersionStore
+import dedup
+import metrics
 import pandas as pd
 import requests
 
@@ -18,75 +31,298 @@ class ScrapingChatbot:
     def __init__(self):
         """Initialize the scraping chatbot."""
         self.console = Console()
-        self.bot = WebScrapingBot()
+        # A user asked for this page, so an unreachable robots.txt does not block it
+        self.bot = WebScrapingBot(strict_robots=False)
         self.current_content = None
+        self.current_url = None
         self.groq_api_key = os.getenv("GROQ_API_KEY")
+        # Point at benchmarks/llm_stub.py (or another OpenAI-compatible server) for offline load tests
+        self.groq_base_url = os.getenv("GROQ_BASE_URL", "https://api.groq.com").rstrip("/")
+        self.sessions = SessionStore(
+            os.getenv("CHAT_SESSION_DIR", "chat_sessions"),
+            max_sessions=int(os.getenv("CHAT_SESSION_CACHE", "1000")),
+            budget_tokens=int(os.getenv("CHAT_HISTORY_TOKENS", "2000")),
+            summary_tokens=int(os.getenv("CHAT_SUMMARY_TOKENS", "400")),
+            summarizer=self._summarize_turns
+        )
+        self.context_region = os.getenv("CHAT_CONTEXT_REGION", "main")
+        # Identical concurrent scrapes and LLM prompts share one in-flight call
+        self.scrape_flight = SingleFlight("scrape")
+        self.llm_flight = SingleFlight("llm")
+        # Every scraped page is kept for questions across pages; CHAT_KB=0 disables it
+        self.knowledge_base = None
+        if os.getenv("CHAT_KB", "1").lower() not in ("0", "false", "no"):
+            self.knowledge_base = KnowledgeBase(os.getenv("CHAT_KB_DIR", "knowledge_base"))
+        # Near-copies of a page already indexed (print views, tracking variants) are not indexed
+        # again; CHAT_DEDUP=0 disables this. Not persisted: only pages scraped since startup count
+        self.duplicates = None
+        if os.getenv("CHAT_DEDUP", "1").lower() not in ("0", "false", "no"):
+            self.duplicates = dedup.NearDuplicateIndex()
+        self._duplicates_lock = threading.Lock()
+        self.kb_results = int(os.getenv("CHAT_KB_RESULTS", "8"))
+        # Questions are answered from the current page; CHAT_SCOPE=all searches every scraped page
+        self.chat_scope = os.getenv("CHAT_SCOPE", "page")
+        # Previous extraction of every scraped URL, so a re-scrape only re-indexes what changed
+        self.page_versions = None
+        if os.getenv("CHAT_VERSIONS", "1").lower() not in ("0", "false", "no"):
+            versions_path = os.getenv("CHAT_VERSIONS_DB") or os.path.join(
+                os.getenv("CHAT_KB_DIR", "knowledge_base"), "page_versions.db")
+            os.makedirs(os.path.dirname(versions_path) or ".", exist_ok=True)
+            self.page_versions = VersionStore(versions_path)
+        # Local embeddings for semantic retrieval, on by default when torch and transformers are installed
+        self.semantic_index = None
+        semantic_mode = os.getenv("CHAT_SEMANTIC", "auto").lower()
+        if (self.knowledge_base is not None and semantic_mode not in ("0", "false", "no")
+                and (semantic_mode != "auto" or embeddings_available())):
+            embedder = Embedder(
+                os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL),
+                quantize=os.getenv("EMBEDDING_QUANTIZE", "1").lower() not in ("0", "false", "no")
+            )
+            self.semantic_index = SemanticIndex(
+                os.path.join(self.knowledge_base.directory, "vectors"), EmbeddingService(embedder))
         
     async def init_bot(self):
         """Initialize the WebScrapingBot asynchronously."""
         await self.bot.init_session()
         
-    async def scrape_url(self, url: str) -> Dict[str, Any]:
-        """Scrape a URL and return the content."""
+    async def scrape_url(self, url: str, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Scrape a URL and return the content.
+
+        Concurrent requests for the same normalized URL share one scrape.
+        If ``stats`` is given it is filled with the page size and per-stage
+        timings, or just ``coalesced`` when another request did the scrape.
+        """
+        leader_stats = {}
+        content = await self.scrape_flight.do_async(
+            normalize_url(url) or url, lambda: self._scrape_url(url, leader_stats))
+        if stats is not None:
+            stats.update(leader_stats or {'url': url, 'coalesced': True})
+        return content
+
+    async def _scrape_url(self, url: str, stats: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            logger.info(f"Initializing scraping for URL: {url}")
+            logger.info("Initializing scraping for URL: %s", url)
             await self.init_bot()
             
             if not url.startswith(('http://', 'https://')):
                 raise ValueError("URL must start with http:// or https://")
             
-            logger.info("Fetching webpage content...")
-            page_source = await self.bot.scrape_webpage(url)
-            if not page_source:
-                raise Exception("Failed to get page content")
+            with metrics.timer(metrics.SCRAPE_SECONDS):
+                logger.debug("Fetching webpage content...")
+                fetch_start = time.perf_counter()
+                page_source = await self.bot.scrape_webpage(url)
+                if not page_source:
+                    raise Exception("Failed to get page content")
+                
+                logger.debug("Extracting content from webpage...")
+                extract_start = time.perf_counter()
+                content = self.bot._extract_main_content(page_source, base_url=url)
+                extract_end = time.perf_counter()
+
+                render_seconds = None
+                if (self.bot.render_enabled
+                        and self.bot.content_text_length(content) < MIN_STATIC_TEXT_CHARS):
+                    logger.info("Static HTML of %s has little text, rendering in browser", url)
+                    try:
+                        rendered = await self.bot.render_webpage(url)
+                        rendered_content = self.bot._extract_main_content(rendered, base_url=url)
+                        if (self.bot.content_text_length(rendered_content)
+                                > self.bot.content_text_length(content)):
+                            page_source, content = rendered, rendered_content
+                    except Exception as render_error:
+                        logger.warning("Browser render of %s failed, keeping static content: %s",
+                                       url, render_error)
+                    render_seconds = time.perf_counter() - extract_end
+                content = PageContent.from_dict(content)
+                if not content.has_text():
+                    raise Exception("Failed to extract content from page")
+                self.current_content = content
+                self.current_url = url
+
+            diff = None
+            if self.page_versions is not None:
+                try:
+                    diff = await asyncio.get_running_loop().run_in_executor(
+                        None, self.page_versions.record, url, content)
+                    stats['version'] = {'version': diff.version, 'blocks_added': len(diff.added),
+                                        'blocks_removed': len(diff.removed)}
+                except Exception as version_error:
+                    logger.warning("Could not record a version of %s: %s", url, version_error)
+
+            # An unchanged page is already indexed as it is
+            if self.knowledge_base is not None and (diff is None or diff.changed):
+                try:
+                    duplicate_of = await asyncio.get_running_loop().run_in_executor(
+                        None, self._index_page, url, content)
+                    if duplicate_of is not None:
+                        stats['duplicate_of'] = duplicate_of
+                except Exception as kb_error:
+                    logger.warning("Could not add %s to the knowledge base: %s", url, kb_error)
+                    if diff is not None:
+                        # Otherwise the next scrape would find the page unchanged and skip indexing it
+                        self.page_versions.forget(url)
             
-            logger.info("Extracting content from webpage...")
-            self.current_content = self.bot._extract_main_content(page_source)
-            if not self.current_content:
-                raise Exception("Failed to extract content from page")
+            stats.update({
+                'url': url,
+                'page_bytes': len(page_source.encode('utf-8')),
+                'stages': {
+                    'fetch': extract_start - fetch_start,
+                    'extract': extract_end - extract_start
+                }
+            })
+            if render_seconds is not None:
+                stats['stages']['render'] = render_seconds
             
-            logger.info("Content extraction successful")
-            return self.current_content
+            logger.debug("Content extraction successful")
+            return content
             
         except ValueError as e:
-            logger.error(f"Invalid URL format: {str(e)}")
+            logger.error("Invalid URL format: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Error during scraping: {str(e)}")
+            logger.error("Error during scraping: %s", e)
             if self.bot:
                 try:
                     await self.bot.close_session()
                 except Exception as close_error:
-                    logger.error(f"Error closing session: {str(close_error)}")
+                    logger.error("Error closing session: %s", close_error)
             raise Exception(f"Failed to scrape URL: {str(e)}")
         
-    def chat_with_groq(self, question: str) -> str:
-        """Chat with Groq about the scraped content."""
-        if not self.current_content:
+    def _index_page(self, url: str, content: Dict[str, Any]) -> Optional[str]:
+        """Add a scraped page to the knowledge base, and embed its chunks.
+
+        A near-duplicate of another indexed page is skipped, and any chunks
+        indexed for ``url`` before are deleted; returns the URL it duplicates
+        in that case, otherwise None.
+        """
+        if self.duplicates is not None:
+            with self._duplicates_lock:
+                duplicate_of = self.duplicates.check_and_add(url, dedup.page_fingerprint(content['paragraphs']))
+            # A re-scraped page matching its own earlier version is indexed as usual
+            if duplicate_of is not None and duplicate_of != url:
+                metrics.DUPLICATE_PAGES.inc()
+                logger.info("Not indexing %s, a near-duplicate of %s", url, duplicate_of)
+                # A changed re-scrape would otherwise leave its previous version searchable
+                self.knowledge_base.delete_url(url)
+                if self.semantic_index is not None:
+                    self.semantic_index.delete_url(url)
+                return duplicate_of
+        self.knowledge_base.add_page(url, content)
+        if self.semantic_index is not None:
+            try:
+                self.semantic_index.add_page(url, content.get('title') or '',
+                                             chunk_page(content, self.knowledge_base.chunk_chars))
+            except Exception as e:
+                logger.warning("Could not embed %s, keyword search only: %s", url, e)
+        return None
+
+    def _groq_completion(self, messages: List[Dict[str, str]], max_tokens: int = 1000,
+                         temperature: float = 0.3) -> Optional[str]:
+        """Send a chat completion request to Groq and return the reply text."""
+        headers = {
+            "Authorization": f"Bearer {self.groq_api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": "mixtral-8x7b-32768",
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "top_p": 0.9
+        }
+
+        def post():
+            with metrics.timer(metrics.LLM_SECONDS):
+                response = requests.post(
+                    f"{self.groq_base_url}/openai/v1/chat/completions",
+                    headers=headers,
+                    json=payload
+                )
+            response.raise_for_status()
+            return decode_completion(response.content)
+
+        # Users asking the same question about the same page at once pay for one completion
+        return self.llm_flight.do(fingerprint(payload), post).text
+
+    def _summarize_turns(self, previous: str, turns: List[Dict[str, str]], max_tokens: int) -> str:
+        """Compact older conversation turns into a short summary using Groq."""
+        if not self.groq_api_key:
+            return extractive_summary(previous, turns, max_tokens)
+        transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+        prompt = f"""Update the summary of a conversation about a scraped webpage with the new turns below.
+Keep facts, names and numbers the user may refer back to. Reply with the summary only.
+
+Current summary: {previous or '(none)'}
+
+New turns:
+{transcript}"""
+        summary = self._groq_completion(
+            [{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=0.1
+        )
+        return summary or extractive_summary(previous, turns, max_tokens)
+
+    def chat_with_groq(self, question: str, session_id: Optional[str] = None,
+                       scope: Optional[str] = None) -> str:
+        """Chat with Groq about the scraped content.
+
+        The question is answered from the knowledge base chunks that best match
+        it, cited as sources. With ``scope`` "page" (the default, unless
+        CHAT_SCOPE says otherwise) only the current page's chunks are searched;
+        with "all", every page scraped so far. Keyword (BM25) and, when enabled,
+        embedding matches are fused by rank. Without a knowledge base, or when
+        nothing matches, the current page is used. When ``session_id`` is given,
+        earlier turns of that session are sent as token-budgeted history and the
+        new turn is added to it.
+        """
+        scope = scope or self.chat_scope
+        if scope not in ("page", "all"):
+            raise ValueError(f"Unknown chat scope {scope!r}, expected 'page' or 'all'")
+        url = self.current_url if scope == "page" else None
+        # Before the first scrape there is no current page to search
+        searchable = scope == "all" or url is not None
+        hits = []
+        if searchable and self.knowledge_base is not None:
+            try:
+                hits = self.knowledge_base.search(question, k=self.kb_results, url=url)
+            except Exception as e:
+                logger.warning("Knowledge base search failed, using the current page: %s", e)
+        if searchable and self.semantic_index is not None:
+            try:
+                semantic_hits = self.semantic_index.search(question, k=self.kb_results, url=url)
+                hits = fuse_hits([hits, semantic_hits], self.kb_results)
+            except Exception as e:
+                logger.warning("Semantic search failed, using keyword matches only: %s", e)
+
+        if not self.current_content and not hits:
             return "Please scrape a webpage first before asking questions."
             
         if not self.groq_api_key:
             return "Please set the GROQ_API_KEY environment variable."
-            
-        # Combine relevant content for context
-        context = ""
-        if self.current_content.get('paragraphs'):
-            context += " ".join(self.current_content['paragraphs'])
-        if self.current_content.get('lists'):
-            for list_type in ['ordered', 'unordered']:
-                for lst in self.current_content['lists'][list_type]:
-                    context += " " + " ".join(lst)
+
+        sources = []
+        if hits:
+            context, sources = format_sources(hits, 15000)
+        else:
+            # Main-content blocks only, unless CHAT_CONTEXT_REGION=all
+            context = chat_context(self.current_content, self.context_region)
                     
         if not context:
             return "No content available to answer questions."
             
         try:
-            headers = {
-                "Authorization": f"Bearer {self.groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            prompt = f"""Based on the following content, please answer the question. If the answer cannot be found in the content, say so.
+            if sources:
+                prompt = f"""Based on the following numbered excerpts from scraped webpages, please answer the question. Cite the excerpts you use by number, like [1]. If the answer cannot be found in the excerpts, say so.
+
+Excerpts:
+{context}
+
+Question: {question}
+
+Please provide a detailed, accurate answer based only on the excerpts provided."""
+            else:
+                prompt = f"""Based on the following content, please answer the question. If the answer cannot be found in the content, say so.
 
 Content: {context[:15000]}  # Limit context to 15k chars to avoid token limits
 
@@ -94,34 +330,52 @@ Question: {question}
 
 Please provide a detailed, accurate answer based only on the content provided."""
 
-            payload = {
-                "model": "mixtral-8x7b-32768",
-                "messages": [
-                    {"role": "system", "content": "You are a helpful assistant that provides accurate, detailed answers based on the given content."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.3,
-                "max_tokens": 1000,
-                "top_p": 0.9
-            }
-
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            if 'choices' in result and len(result['choices']) > 0:
-                return result['choices'][0]['message']['content'].strip()
-            return "Failed to get a response from Groq."
+            memory = self.sessions.get(session_id) if session_id else None
+            messages = [
+                {"role": "system", "content": "You are a helpful assistant that provides accurate, detailed answers based on the given content."}
+            ]
+            if memory:
+                with memory.lock:
+                    messages.extend(memory.prompt_messages())
+            messages.append({"role": "user", "content": prompt})
+
+            answer = self._groq_completion(messages)
+            if answer is None:
+                return "Failed to get a response from Groq."
+
+            if memory:
+                # Only the question is remembered; the page context is resent each turn
+                with memory.lock:
+                    memory.add("user", question)
+                    memory.add("assistant", answer)
+                    self.sessions.save(memory)
+            if sources:
+                answer += "\n\nSources:\n" + "\n".join(
+                    f"[{source['number']}] {source['title'] or source['url']} - {source['url']}" for source in sources)
+            return answer
 
         except Exception as e:
             return f"Error getting answer: {str(e)}"
         
-    def export_data(self, data: List[Dict[str, Any]], format: str = 'csv') -> str:
-        """Export scraped data to a file."""
+    def export_data(self, data: List[Dict[str, Any]], format: str = 'csv',
+                    collapse_duplicates: bool = True, main_only: bool = True) -> str:
+        """Export scraped data to a file.
+
+        By default near-duplicate pages are dropped, and pages with main-content
+        blocks export those in place of every paragraph and list.
+        """
+        with metrics.timer(metrics.EXPORT_SECONDS, format=format):
+            if collapse_duplicates and len(data) > 1:
+                data = dedup.collapse_duplicates(data)
+            if main_only:
+                data = [
+                    {k: v for k, v in item.items() if k not in ('paragraphs', 'lists')}
+                    if item.get('main_text') else item
+                    for item in data
+                ]
+            return self._write_export(data, format)
+
+    def _write_export(self, data: List[Dict[str, Any]], format: str) -> str:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         if format == 'csv':
@@ -218,6 +472,11 @@ Please provide a detailed, accurate answer based only on the content provided.""
         finally:
             if self.bot:
                 await self.bot.close_session()
+                await self.bot.close_browser_pool()
+            if self.knowledge_base is not None:
+                self.knowledge_base.close()
+            if self.page_versions is not None:
+                self.page_versions.close()
             
     def _display_content(self, content: Dict[str, Any]):
         """Display scraped content in a formatted way."""
@@ -245,7 +504,6 @@ Please provide a detailed, accurate answer based only on the content provided.""
         # Display other content based on user request
         rprint("\n[yellow]Available content sections:[/yellow]")
         sections = []
-        if content['images']: sections.append("images")
         if content['links']: sections.append("links")
         if content['lists']['ordered'] or content['lists']['unordered']: sections.append("lists")
         if content['tables']: sections.append("tables")
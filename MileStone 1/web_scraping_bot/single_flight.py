@@ -0,0 +1,99 @@
+"""Single-flight coalescing of identical concurrent calls.
+
+When many requests for the same key arrive while one is already running (a
+shared link pasted into ``/chat`` by dozens of users, or the same LLM
+prompt), only the first caller, the leader, does the work; the rest wait on
+its shared future and get the same result or exception. The key is released
+when the call finishes, so later requests start fresh work.
+
+The shared future is a ``concurrent.futures.Future``, so callers may be
+threads (``do``) or coroutines on any event loop (``do_async``). In
+``do_async`` the work runs as its own task and every caller awaits it
+through ``asyncio.shield``: cancelling one waiter, the leader included,
+never cancels the work the others are waiting for.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+import metrics
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable key for a request made of JSON-serializable parts."""
+    data = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its outcome."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _join(self, key: Hashable):
+        """(future, is_leader) for ``key``, registering a new call if none is in flight."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                metrics.SINGLE_FLIGHT.inc(name=self.name, outcome="coalesced")
+                return future, False
+            future = self._calls[key] = Future()
+        metrics.SINGLE_FLIGHT.inc(name=self.name, outcome="leader")
+        return future, True
+
+    def _settle(self, key: Hashable, future: Future, result: Any = None, error: BaseException = None):
+        # Release the key before waking waiters, so a caller arriving after
+        # completion starts fresh work instead of joining a finished call
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call ``func`` in this thread, or wait for the identical call in flight."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result)
+        return result
+
+    async def do_async(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``factory()`` as a shared task, or the identical one in flight.
+
+        ``factory`` is only called by the leader, so followers create no
+        coroutine that would go un-awaited.
+        """
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda done: self._finish_task(key, future, done))
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _finish_task(self, key: Hashable, future: Future, task: asyncio.Future):
+        if task.cancelled():
+            # Only loop shutdown cancels the shared task; waiters see it as cancelled
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+            future.cancel()
+        elif task.exception() is not None:
+            self._settle(key, future, error=task.exception())
+        else:
+            self._settle(key, future, task.result())
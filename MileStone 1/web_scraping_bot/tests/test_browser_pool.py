@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from browser_pool import BrowserPool
+
+
+class FakePage:
+    def __init__(self, url_log):
+        self.url_log = url_log
+
+    async def goto(self, url, wait_until):
+        self.url_log.append(url)
+
+    async def content(self):
+        return f"<html>{self.url_log[-1]}</html>"
+
+    async def close(self):
+        pass
+
+
+class FakeContext:
+    def __init__(self):
+        self.urls = []
+        self.closed = False
+
+    def set_default_timeout(self, timeout_ms):
+        pass
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def new_page(self):
+        return FakePage(self.urls)
+
+    async def close(self):
+        self.closed = True
+
+
+class FlakyBrowser:
+    """Creates contexts, except for the calls listed in ``failures``"""
+
+    def __init__(self, failures):
+        self.failures = set(failures)
+        self.calls = 0
+
+    async def new_context(self, **kwargs):
+        self.calls += 1
+        if self.calls in self.failures:
+            raise RuntimeError("browser crashed")
+        return FakeContext()
+
+
+def started_pool(browser, size=1, max_uses=1):
+    pool = BrowserPool(size=size, max_uses=max_uses)
+    pool._browser = browser  # start() then leaves the pool as it is
+    return pool
+
+
+def test_failed_replacement_keeps_the_slot():
+    async def run():
+        browser = FlakyBrowser(failures={2, 3})
+        pool = started_pool(browser)
+        pool._contexts = asyncio.Queue()
+        pool._contexts.put_nowait(await pool._new_context())
+
+        # The context is recycled after one use, and its replacement (call 2) fails
+        assert await pool.render('https://example.com/1') == '<html>https://example.com/1</html>'
+        assert pool._contexts.qsize() == 1
+        # The next render retries the slot (call 3), fails, and the slot survives again
+        with pytest.raises(RuntimeError, match="browser crashed"):
+            await asyncio.wait_for(pool.render('https://example.com/2'), 1)
+        assert pool._contexts.qsize() == 1
+        # Call 4 succeeds
+        assert await asyncio.wait_for(pool.render('https://example.com/3'), 1) == '<html>https://example.com/3</html>'
+        assert pool._contexts.qsize() == 1
+
+    asyncio.run(run())
+
+
+def test_contexts_are_recycled_after_max_uses():
+    async def run():
+        pool = started_pool(FlakyBrowser(failures=()), max_uses=2)
+        pool._contexts = asyncio.Queue()
+        first = await pool._new_context()
+        pool._contexts.put_nowait(first)
+        await pool.render('https://example.com/1')
+        await pool.render('https://example.com/2')
+        assert first.closed and first.urls == ['https://example.com/1', 'https://example.com/2']
+        assert pool._contexts.get_nowait() is not first
+
+    asyncio.run(run())
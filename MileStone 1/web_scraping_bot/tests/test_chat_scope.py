@@ -0,0 +1,54 @@
+import pytest
+
+from knowledge_base import KnowledgeBase
+from page_content import PageContent
+from scraper import ScrapingChatbot
+
+PAGES = {
+    'https://example.com/refunds': "Refunds are issued within five days to the original payment method.",
+    'https://example.com/shipping': "Shipping is free on orders over fifty dollars, and refunds cover postage.",
+}
+
+
+@pytest.fixture
+def bot(tmp_path):
+    # Only what chat_with_groq uses, with the LLM call recorded instead of sent
+    bot = ScrapingChatbot.__new__(ScrapingChatbot)
+    bot.knowledge_base = KnowledgeBase(str(tmp_path), background_merge=False)
+    for url, text in PAGES.items():
+        bot.knowledge_base.add_page(url, {'title': url.rsplit('/', 1)[1], 'main_text': [text]})
+    bot.semantic_index = None
+    bot.kb_results = 8
+    bot.chat_scope = 'page'
+    bot.context_region = 'main'
+    bot.groq_api_key = 'test'
+    bot.current_url = 'https://example.com/shipping'
+    bot.current_content = PageContent.from_dict({'title': 'shipping', 'main_text': [PAGES[bot.current_url]]})
+    bot.prompts = []
+    bot._groq_completion = lambda messages: bot.prompts.append(messages[-1]['content']) or 'Answer'
+    yield bot
+    bot.knowledge_base.close()
+
+
+def test_questions_are_answered_from_the_current_page(bot):
+    answer = bot.chat_with_groq("How are refunds issued?")
+    assert 'https://example.com/shipping' in answer
+    assert 'https://example.com/refunds' not in answer
+    assert 'original payment method' not in bot.prompts[0]
+
+
+def test_scope_all_searches_every_page(bot):
+    answer = bot.chat_with_groq("How are refunds issued?", scope='all')
+    assert 'https://example.com/refunds' in answer
+    assert 'original payment method' in bot.prompts[0]
+
+
+def test_current_page_without_matches_is_sent_whole(bot):
+    bot.current_url = 'https://example.com/not-indexed'
+    assert bot.chat_with_groq("How are refunds issued?") == 'Answer'
+    assert PAGES['https://example.com/shipping'] in bot.prompts[0]
+
+
+def test_unknown_scope_is_rejected(bot):
+    with pytest.raises(ValueError):
+        bot.chat_with_groq("Anything?", scope='site')
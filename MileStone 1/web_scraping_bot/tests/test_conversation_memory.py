@@ -0,0 +1,76 @@
+import json
+import threading
+
+from conversation_memory import ConversationMemory, SessionStore
+
+
+def test_sessions_with_similar_ids_do_not_share_a_file(tmp_path):
+    store = SessionStore(str(tmp_path))
+    a, b = store.get('user/1'), store.get('user?1')
+    a.add('user', 'first question')
+    store.save(a)
+    b.add('user', 'second question')
+    store.save(b)
+    long_a, long_b = 'x' * 64 + 'a', 'x' * 64 + 'b'
+    store.save(store.get(long_a))
+    store.save(store.get(long_b))
+    assert len(list(tmp_path.glob('*.json'))) == 4
+
+    reloaded = SessionStore(str(tmp_path))
+    assert [m['content'] for m in reloaded.get('user/1').messages] == ['first question']
+    assert [m['content'] for m in reloaded.get('user?1').messages] == ['second question']
+
+
+def test_legacy_file_is_read_only_by_its_own_session(tmp_path):
+    (tmp_path / 'user_1.json').write_text(json.dumps(
+        {'session_id': 'user/1', 'summary': '', 'messages': [{'role': 'user', 'content': 'old', 'tokens': 5}]}))
+    store = SessionStore(str(tmp_path))
+    assert [m['content'] for m in store.get('user/1').messages] == ['old']
+    assert store.get('user?1').messages == []
+
+
+def test_least_recently_used_sessions_are_evicted(tmp_path):
+    store = SessionStore(str(tmp_path), max_sessions=2)
+    first = store.get('a')
+    first.add('user', 'kept on disk')
+    store.save(first)
+    store.get('b')
+    store.get('a')
+    store.get('c')  # evicts b, the least recently used
+    assert len(store) == 2 and store.get('a') is first
+    store.get('d')
+    store.get('e')
+    reloaded = store.get('a')
+    assert reloaded is not first
+    assert [m['content'] for m in reloaded.messages] == ['kept on disk']
+
+
+def test_concurrent_turns_in_one_session(tmp_path):
+    store = SessionStore(str(tmp_path), budget_tokens=200, summary_tokens=50)
+    memory = store.get('shared')
+
+    def turns(n):
+        for i in range(50):
+            with memory.lock:
+                memory.add('user', f'question {n}-{i}')
+                memory.add('assistant', f'answer {n}-{i}')
+                store.save(memory)
+
+    threads = [threading.Thread(target=turns, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    saved = json.loads(store._path('shared').read_text())
+    assert saved == memory.to_dict()
+    assert memory.history_tokens <= 200
+
+
+def test_compaction_keeps_history_within_budget():
+    memory = ConversationMemory('s', budget_tokens=60, summary_tokens=20)
+    for i in range(20):
+        memory.add('user', f'Question number {i} about the refund policy? More words here.')
+        memory.add('assistant', f'Answer number {i}. It has details.')
+    assert memory.history_tokens <= 60
+    assert memory.summary
+    assert memory.prompt_messages()[0]['role'] == 'system'
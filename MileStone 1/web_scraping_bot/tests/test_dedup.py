@@ -0,0 +1,60 @@
+import random
+
+from dedup import (FINGERPRINT_BITS, NearDuplicateIndex, collapse_duplicates, hamming_distance,
+                   page_fingerprint, simhash)
+
+TEXT = ("Our support team answers billing questions within one business day. Refunds are issued to the "
+        "original payment method and usually arrive within five to seven days after approval.")
+
+
+def flip(fingerprint, positions):
+    for bit in positions:
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def test_bands_cover_every_bit():
+    for max_distance in range(0, 8):
+        index = NearDuplicateIndex(max_distance)
+        covered = 0
+        for band, value in index._bands((1 << FINGERPRINT_BITS) - 1):
+            covered |= value << (band * index.band_bits)
+        assert covered == (1 << FINGERPRINT_BITS) - 1
+        assert index.num_bands == max_distance + 1
+
+
+def test_finds_every_fingerprint_within_distance():
+    rng = random.Random(0)
+    index = NearDuplicateIndex(max_distance=3)
+    base = rng.getrandbits(FINGERPRINT_BITS)
+    index.add('page', base)
+    for _ in range(500):
+        near = flip(base, rng.sample(range(FINGERPRINT_BITS), rng.randint(0, 3)))
+        assert index.find(near) == 'page'
+
+
+def test_ignores_fingerprints_past_distance():
+    index = NearDuplicateIndex(max_distance=3)
+    index.add('page', 0)
+    # One flipped bit in each band: every band differs and the distance is 4
+    far = flip(0, [band * index.band_bits for band in range(index.num_bands)])
+    assert hamming_distance(0, far) == 4
+    assert index.find(far) is None
+    assert index.check_and_add('other', far) is None
+    assert index.size == 2
+
+
+def test_simhash_of_near_copies():
+    original = simhash(TEXT)
+    tracked = simhash(TEXT + " Page 2 of 2.")
+    unrelated = simhash("The quarterly report covers revenue growth across every region, new hires in "
+                        "engineering, and the roadmap for the mobile app launch planned next spring.")
+    assert hamming_distance(original, tracked) < hamming_distance(original, unrelated)
+    assert simhash("too short to fingerprint") is None
+
+
+def test_collapse_duplicates_keeps_first_copy():
+    pages = [{'url': 'a', 'paragraphs': [TEXT]}, {'url': 'b', 'paragraphs': [TEXT]},
+             {'url': 'c', 'paragraphs': ['short']}, {'url': 'd', 'paragraphs': ['short']}]
+    assert [page['url'] for page in collapse_duplicates(pages)] == ['a', 'c', 'd']
+    assert page_fingerprint([]) is None
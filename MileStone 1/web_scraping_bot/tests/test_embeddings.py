@@ -0,0 +1,50 @@
+import hashlib
+
+import numpy as np
+
+import embeddings
+from embeddings import SemanticIndex
+
+
+class HashService:
+    """Deterministic unit vectors per text, in place of a model"""
+
+    dimension = 16
+
+    def embed(self, texts):
+        vectors = np.array([np.frombuffer(hashlib.blake2b(t.encode('utf-8'), digest_size=64).digest(),
+                                          dtype=np.int8).astype(np.float32)[:self.dimension] for t in texts])
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_search_skips_vectors_without_rows(tmp_path):
+    index = SemanticIndex(str(tmp_path), HashService(), background_training=False)
+    index.add_page('https://example.com/a', 'A', ['first chunk', 'second chunk'])
+    # What a lock-free search sees between add_page storing vectors and appending their rows
+    index.store.add(HashService().embed(['pending chunk']))
+    hits = index.search('pending chunk', k=3)
+    assert sorted(hit.text for hit in hits) == ['first chunk', 'second chunk']
+
+
+def test_ivf_trains_in_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(embeddings, 'IVF_MIN_VECTORS', 64)
+    index = SemanticIndex(str(tmp_path), HashService())
+    for page in range(10):
+        index.add_page(f'https://example.com/{page}', f'Page {page}', [f'chunk {page}-{i}' for i in range(10)])
+    index.close()
+    assert index.store.centroids is not None
+    assert not index.store.needs_training()
+    # Every row is in a list, including rows added while training ran
+    assert (index.store._lists[:index.store.count] >= 0).all()
+    hits = index.search('chunk 7-3', k=1, nprobe=len(index.store.centroids))
+    assert hits[0].text == 'chunk 7-3'
+
+
+def test_search_scoped_to_one_url(tmp_path):
+    index = SemanticIndex(str(tmp_path), HashService(), background_training=False)
+    for page in range(3):
+        index.add_page(f'https://example.com/{page}', f'Page {page}', [f'chunk {page}-{i}' for i in range(4)])
+    hits = index.search('chunk 0-1', k=3, url='https://example.com/2')
+    assert len(hits) == 3
+    assert {hit.url for hit in hits} == {'https://example.com/2'}
+    assert index.search('chunk 0-1', url='https://example.com/missing') == []
@@ -0,0 +1,135 @@
+import asyncio
+import gzip
+
+import pytest
+
+import ingest
+from ingest import SiteIngestor, SitemapEntry, SitemapStreamParser, parse_lastmod
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(urls):
+    entries = ''.join(f'<url><loc>{url}</loc><lastmod>{lastmod}</lastmod></url>' for url, lastmod in urls)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{entries}</urlset>'.encode()
+
+
+def sitemap_index(urls):
+    entries = ''.join(f'<sitemap><loc>{url}</loc></sitemap>' for url in urls)
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {NS}>{entries}</sitemapindex>'.encode()
+
+
+def parse(data, chunk_size):
+    parser = SitemapStreamParser()
+    entries = []
+    for start in range(0, len(data), chunk_size):
+        entries.extend(parser.feed(data[start:start + chunk_size]))
+    return parser, entries + parser.close()
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_entries_survive_any_chunk_boundary(compress):
+    pages = [(f'https://example.com/page/{i}', '2024-05-01T10:00:00Z') for i in range(2000)]
+    data = urlset(pages)
+    if compress:
+        data = gzip.compress(data)
+    parser, entries = parse(data, 7)
+    assert not parser.is_index
+    assert [entry.url for _, entry in entries] == [url for url, _ in pages]
+    assert {kind for kind, _ in entries} == {'url'}
+    assert entries[0][1].lastmod == parse_lastmod('2024-05-01T10:00:00+00:00')
+
+
+def test_sitemap_index_lists_nested_sitemaps():
+    parser, entries = parse(sitemap_index(['https://example.com/a.xml', 'https://example.com/b.xml.gz']), 5)
+    assert parser.is_index
+    assert entries == [('sitemap', SitemapEntry('https://example.com/a.xml', None)),
+                       ('sitemap', SitemapEntry('https://example.com/b.xml.gz', None))]
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_size_cap(monkeypatch, compress):
+    monkeypatch.setattr(ingest, 'MAX_SITEMAP_BYTES', 10_000)
+    data = urlset([(f'https://example.com/{i}', '2024-05-01') for i in range(500)])
+    if compress:
+        # Compresses far below the cap, so only the inflated size can trip it
+        data = gzip.compress(data)
+        assert len(data) < 10_000
+    with pytest.raises(ValueError):
+        parse(data, 4096)
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.status = 200 if body is not None else 404
+        self.content = self
+        self._body = body or b''
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self._body), size):
+            yield self._body[start:start + size]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeBot:
+    """Serves sitemaps from a dict, with robots.txt checks off"""
+
+    max_connections = 10
+    robots = None
+
+    def __init__(self, sitemaps):
+        self.session = self
+        self.sitemaps = sitemaps
+
+    def get(self, url, **kwargs):
+        return FakeResponse(self.sitemaps.get(url))
+
+    async def init_session(self):
+        pass
+
+
+def discover(state_path, sitemaps):
+    async def run():
+        ingestor = SiteIngestor('https://example.com/', bot=FakeBot(sitemaps), state_path=state_path)
+        queued = await ingestor.discover()
+        return ingestor, queued
+    return asyncio.run(run())
+
+
+def test_discovery_follows_gzipped_indexes_and_skips_unchanged_pages(tmp_path):
+    state = str(tmp_path / 'state.db')
+    sitemaps = {
+        'https://example.com/sitemap.xml': sitemap_index([
+            'https://example.com/sitemap.xml',  # A loop back to itself is not followed
+            'https://example.com/old.xml.gz', 'https://example.com/new.xml']),
+        'https://example.com/old.xml.gz': gzip.compress(urlset([('https://example.com/old', '2024-01-01')])),
+        'https://example.com/new.xml': urlset([('https://example.com/new', '2024-06-01'),
+                                               ('https://other.example.org/page', '2024-06-01')]),
+    }
+    ingestor, queued = discover(state, sitemaps)
+    assert queued == 2
+    # Newest lastmod first
+    for url, content_hash in (('https://example.com/new', 'hash-1'), ('https://example.com/old', 'hash-2')):
+        assert ingestor.frontier.pop()[0] == url
+        assert ingestor._record(url, content_hash)
+        ingestor.frontier.done(url)
+    ingestor.frontier.close()
+
+    # Next run: old is unchanged, new has a later lastmod
+    sitemaps['https://example.com/new.xml'] = urlset([('https://example.com/new', '2024-07-01')])
+    ingestor, queued = discover(state, sitemaps)
+    assert queued == 1
+    assert ingestor.stats['skipped_unchanged'] == 1
+    assert ingestor._unchanged_since_last_run(SitemapEntry('https://example.com/old', parse_lastmod('2024-01-01')))
+    assert not ingestor._unchanged_since_last_run(SitemapEntry('https://example.com/old', None))
+    assert ingestor.frontier.pop()[0] == 'https://example.com/new'
+    # Re-fetched with the same text: not passed on again, but its lastmod is recorded
+    assert not ingestor._record('https://example.com/new', 'hash-1')
+    assert ingestor._unchanged_since_last_run(SitemapEntry('https://example.com/new', parse_lastmod('2024-07-01')))
+    assert ingestor._record('https://example.com/new', 'hash-3')
+    ingestor.frontier.close()
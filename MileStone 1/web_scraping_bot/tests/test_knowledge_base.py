@@ -0,0 +1,82 @@
+import threading
+
+from knowledge_base import KnowledgeBase
+
+WORDS = "alpha beta gamma delta refund policy shipping returns warranty support".split()
+
+
+def page(i):
+    text = ' '.join(WORDS[(i + j) % len(WORDS)] for j in range(60))
+    return {'title': f'Page {i}', 'main_text': [f'{text} page{i}.']}
+
+
+def test_add_search_and_replace(tmp_path):
+    kb = KnowledgeBase(str(tmp_path), background_merge=False)
+    kb.add_pages([(f'https://example.com/{i}', page(i)) for i in range(5)])
+    hits = kb.search('page3')
+    assert [hit.url for hit in hits] == ['https://example.com/3']
+
+    kb.add_page('https://example.com/3', {'title': 'Page 3', 'main_text': ['Completely new text about invoices.']})
+    assert kb.search('page3') == []
+    assert kb.search('invoices')[0].url == 'https://example.com/3'
+    kb.close()
+
+
+def test_unchanged_page_writes_nothing(tmp_path):
+    kb = KnowledgeBase(str(tmp_path), background_merge=False)
+    assert kb.add_page('https://example.com/1', page(1)) == 1
+    assert kb.add_page('https://example.com/1', page(1)) == 0
+    assert kb.stats()['segments'] == 1
+    kb.close()
+
+
+def test_search_while_merging(tmp_path):
+    kb = KnowledgeBase(str(tmp_path), merge_factor=1000, background_merge=False)
+    errors = []
+    for round_number in range(5):
+        for i in range(20):
+            n = round_number * 20 + i
+            kb.add_page(f'https://example.com/{n}', page(n))
+        done = threading.Event()
+
+        def search_loop():
+            try:
+                while not done.is_set():
+                    kb.search('refund policy')
+                    kb.stats()
+            except Exception as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target=search_loop) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        kb.merge(force=True)
+        done.set()
+        for reader in readers:
+            reader.join()
+        assert not errors, errors
+        assert kb.stats()['segments'] == 1
+        assert len(kb.search('refund policy', k=200, max_per_page=1)) == (round_number + 1) * 20
+    kb.close()
+
+
+def test_search_scoped_to_one_url(tmp_path):
+    kb = KnowledgeBase(str(tmp_path), background_merge=False)
+    kb.add_pages([(f'https://example.com/{i}', page(i)) for i in range(5)])
+    kb.add_page('https://example.com/long', {'title': 'Long', 'main_text': [
+        f'Refund policy section {n}. ' + 'Shipping and returns are covered here in detail. ' * 30
+        for n in range(6)]})
+    hits = kb.search('refund policy', k=5, url='https://example.com/long')
+    # Every chunk of the page, not capped at max_per_page
+    assert len(hits) == 5
+    assert {hit.url for hit in hits} == {'https://example.com/long'}
+    assert [hit.url for hit in kb.search('page3', url='https://example.com/2')] == []
+    assert kb.search('refund', url='https://example.com/missing') == []
+    kb.close()
+
+
+def test_query_terms_in_no_chunk_do_not_hide_matches(tmp_path):
+    kb = KnowledgeBase(str(tmp_path), background_merge=False)
+    kb.add_page('https://example.com/1', page(1))
+    assert [hit.url for hit in kb.search('unmentioned refund policy')] == ['https://example.com/1']
+    kb.close()
@@ -0,0 +1,42 @@
+from page_content import PageContent
+
+PAGE = {
+    'title': 'Pricing',
+    'meta_description': 'Plans and prices',
+    'headings': {'1': ['Pricing'], '2': ['Team', 'Enterprise']},
+    'paragraphs': ['Pick a plan.', 'Cancel anytime.'],
+    'links': [{'url': 'https://example.com/team', 'text': 'Team'},
+              {'url': 'https://example.com/contact', 'text': 'Contact sales'}],
+    'lists': {'ordered': [['Sign up', 'Invite your team']], 'unordered': [['SSO', 'Audit log'], ['Team']]},
+    'tables': [{'headers': ['Plan', 'Price'], 'data': [['Team', '$10'], ['Enterprise', 'Contact sales']]},
+               {'headers': [], 'data': []}],
+    'contact_info': {'emails': ['sales@example.com'], 'phones': [], 'addresses': []},
+    'social_links': ['https://twitter.com/example'],
+    'main_text': ['Pick a plan.', 'Cancel anytime.'],
+}
+
+
+def test_round_trip():
+    content = PageContent.from_dict(PAGE)
+    assert content.to_dict() == PAGE
+    assert dict(content) == PAGE
+    assert PageContent.from_dict(content.to_dict()).to_dict() == PAGE
+
+
+def test_extra_keys_round_trip():
+    page = dict(PAGE, url='https://example.com/pricing', depth=2)
+    assert PageContent.from_dict(page).to_dict() == page
+
+
+def test_slices():
+    content = PageContent.from_dict(PAGE)
+    assert content.section_length('lists') == 3
+    assert content.section_slice('lists', 1) == {'ordered': [], 'unordered': [['SSO', 'Audit log'], ['Team']]}
+    assert content.section_slice('tables', 0, 1) == PAGE['tables'][:1]
+    assert content.section_slice('links', -1) == PAGE['links'][-1:]
+
+
+def test_has_text():
+    assert PageContent.from_dict(PAGE).has_text()
+    assert not PageContent.from_dict({'title': 'Empty', 'links': PAGE['links']}).has_text()
+    assert PageContent.from_dict({'headings': {'1': ['Only a heading']}}).has_text()
@@ -0,0 +1,64 @@
+from page_content import PageContent
+from page_versions import VersionStore, diff_blocks, page_blocks, page_digest
+
+PAGE = {
+    'title': 'Changelog',
+    'headings': {'1': ['Changelog'], '2': ['v2', 'v1']},
+    'paragraphs': ['Faster search.', 'Fixed   login\nbug.', 'Initial release.'],
+    'lists': {'unordered': [['Search', 'Login']]},
+    'tables': [{'headers': ['Version', 'Date'], 'data': [['2', 'May'], ['1', 'April']]}],
+}
+
+
+def test_fingerprints_ignore_whitespace():
+    reflowed = dict(PAGE, paragraphs=['Faster  search.', 'Fixed login bug.', ' Initial release.'])
+    assert page_digest(page_blocks(reflowed)) == page_digest(page_blocks(PAGE))
+
+
+def test_moved_block_is_not_a_change(tmp_path):
+    store = VersionStore(str(tmp_path / 'versions.db'))
+    first = store.record('https://example.com', PAGE)
+    assert first.changed and first.version == 1
+
+    moved = dict(PAGE, paragraphs=['Initial release.', 'Faster search.', 'Fixed login bug.'])
+    diff = store.record('https://example.com', moved)
+    assert diff.changed is False
+    assert (diff.added, diff.removed) == ([], [])
+    assert diff.version == 2
+
+    unchanged = store.record('https://example.com', moved)
+    assert unchanged.changed is False and unchanged.version == 2
+    store.close()
+
+
+def test_edit_is_recorded_as_added_and_removed(tmp_path):
+    store = VersionStore(str(tmp_path / 'versions.db'))
+    store.record('https://example.com', PageContent.from_dict(PAGE))
+    edited = dict(PAGE, paragraphs=['Faster search.', 'Fixed logout bug.', 'Initial release.'])
+    diff = store.record('https://example.com', edited)
+    assert diff.changed
+    assert [block.text for block in diff.added] == ['Fixed logout bug.']
+    assert [block.text for block in diff.removed] == ['Fixed   login\nbug.']
+    assert store.latest('https://example.com')['paragraphs'] == edited['paragraphs']
+
+    changes = store.changes(since=0, url='https://example.com')
+    edits = [(c['op'], c['text']) for c in changes if c['version'] == 2]
+    assert edits == [('+', 'Fixed logout bug.'), ('-', 'Fixed   login\nbug.')]
+    assert list(store.iter_changes(since=changes[0]['seq'], batch=2)) == changes[1:]
+    store.close()
+
+
+def test_repeated_block_counts_once_more():
+    blocks = page_blocks(PAGE)
+    added, removed = diff_blocks(blocks, blocks + blocks[-1:])
+    assert added == blocks[-1:] and removed == []
+
+
+def test_forget_makes_next_record_new(tmp_path):
+    store = VersionStore(str(tmp_path / 'versions.db'))
+    store.record('https://example.com', PAGE)
+    store.forget('https://example.com')
+    assert store.latest('https://example.com') is None
+    diff = store.record('https://example.com', PAGE)
+    assert diff.changed and diff.version == 1
+    store.close()
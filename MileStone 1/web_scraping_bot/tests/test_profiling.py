@@ -0,0 +1,46 @@
+import asyncio
+import pstats
+
+import profiling
+from profiling import ProfileStore, RequestProfiler
+
+
+async def work(seconds):
+    await asyncio.sleep(seconds)
+    return sum(range(1000))
+
+
+def test_concurrent_cprofile_requests_fall_back_to_sampling(tmp_path):
+    store = ProfileStore(str(tmp_path))
+
+    async def main():
+        first = RequestProfiler('cprofile', store).start()
+        second = RequestProfiler('cprofile', store).start()
+        results = await asyncio.gather(first.profile_coroutine(work(0.05)),
+                                       second.profile_coroutine(work(0.01)))
+        return first, second, results
+
+    first, second, results = asyncio.run(main())
+    assert results == [499500, 499500]
+    assert (first.mode, second.mode) == ('cprofile', 'sample')
+    assert not profiling._cprofile_lock.locked()
+
+    first_meta = store.metadata(first.finish({'url': 'https://example.com/a'}))
+    second_meta = store.metadata(second.finish({'url': 'https://example.com/b'}))
+    assert first_meta['mode'] == 'cprofile'
+    pstats.Stats(str(store.artifact_path(first_meta['id'])))
+    assert second_meta['mode'] == 'sample'
+    assert second_meta['fallback_reason'] == 'another cProfile run is active'
+
+
+def test_cprofile_lock_is_released_after_a_failed_request(tmp_path):
+    async def failing():
+        raise RuntimeError('scrape failed')
+
+    profiler = RequestProfiler('cprofile', ProfileStore(str(tmp_path))).start()
+    try:
+        asyncio.run(profiler.profile_coroutine(failing()))
+    except RuntimeError:
+        pass
+    assert not profiling._cprofile_lock.locked()
+    assert profiler.mode == 'cprofile'
@@ -0,0 +1,92 @@
+import asyncio
+
+import aiohttp
+
+from robots import ROBOTS_USER_AGENT, RobotsCache
+
+
+class FakeResponse:
+    def __init__(self, status, body=b''):
+        self.status = status
+        self.content = self
+        self._body = body
+
+    async def read(self, limit):
+        return self._body[:limit]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, status=200, body=b'', error=None):
+        self.status, self.body, self.error = status, body, error
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        if self.error:
+            raise self.error
+        return FakeResponse(self.status, self.body)
+
+
+ROBOTS = b"""User-agent: *
+Disallow: /docs/
+Allow: /docs/public/
+Disallow: /docs/public/drafts/
+Allow: /shop
+Disallow: /shop
+"""
+
+
+def check(cache, paths):
+    async def run():
+        return [await cache.allowed(f'https://example.com{path}') for path in paths]
+    return asyncio.run(run())
+
+
+def test_longest_match_wins():
+    cache = RobotsCache(lambda: FakeSession(body=ROBOTS))
+    assert check(cache, ['/', '/docs/a', '/docs/public/a', '/docs/public/drafts/a', '/shop/cart']) == [
+        True, False, True, False, True]
+
+
+def test_missing_robots_allows_everything():
+    cache = RobotsCache(lambda: FakeSession(status=404))
+    assert check(cache, ['/', '/private']) == [True, True]
+
+
+def test_server_error_disallows_when_strict():
+    session = FakeSession(status=503)
+    cache = RobotsCache(lambda: session)
+    assert check(cache, ['/', '/docs/']) == [False, False]
+    assert session.requests == 1
+
+    async def reason():
+        return await cache.blocked_reason('https://example.com/')
+    assert asyncio.run(reason()) == "blocked by robots.txt (unreachable)"
+
+
+def test_unreachable_allows_interactive_scrapes():
+    for session in (FakeSession(status=500), FakeSession(error=aiohttp.ClientConnectionError("refused"))):
+        cache = RobotsCache(lambda: session, strict=False)
+        assert check(cache, ['/', '/docs/']) == [True, True]
+
+
+def test_disallowed_reason():
+    cache = RobotsCache(lambda: FakeSession(body=ROBOTS))
+
+    async def reasons():
+        return [await cache.blocked_reason(f'https://example.com{path}') for path in ('/docs/a', '/docs/public/a')]
+    assert asyncio.run(reasons()) == ["disallowed by robots.txt", None]
+
+
+def test_rules_for_the_sent_user_agent_apply():
+    from web_scraping_bot import WebScrapingBot
+
+    assert WebScrapingBot().headers['User-Agent'].endswith(f' {ROBOTS_USER_AGENT}')
+    cache = RobotsCache(lambda: FakeSession(body=b"User-agent: webscrapingbot\nDisallow: /private/\n"))
+    assert check(cache, ['/private/page', '/public']) == [False, True]
@@ -0,0 +1,71 @@
+import threading
+
+import dedup
+from page_content import PageContent
+from scraper import ScrapingChatbot
+
+TEXT = ("Our support team answers billing questions within one business day. Refunds are issued to the "
+        "original payment method and usually arrive within five to seven days after approval.")
+
+
+class RecordingKB:
+    chunk_chars = 1000
+
+    def __init__(self):
+        self.urls = []
+        self.deleted = []
+
+    def add_page(self, url, content):
+        self.urls.append(url)
+
+    def delete_url(self, url):
+        self.deleted.append(url)
+        return 0
+
+
+def chatbot():
+    # Only what _index_page uses, without opening stores on disk
+    bot = ScrapingChatbot.__new__(ScrapingChatbot)
+    bot.knowledge_base = RecordingKB()
+    bot.semantic_index = None
+    bot.duplicates = dedup.NearDuplicateIndex()
+    bot._duplicates_lock = threading.Lock()
+    return bot
+
+
+def page(*paragraphs):
+    return PageContent.from_dict({'title': 'Billing', 'paragraphs': list(paragraphs), 'main_text': list(paragraphs)})
+
+
+def test_near_duplicate_page_is_not_indexed():
+    bot = chatbot()
+    assert bot._index_page('https://example.com/billing', page(TEXT)) is None
+    # The same page behind a tracking parameter
+    assert bot._index_page('https://example.com/billing?utm_source=mail', page(TEXT)) == 'https://example.com/billing'
+    assert bot.knowledge_base.urls == ['https://example.com/billing']
+    assert bot.knowledge_base.deleted == ['https://example.com/billing?utm_source=mail']
+
+
+def test_rescraped_page_and_short_pages_are_indexed():
+    bot = chatbot()
+    bot._index_page('https://example.com/billing', page(TEXT))
+    assert bot._index_page('https://example.com/billing', page(TEXT, "Updated today.")) is None
+    assert bot._index_page('https://example.com/a', page("Short.")) is None
+    assert bot._index_page('https://example.com/b', page("Short.")) is None
+    assert bot.knowledge_base.urls == ['https://example.com/billing'] * 2 + ['https://example.com/a',
+                                                                             'https://example.com/b']
+
+
+def test_changed_page_that_became_a_duplicate_is_removed(tmp_path):
+    from knowledge_base import KnowledgeBase
+
+    bot = chatbot()
+    bot.knowledge_base = KnowledgeBase(str(tmp_path), background_merge=False)
+    old_text = "Our print view lists last year's shipping rates for every region and carrier we use today."
+    bot._index_page('https://example.com/billing?print=1', page(old_text))
+    bot._index_page('https://example.com/billing', page(TEXT))
+    # The print view changes to mirror the billing page
+    assert bot._index_page('https://example.com/billing?print=1', page(TEXT)) == 'https://example.com/billing'
+    assert bot.knowledge_base.search('shipping rates carrier') == []
+    assert {hit.url for hit in bot.knowledge_base.search('refunds')} == {'https://example.com/billing'}
+    bot.knowledge_base.close()
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import metrics
+from single_flight import SingleFlight, fingerprint
+
+
+def test_fingerprint_is_order_independent_for_dicts():
+    assert fingerprint({'a': 1, 'b': 2}) == fingerprint({'b': 2, 'a': 1})
+    assert fingerprint('a', 1) != fingerprint('a', 2)
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight("test-threads")
+    calls = []
+    started = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return 'result'
+
+    with ThreadPoolExecutor(8) as pool:
+        leader = pool.submit(flight.do, 'key', work)
+        started.wait()
+        followers = [pool.submit(flight.do, 'key', work) for _ in range(7)]
+        results = [leader.result()] + [f.result() for f in followers]
+    assert results == ['result'] * 8
+    assert len(calls) == 1
+    assert len(flight) == 0
+    assert metrics.SINGLE_FLIGHT.value(name="test-threads", outcome="coalesced") == 7
+
+
+def test_leader_exception_reaches_every_thread():
+    flight = SingleFlight("test-thread-errors")
+    started = threading.Event()
+
+    def work():
+        started.set()
+        time.sleep(0.05)
+        raise LookupError("upstream failed")
+
+    with ThreadPoolExecutor(5) as pool:
+        leader = pool.submit(flight.do, 'key', work)
+        started.wait()
+        futures = [leader] + [pool.submit(flight.do, 'key', work) for _ in range(4)]
+        for future in futures:
+            with pytest.raises(LookupError, match="upstream failed"):
+                future.result()
+    # The key is released, so the next call runs fresh
+    assert flight.do('key', lambda: 'retried') == 'retried'
+
+
+def test_leader_exception_reaches_every_coroutine():
+    flight = SingleFlight("test-async-errors")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        raise LookupError("upstream failed")
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async('key', work) for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(isinstance(r, LookupError) and str(r) == "upstream failed" for r in results)
+    assert len(flight) == 0
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight("test-cancel")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return 'done'
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do_async('key', work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do_async('key', work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(run()) == ('done', True)
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from youtube_music import _unescape_js_string, extract_initial_data, parse_tracks
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+
+def tracks_from(name):
+    return parse_tracks(extract_initial_data((FIXTURES / name).read_text(encoding='utf-8')))
+
+
+def test_unescape_js_string():
+    assert _unescape_js_string(r"\x7b\x22a\x22:é\/\\\n\x7d") == '{"a":é/\\\n}'
+
+
+def test_music_home_initial_data_push():
+    documents = extract_initial_data((FIXTURES / 'youtube_music_home.html').read_text(encoding='utf-8'))
+    assert len(documents) == 2  # the guide block and the browse data
+    assert tracks_from('youtube_music_home.html') == [
+        {'title': 'Flowers', 'artists': ['Miley Cyrus'], 'video_id': 'G7KNmW9a75Y'},
+        {'title': 'Under Pressure', 'artists': ['Queen', 'David Bowie'], 'video_id': 'a01QQZyl-_I'},
+        {'title': 'Blinding Lights', 'artists': ['The Weeknd'], 'video_id': '4NRXx6U8ABQ'},
+        {'title': 'Levitating', 'artists': ['Dua Lipa'], 'video_id': 'TUVcZfQe-Kw'},
+    ]
+
+
+def test_youtube_search_yt_initial_data():
+    assert tracks_from('youtube_search.html') == [
+        {'title': 'Queen – Bohemian Rhapsody (Official Video)', 'artists': ['Queen Official'],
+         'video_id': 'fJ9rUzIMcZQ'},
+        {'title': 'Luis Fonsi - Despacito ft. Daddy Yankee', 'artists': ['Luis Fonsi'], 'video_id': 'kJQP7kiw5Fk'},
+    ]
+
+
+def test_missing_fields_are_skipped_or_defaulted():
+    # The undecodable initialData block is skipped; items without a title or
+    # video id are dropped, missing artists give an empty list
+    assert tracks_from('youtube_music_missing_fields.html') == [
+        {'title': 'Instrumental', 'artists': [], 'video_id': 'instr000001'},
+        {'title': 'Lo-fi Beats', 'artists': [], 'video_id': 'lofi0000001'},
+        {'title': 'Untitled upload', 'artists': [], 'video_id': 'noOwner0001'},
+    ]
+
+
+def test_page_without_data():
+    assert extract_initial_data('<html><body>Consent required</body></html>') == []
+    assert parse_tracks([]) == []
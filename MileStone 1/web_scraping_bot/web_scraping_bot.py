@@ -5,16 +5,38 @@ from typing import Dict, Any, List, Optional
 from urllib.parse import urljoin, urlparse
 import logging
 import asyncio
+import os
 import random
+import metrics
+from content_scorer import extract_main_text
+from browser_pool import BrowserPool, playwright_available
+from robots import ROBOTS_USER_AGENT, RobotsCache
 
 logger = logging.getLogger(__name__)
 
+# Sections returned by _extract_main_content; each has an _extract_<section> helper
+CONTENT_SECTIONS = (
+    'title', 'meta_description', 'headings', 'paragraphs', 'links',
+    'lists', 'tables', 'contact_info', 'social_links', 'main_text'
+)
+
+# Pages whose static HTML yields less text than this are re-fetched through
+# the headless browser pool, if one is available
+MIN_STATIC_TEXT_CHARS = int(os.getenv("RENDER_MIN_TEXT_CHARS", "200"))
+
 class WebScrapingBot:
-    def __init__(self):
-        """Initialize the web scraping bot."""
+    def __init__(self, strict_robots: bool = True):
+        """Initialize the web scraping bot.
+
+        ``strict_robots`` makes an unreachable robots.txt block its host, as
+        RFC 9309 asks of crawlers; interactive scrapes pass False.
+        """
         self.session = None
         self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            # Ends in the product token robots.txt rules are matched against, so a site
+            # can recognise this bot in its logs and address it in robots.txt
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                          f"Chrome/120.0.0.0 Safari/537.36 {ROBOTS_USER_AGENT}",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
             "Accept-Encoding": "gzip, deflate, br",
@@ -27,13 +49,23 @@ class WebScrapingBot:
             "Cache-Control": "max-age=0"
         }
         self.timeout = aiohttp.ClientTimeout(total=30, connect=10)
+        # SCRAPER_RENDER: "auto" renders when Playwright is installed, "0" never renders
+        render_mode = os.getenv("SCRAPER_RENDER", "auto").lower()
+        self.render_enabled = render_mode not in ("0", "false", "no") and playwright_available()
+        self.browser_pool = None
+        # robots.txt rules are checked before every fetch unless SCRAPER_ROBOTS=0
+        self.robots = None
+        if os.getenv("SCRAPER_ROBOTS", "1").lower() not in ("0", "false", "no"):
+            self.robots = RobotsCache(lambda: self.session, user_agent=ROBOTS_USER_AGENT,
+                                      strict=strict_robots)
+        self.max_connections = int(os.getenv("SCRAPER_MAX_CONNECTIONS", "10"))
         
     async def init_session(self):
         """Initialize aiohttp session with retry options."""
         try:
             if self.session is None or self.session.closed:
                 connector = aiohttp.TCPConnector(
-                    limit=10,
+                    limit=self.max_connections,
                     force_close=False,
                     enable_cleanup_closed=True,
                     verify_ssl=False  # Only if needed for testing
@@ -41,17 +73,27 @@ class WebScrapingBot:
                 self.session = aiohttp.ClientSession(
                     headers=self.headers,
                     connector=connector,
-                    timeout=self.timeout
+                    timeout=self.timeout,
+                    trace_configs=metrics.http_trace_configs()
                 )
                 logger.debug("Created new aiohttp session with custom connector")
         except Exception as e:
-            logger.error(f"Error creating session: {str(e)}")
+            logger.error("Error creating session: %s", e)
             raise
         
     async def scrape_webpage(self, url: str, max_retries: int = 3) -> str:
         """Fetch webpage content with retries and advanced error handling."""
         retries = 0
         last_exception = None
+
+        if self.robots is not None:
+            if self.session is None or self.session.closed:
+                await self.init_session()
+            reason = await self.robots.blocked_reason(url)
+            if reason:
+                metrics.FETCH_TOTAL.inc(outcome="robots_disallowed")
+                raise PermissionError(f"Fetching {url} is {reason}")
+            await self.robots.throttle(url)
         
         while retries < max_retries:
             try:
@@ -63,28 +105,30 @@ class WebScrapingBot:
                 # Add random delay between retries to avoid rate limiting
                 if retries > 0:
                     delay = 2 ** retries + random.uniform(0, 1)
-                    logger.info(f"Waiting {delay:.2f} seconds before retry {retries + 1}")
+                    logger.info("Waiting %.2f seconds before retry %d", delay, retries + 1)
                     await asyncio.sleep(delay)
                 
-                logger.info(f"Attempting to scrape URL: {url} (Attempt {retries + 1}/{max_retries})")
+                logger.debug("Attempting to scrape URL: %s (Attempt %d/%d)", url, retries + 1, max_retries)
                 async with self.session.get(url, allow_redirects=True, ssl=False, compress=True) as response:
                     status = response.status
-                    logger.info(f"Request to {url} returned status: {status}")
+                    logger.debug("Request to %s returned status: %d", url, status)
                     
                     # Handle different status codes
+                    metrics.FETCH_TOTAL.inc(outcome=str(status))
                     if status == 200:
-                        content = await response.text(encoding='utf-8', errors='replace')
+                        with metrics.timer(metrics.HTTP_PHASE_SECONDS, phase="body"):
+                            content = await response.text(encoding='utf-8', errors='replace')
                         if content.strip():  # Verify we got actual content
-                            logger.info(f"Successfully scraped content from {url}")
+                            logger.debug("Successfully scraped content from %s", url)
                             return content
                         else:
                             raise Exception("Received empty response from server")
                     elif status == 500:
-                        logger.error(f"Server error (500) on attempt {retries + 1}/{max_retries}")
+                        logger.error("Server error (500) on attempt %d/%d", retries + 1, max_retries)
                         if retries == max_retries - 1:
                             raise aiohttp.ClientError(f"Persistent server error (500) after {max_retries} attempts")
                     elif status in [403, 429]:
-                        logger.error(f"Rate limited or blocked (status {status})")
+                        logger.error("Rate limited or blocked (status %d)", status)
                         # Longer delay for rate limiting
                         await asyncio.sleep(10 + (5 * retries))
                     elif status >= 400:
@@ -96,13 +140,14 @@ class WebScrapingBot:
                     response.raise_for_status()
                     
             except aiohttp.ClientError as e:
-                logger.error(f"HTTP error on attempt {retries + 1}/{max_retries}: {str(e)}")
+                logger.error("HTTP error on attempt %d/%d: %s", retries + 1, max_retries, e)
                 last_exception = e
             except asyncio.TimeoutError:
-                logger.error(f"Request timed out on attempt {retries + 1}/{max_retries}")
+                metrics.FETCH_TOTAL.inc(outcome="timeout")
+                logger.error("Request timed out on attempt %d/%d", retries + 1, max_retries)
                 last_exception = Exception("Request timed out")
             except Exception as e:
-                logger.error(f"Unexpected error on attempt {retries + 1}/{max_retries}: {str(e)}")
+                logger.error("Unexpected error on attempt %d/%d: %s", retries + 1, max_retries, e)
                 last_exception = e
             finally:
                 retries += 1
@@ -112,7 +157,7 @@ class WebScrapingBot:
                     try:
                         await self.close_session()
                     except Exception as e:
-                        logger.error(f"Error closing session: {str(e)}")
+                        logger.error("Error closing session: %s", e)
         
         # If we've exhausted all retries, raise the last exception
         if last_exception:
@@ -120,137 +165,189 @@ class WebScrapingBot:
         else:
             raise Exception("Failed to scrape webpage after all retries")
 
-    def _extract_main_content(self, html_content: str) -> Dict[str, Any]:
-        """Extract main content from HTML."""
-        try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Remove script and style elements
-            for element in soup(['script', 'style', 'iframe', 'noscript']):
-                element.decompose()
-            
-            # Extract title
-            title = ''
-            title_tag = soup.find('title')
-            if title_tag:
-                title = title_tag.string.strip() if title_tag.string else ''
-            
-            # Extract meta description
-            meta_description = ''
-            meta_desc_tag = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc_tag:
-                meta_description = meta_desc_tag.get('content', '').strip()
-            
-            # Extract headings
-            headings = {}
-            for i in range(1, 7):
-                h_tags = soup.find_all(f'h{i}')
-                if h_tags:
-                    headings[str(i)] = [h.get_text().strip() for h in h_tags if h.get_text().strip()]
-            
-            # Extract paragraphs
-            paragraphs = []
-            for p in soup.find_all('p'):
-                text = p.get_text().strip()
-                if text and len(text) > 20:  # Filter out short paragraphs
-                    paragraphs.append(text)
-            
-            # Extract links
-            links = []
-            for a in soup.find_all('a', href=True):
-                href = a['href']
-                text = a.get_text().strip()
-                if href and text and not href.startswith('#'):
-                    links.append({
-                        'url': href,
-                        'text': text
-                    })
-            
-            # Extract lists
-            lists = {
-                'ordered': [],
-                'unordered': []
-            }
-            
-            # Ordered lists
-            for ol in soup.find_all('ol'):
-                items = [li.get_text().strip() for li in ol.find_all('li') if li.get_text().strip()]
-                if items:
-                    lists['ordered'].append(items)
-            
-            # Unordered lists
-            for ul in soup.find_all('ul'):
-                items = [li.get_text().strip() for li in ul.find_all('li') if li.get_text().strip()]
-                if items:
-                    lists['unordered'].append(items)
-            
-            # Extract tables
-            tables = []
-            for table in soup.find_all('table'):
-                table_data = []
-                rows = table.find_all('tr')
-                
-                # Get headers
-                headers = []
-                header_row = table.find('thead')
-                if header_row:
-                    headers = [th.get_text().strip() for th in header_row.find_all(['th', 'td'])]
-                
-                # Get rows
-                for row in rows:
-                    cols = row.find_all(['td', 'th'])
-                    if cols:
-                        row_data = [col.get_text().strip() for col in cols]
-                        table_data.append(row_data)
-                
-                if table_data:
-                    tables.append({
-                        'headers': headers,
-                        'data': table_data
-                    })
-            
-            # Extract contact information
-            contact_info = {
-                'emails': [],
-                'phones': [],
-                'addresses': []
-            }
-            
-            # Email pattern
-            email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-            emails = re.findall(email_pattern, str(soup))
-            contact_info['emails'] = list(set(emails))
+    async def render_webpage(self, url: str, wait_for: Optional[str] = None) -> str:
+        """Render a JavaScript-driven page with the shared headless browser pool."""
+        if not self.render_enabled:
+            raise RuntimeError("Browser rendering is disabled or Playwright is not installed")
+        if self.robots is not None:
+            await self.init_session()
+            reason = await self.robots.blocked_reason(url)
+            if reason:
+                raise PermissionError(f"Rendering {url} is {reason}")
+        if self.browser_pool is None:
+            self.browser_pool = BrowserPool(
+                size=int(os.getenv("RENDER_POOL_SIZE", "2")),
+                user_agent=self.headers["User-Agent"]
+            )
+        logger.debug("Rendering %s in headless browser", url)
+        return await self.browser_pool.render(url, wait_for=wait_for)
+
+    @staticmethod
+    def content_text_length(content: Dict[str, Any]) -> int:
+        """Amount of readable text in extracted content, used to detect JS-only pages."""
+        if not content:
+            return 0
+        headings = sum(len(h) for level in content.get('headings', {}).values() for h in level)
+        paragraphs = sum(len(p) for p in content.get('paragraphs', []))
+        lists = sum(len(item) for kind in content.get('lists', {}).values() for lst in kind for item in lst)
+        return headings + paragraphs + lists
+
+    def _parse_html(self, html_content: str) -> BeautifulSoup:
+        """Parse HTML and strip elements that never carry page content."""
+        soup = BeautifulSoup(html_content, 'html.parser')
+        
+        # Remove script and style elements
+        for element in soup(['script', 'style', 'iframe', 'noscript']):
+            element.decompose()
+        return soup
+
+    def _extract_title(self, soup: BeautifulSoup) -> str:
+        title_tag = soup.find('title')
+        if title_tag:
+            return title_tag.string.strip() if title_tag.string else ''
+        return ''
+
+    def _extract_meta_description(self, soup: BeautifulSoup) -> str:
+        meta_desc_tag = soup.find('meta', attrs={'name': 'description'})
+        if meta_desc_tag:
+            return meta_desc_tag.get('content', '').strip()
+        return ''
+
+    def _extract_headings(self, soup: BeautifulSoup) -> Dict[str, List[str]]:
+        headings = {}
+        for i in range(1, 7):
+            h_tags = soup.find_all(f'h{i}')
+            if h_tags:
+                headings[str(i)] = [h.get_text().strip() for h in h_tags if h.get_text().strip()]
+        return headings
+
+    def _extract_paragraphs(self, soup: BeautifulSoup) -> List[str]:
+        paragraphs = []
+        for p in soup.find_all('p'):
+            text = p.get_text().strip()
+            if text and len(text) > 20:  # Filter out short paragraphs
+                paragraphs.append(text)
+        return paragraphs
+
+    def _extract_links(self, soup: BeautifulSoup, base_url: Optional[str] = None) -> List[Dict[str, str]]:
+        links = []
+        for a in soup.find_all('a', href=True):
+            href = a['href'].strip()
+            text = a.get_text().strip()
+            if href and text and not href.startswith('#'):
+                links.append({
+                    'url': urljoin(base_url, href) if base_url else href,
+                    'text': text
+                })
+        return links
+
+    def _extract_lists(self, soup: BeautifulSoup) -> Dict[str, List[List[str]]]:
+        lists = {
+            'ordered': [],
+            'unordered': []
+        }
+        
+        # Ordered lists
+        for ol in soup.find_all('ol'):
+            items = [li.get_text().strip() for li in ol.find_all('li') if li.get_text().strip()]
+            if items:
+                lists['ordered'].append(items)
+        
+        # Unordered lists
+        for ul in soup.find_all('ul'):
+            items = [li.get_text().strip() for li in ul.find_all('li') if li.get_text().strip()]
+            if items:
+                lists['unordered'].append(items)
+        return lists
+
+    def _extract_tables(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
+        tables = []
+        for table in soup.find_all('table'):
+            table_data = []
+            rows = table.find_all('tr')
             
-            # Phone pattern (basic)
-            phone_pattern = r'\+?[\d\s-]{10,}'
-            phones = re.findall(phone_pattern, str(soup))
-            contact_info['phones'] = [p.strip() for p in phones if len(re.sub(r'\D', '', p)) >= 10]
+            # Get headers
+            headers = []
+            header_row = table.find('thead')
+            if header_row:
+                headers = [th.get_text().strip() for th in header_row.find_all(['th', 'td'])]
             
-            # Extract social media links
-            social_patterns = {
-                'facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com',
-                'youtube.com', 'github.com', 'pinterest.com'
-            }
-            social_links = []
-            for a in soup.find_all('a', href=True):
-                href = a['href'].lower()
-                if any(pattern in href for pattern in social_patterns):
-                    social_links.append(href)
+            # Get rows
+            for row in rows:
+                cols = row.find_all(['td', 'th'])
+                if cols:
+                    row_data = [col.get_text().strip() for col in cols]
+                    table_data.append(row_data)
             
-            return {
-                'title': title,
-                'meta_description': meta_description,
-                'headings': headings,
-                'paragraphs': paragraphs,
-                'links': links,
-                'lists': lists,
-                'tables': tables,
-                'contact_info': contact_info,
-                'social_links': list(set(social_links))
-            }
+            if table_data:
+                tables.append({
+                    'headers': headers,
+                    'data': table_data
+                })
+        return tables
+
+    def _extract_contact_info(self, soup: BeautifulSoup) -> Dict[str, List[str]]:
+        contact_info = {
+            'emails': [],
+            'phones': [],
+            'addresses': []
+        }
+        page_text = str(soup)
+        
+        # Email pattern
+        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+        emails = re.findall(email_pattern, page_text)
+        contact_info['emails'] = list(set(emails))
+        
+        # Phone pattern (basic)
+        phone_pattern = r'\+?[\d\s-]{10,}'
+        phones = re.findall(phone_pattern, page_text)
+        contact_info['phones'] = [p.strip() for p in phones if len(re.sub(r'\D', '', p)) >= 10]
+        return contact_info
+
+    def _extract_social_links(self, soup: BeautifulSoup) -> List[str]:
+        social_patterns = {
+            'facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com',
+            'youtube.com', 'github.com', 'pinterest.com'
+        }
+        social_links = []
+        for a in soup.find_all('a', href=True):
+            href = a['href'].lower()
+            if any(pattern in href for pattern in social_patterns):
+                social_links.append(href)
+        return list(set(social_links))
+
+    def _extract_main_text(self, soup: BeautifulSoup) -> List[str]:
+        """Main-content blocks with navigation, banners and footers scored out."""
+        return extract_main_text(soup)
+
+    def _extract_sections(self, soup: BeautifulSoup, base_url: Optional[str] = None,
+                          content: Optional[Dict[str, Any]] = None,
+                          sections=CONTENT_SECTIONS) -> Dict[str, Any]:
+        """Fill ``content`` with the given sections, skipping any already extracted."""
+        content = {} if content is None else content
+        for section in sections:
+            if section in content:
+                continue
+            with metrics.timer(metrics.EXTRACT_SECTION_SECONDS, section=section):
+                if section == 'links':
+                    content[section] = self._extract_links(soup, base_url)
+                else:
+                    content[section] = getattr(self, f'_extract_{section}')(soup)
+        return content
+
+    def _extract_main_content(self, html_content: str, base_url: Optional[str] = None) -> Dict[str, Any]:
+        """Extract main content from HTML.
+
+        Link URLs are resolved against ``base_url`` (the page URL) when given.
+        """
+        try:
+            with metrics.timer(metrics.PARSE_SECONDS):
+                soup = self._parse_html(html_content)
+            return self._extract_sections(soup, base_url)
             
         except Exception as e:
-            logger.error(f"Error extracting content: {str(e)}")
+            logger.error("Error extracting content: %s", e)
             return {
                 'title': '',
                 'meta_description': '',
@@ -260,7 +357,8 @@ class WebScrapingBot:
                 'lists': {'ordered': [], 'unordered': []},
                 'tables': [],
                 'contact_info': {'emails': [], 'phones': [], 'addresses': []},
-                'social_links': []
+                'social_links': [],
+                'main_text': []
             }
 
     async def close_session(self):
@@ -269,3 +367,9 @@ class WebScrapingBot:
             await self.session.close()
             self.session = None
             logger.debug("Closed aiohttp session")
+
+    async def close_browser_pool(self):
+        """Shut down the headless browser pool, if one was started."""
+        if self.browser_pool:
+            await self.browser_pool.close()
+            self.browser_pool = None
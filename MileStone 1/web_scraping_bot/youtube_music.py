@@ -0,0 +1,228 @@
+"""HTTP-first YouTube Music listing scraper.
+
+YouTube Music embeds the data used to render a page as JSON in the initial
+HTML (``initialData.push({..., data: '\\x7b...'})`` on music.youtube.com and
+``var ytInitialData = {...}`` on youtube.com). This module fetches the page
+over plain aiohttp with the shared ``WebScrapingBot`` session and reads the
+titles, artists and video IDs from that JSON, which takes a single request
+instead of driving a full browser.
+
+A headless browser is kept only as an optional fallback (``use_browser``),
+using event-driven waits instead of fixed sleeps.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+from yarl import URL
+
+from web_scraping_bot import WebScrapingBot
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_MUSIC_URL = "https://music.youtube.com/"
+
+# Skips the EU consent interstitial so the real page (and its data) is served
+CONSENT_COOKIE = "SOCS=CAI; CONSENT=YES+1"
+
+_INITIAL_DATA_PUSH = re.compile(r"initialData\.push\(\{.*?data:\s*'((?:[^'\\]|\\.)*)'", re.DOTALL)
+_YT_INITIAL_DATA = re.compile(r"(?:var\s+ytInitialData|window\[\"ytInitialData\"\])\s*=\s*")
+_JS_ESCAPE = re.compile(r"\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|.)", re.DOTALL)
+_SIMPLE_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+
+
+def _unescape_js_string(value: str) -> str:
+    """Decode the escapes of a single-quoted JavaScript string literal."""
+    def replace(match):
+        escape = match.group(1)
+        if escape[0] in 'xu' and len(escape) > 1:
+            return chr(int(escape[1:], 16))
+        return _SIMPLE_ESCAPES.get(escape, escape)
+    return _JS_ESCAPE.sub(replace, value)
+
+
+def extract_initial_data(html: str) -> List[Dict[str, Any]]:
+    """Return every initial-data JSON document embedded in the page."""
+    documents = []
+    for match in _INITIAL_DATA_PUSH.finditer(html):
+        try:
+            documents.append(json.loads(_unescape_js_string(match.group(1))))
+        except ValueError as e:
+            logger.debug("Skipping undecodable initialData block: %s", e)
+
+    decoder = json.JSONDecoder()
+    for match in _YT_INITIAL_DATA.finditer(html):
+        try:
+            document, _ = decoder.raw_decode(html, match.end())
+            documents.append(document)
+        except ValueError as e:
+            logger.debug("Skipping undecodable ytInitialData block: %s", e)
+    return documents
+
+
+def _walk(node: Any, key: str) -> Iterator[Dict[str, Any]]:
+    """Yield every value stored under ``key`` anywhere in a JSON document."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            for k, v in current.items():
+                if k == key and isinstance(v, dict):
+                    yield v
+                elif isinstance(v, (dict, list)):
+                    stack.append(v)
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+
+
+def _runs_text(text_node: Optional[Dict]) -> str:
+    if not text_node:
+        return ''
+    if 'simpleText' in text_node:
+        return text_node['simpleText']
+    return ''.join(run.get('text', '') for run in text_node.get('runs', []))
+
+
+def _artists(runs: List[Dict]) -> List[str]:
+    """Artist names from text runs, preferring runs linked to artist pages."""
+    linked = []
+    for run in runs:
+        page_type = (run.get('navigationEndpoint', {}).get('browseEndpoint', {})
+                     .get('browseEndpointContextSupportedConfigs', {})
+                     .get('browseEndpointContextMusicConfig', {}).get('pageType'))
+        if page_type == 'MUSIC_PAGE_TYPE_ARTIST':
+            linked.append(run['text'])
+    if linked:
+        return linked
+    # Unlinked subtitles look like "Song • Artist • 3.2M plays"
+    parts = [run.get('text', '').strip() for run in runs]
+    parts = [p for p in parts if p and p not in ('•', '&', ',')]
+    return parts[1:2] if len(parts) > 1 else parts
+
+
+def _watch_video_id(node: Dict) -> Optional[str]:
+    for endpoint in _walk(node, 'watchEndpoint'):
+        if endpoint.get('videoId'):
+            return endpoint['videoId']
+    return None
+
+
+def parse_tracks(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Extract ``{'title', 'artists', 'video_id'}`` listings from initial data."""
+    tracks = []
+    seen = set()
+
+    def add(title, artists, video_id):
+        if title and video_id and video_id not in seen:
+            seen.add(video_id)
+            tracks.append({'title': title, 'artists': artists, 'video_id': video_id})
+
+    for document in documents:
+        # Song rows (charts, search results, playlists)
+        for item in _walk(document, 'musicResponsiveListItemRenderer'):
+            columns = [c.get('musicResponsiveListItemFlexColumnRenderer', {}).get('text', {})
+                       for c in item.get('flexColumns', [])]
+            title = _runs_text(columns[0]) if columns else ''
+            artist_runs = [run for column in columns[1:] for run in column.get('runs', [])]
+            video_id = item.get('playlistItemData', {}).get('videoId') or _watch_video_id(item)
+            add(title, _artists(artist_runs), video_id)
+
+        # Carousel cards on the home page
+        for item in _walk(document, 'musicTwoRowItemRenderer'):
+            video_id = item.get('navigationEndpoint', {}).get('watchEndpoint', {}).get('videoId')
+            add(_runs_text(item.get('title')), _artists(item.get('subtitle', {}).get('runs', [])), video_id)
+
+        # Regular youtube.com video results
+        for item in _walk(document, 'videoRenderer'):
+            owner = item.get('ownerText') or item.get('longBylineText') or {}
+            add(_runs_text(item.get('title')), [_runs_text(owner)] if owner else [], item.get('videoId'))
+    return tracks
+
+
+class YouTubeMusicScraper:
+    """Scrapes YouTube Music listings over HTTP, with an optional browser fallback."""
+
+    def __init__(self, bot: Optional[WebScrapingBot] = None):
+        self.bot = bot or WebScrapingBot()
+
+    async def fetch_tracks(self, url: str = YOUTUBE_MUSIC_URL, use_browser: bool = False) -> List[Dict[str, Any]]:
+        """Fetch a YouTube Music page and return its track listings."""
+        await self.bot.init_session()
+        self.bot.session.cookie_jar.update_cookies(
+            dict(pair.split('=', 1) for pair in CONSENT_COOKIE.split('; ')), response_url=URL(url)
+        )
+        html = await self.bot.scrape_webpage(url)
+        tracks = parse_tracks(extract_initial_data(html))
+        logger.info("Parsed %d tracks from %s over HTTP", len(tracks), url)
+
+        if not tracks and use_browser:
+            logger.info("No embedded data found, falling back to a headless browser")
+            loop = asyncio.get_running_loop()
+            tracks = await loop.run_in_executor(None, fetch_tracks_with_browser, url)
+        return tracks
+
+    async def close(self):
+        await self.bot.close_session()
+
+
+def fetch_tracks_with_browser(url: str = YOUTUBE_MUSIC_URL, timeout: float = 15) -> List[Dict[str, Any]]:
+    """Browser fallback: render the page in headless Edge and read the listings.
+
+    Requires selenium and msedgedriver (``MSEDGEDRIVER`` overrides its path).
+    Waits on DOM conditions rather than fixed sleeps and returns as soon as
+    the listings are present.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.edge.options import Options
+    from selenium.webdriver.edge.service import Service
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    options = Options()
+    for argument in ("--headless", "--disable-gpu", "--no-sandbox", "--blink-settings=imagesEnabled=false"):
+        options.add_argument(argument)
+    options.page_load_strategy = 'eager'  # don't wait for media and other subresources
+    driver_path = os.getenv("MSEDGEDRIVER")
+    driver = webdriver.Edge(service=Service(driver_path) if driver_path else None, options=options)
+    try:
+        driver.get(url)
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located(
+            (By.CSS_SELECTOR, "ytmusic-responsive-list-item-renderer, ytmusic-two-row-item-renderer")
+        ))
+        # The app keeps its initial data on window; prefer it over DOM scraping
+        data = driver.execute_script("return window.ytInitialData || null")
+        if data:
+            tracks = parse_tracks([data])
+            if tracks:
+                return tracks
+        return parse_tracks(extract_initial_data(driver.page_source))
+    finally:
+        driver.quit()
+
+
+async def _main(args):
+    if args.from_file:
+        with open(args.from_file, encoding='utf-8') as f:
+            tracks = parse_tracks(extract_initial_data(f.read()))
+    else:
+        scraper = YouTubeMusicScraper()
+        try:
+            tracks = await scraper.fetch_tracks(args.url, use_browser=args.browser)
+        finally:
+            await scraper.close()
+    print(json.dumps(tracks[:args.limit] if args.limit else tracks, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List tracks from a YouTube Music page.")
+    parser.add_argument("--url", default=YOUTUBE_MUSIC_URL, help="Page to scrape")
+    parser.add_argument("--from-file", help="Parse a saved page instead of fetching")
+    parser.add_argument("--browser", action="store_true", help="Fall back to a headless browser if needed")
+    parser.add_argument("--limit", type=int, default=0, help="Only print the first N tracks")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))